@@ -0,0 +1,230 @@
+import argparse
+import gc
+import json
+import sys
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+from benchmarks.headless import build_game_view, start_flight, step
+from shiiiuuuu import GameState, GcPolicy, GlyphLabel
+
+# steady-state ceilings per frame once pools, glyphs and instructions are
+# warm; retained blocks are what eventually drives gc collections
+BUDGETS = {
+    "flight": {"retained_blocks_per_frame": 0.05, "peak_bytes_p95": 4096},
+    "idle": {"retained_blocks_per_frame": 0.05, "peak_bytes_p95": 512},
+    "particles": {"retained_blocks_per_frame": 0.05, "peak_bytes_p95": 512},
+    # once warm, rounds reuse the history slots and floating texts as they are
+    "rounds": {"widget_growth": 0, "instruction_growth": 0, "glyph_renders": 0},
+}
+
+
+def flight_scenario(dt: float) -> Callable[[int], None]:
+    view = build_game_view()
+    start_flight(view)
+
+    def frame(index: int):
+        step(view, index, dt)
+
+    return frame
+
+
+def idle_scenario(dt: float) -> Callable[[int], None]:
+    view = build_game_view()
+    start_flight(view, crash_point=1.0)
+    step(view, 0, dt)
+    assert view.state.state == GameState.CRASHED
+
+    def frame(index: int):
+        view.update_game(dt)
+
+    return frame
+
+
+def particles_scenario(dt: float) -> Callable[[int], None]:
+    view = build_game_view()
+    pool = view.particles
+    pool.emit(0, 0, len(pool.particles), (1, 1, 1, 1), (1e9, 1e9), (4, 8), (-1, 1))
+
+    def frame(index: int):
+        pool.update(dt)
+
+    return frame
+
+
+SCENARIOS = {
+    "flight": flight_scenario,
+    "idle": idle_scenario,
+    "particles": particles_scenario,
+}
+
+
+def play_round(view, index: int, dt: float):
+    # alternate cash-outs and crashes, with varied amounts and multipliers
+    bet = 10 + index % 7
+    if view.state.state != GameState.BETTING:
+        view.reset_game(0)
+    if not view.state.can_place_bet(bet):
+        # crashes drain the balance; a refused bet would make an empty round
+        view.state.reset_balance()
+    start_flight(view, bet=bet, crash_point=1.3 + (index % 5) * 0.37)
+    assert view.state.state == GameState.FLYING, "round did not start"
+    frame = 0
+    while view.state.state == GameState.FLYING:
+        step(view, frame, dt)
+        frame += 1
+        if index % 2 and frame == 20:
+            view.state.cooldown_cashout = False
+            view.cash_out(None)
+    for _ in range(60):
+        view.update_game(dt)
+
+
+def scene_size(view) -> Tuple[int, int]:
+    widgets = list(view.walk())
+    instructions = 0
+    for widget in widgets:
+        canvas = widget.canvas
+        instructions += len(canvas.children)
+        # reading before/after would create them, so only count existing ones
+        if canvas.has_before:
+            instructions += len(canvas.before.children)
+        if canvas.has_after:
+            instructions += len(canvas.after.children)
+    return len(widgets), instructions
+
+
+def measure_rounds(rounds: int, warmup: int, dt: float) -> Dict:
+    view = build_game_view()
+    for index in range(warmup):
+        play_round(view, index, dt)
+    widgets, instructions = scene_size(view)
+    renders = GlyphLabel.cache.renders
+    for index in range(warmup, warmup + rounds):
+        play_round(view, index, dt)
+    after_widgets, after_instructions = scene_size(view)
+    return {
+        "scenario": "rounds",
+        "rounds": rounds,
+        "widget_growth": after_widgets - widgets,
+        "instruction_growth": after_instructions - instructions,
+        "glyph_renders": GlyphLabel.cache.renders - renders,
+    }
+
+
+def _percentile(values: List[int], q: float) -> int:
+    ordered = sorted(values)
+    return ordered[int(q * (len(ordered) - 1))]
+
+
+def measure(name: str, frames: int, warmup: int, dt: float, gc_mode: str) -> Dict:
+    frame = SCENARIOS[name](dt)
+    for index in range(warmup):
+        frame(index)
+
+    # pass 1: blocks still alive after the run, with the chosen gc policy
+    policy = GcPolicy(gc_mode)
+    gc.collect()
+    policy.reset()
+    start_blocks = sys.getallocatedblocks()
+    policy.begin_flight()
+    for index in range(warmup, warmup + frames):
+        frame(index)
+    policy.end_flight()
+    policy.close()
+    gc.collect()
+    retained_blocks = sys.getallocatedblocks() - start_blocks
+
+    # pass 2: transient bytes allocated inside each frame
+    tracemalloc.start()
+    peaks: List[int] = []
+    for index in range(warmup + frames, warmup + 2 * frames):
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        frame(index)
+        _, peak = tracemalloc.get_traced_memory()
+        peaks.append(peak - before)
+    tracemalloc.stop()
+
+    return {
+        "scenario": name,
+        "frames": frames,
+        "dt": dt,
+        "retained_blocks_per_frame": retained_blocks / frames,
+        "peak_bytes_p50": _percentile(peaks, 0.50),
+        "peak_bytes_p95": _percentile(peaks, 0.95),
+        "peak_bytes_max": max(peaks),
+        "gc": policy.summary(),
+    }
+
+
+def check(result: Dict) -> List[str]:
+    failures = []
+    for key, limit in BUDGETS[result["scenario"]].items():
+        if result[key] > limit:
+            failures.append(
+                f"{result['scenario']}: {key} {result[key]:.1f} exceeds {limit}"
+            )
+    return failures
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Measure per-frame allocations of the headless game loop"
+    )
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--warmup", type=int, default=240)
+    parser.add_argument("--dt", type=float, default=1 / 60)
+    parser.add_argument(
+        "--rounds", type=int, default=20, help="rounds played after warm-up"
+    )
+    parser.add_argument(
+        "--scenario",
+        choices=sorted(SCENARIOS) + ["rounds"],
+        action="append",
+        dest="scenarios",
+    )
+    parser.add_argument("--gc-mode", choices=GcPolicy.MODES, default="default")
+    parser.add_argument(
+        "--check", action="store_true", help="exit 1 when a budget is exceeded"
+    )
+    parser.add_argument("--json", metavar="PATH", help="also write results to PATH")
+    args = parser.parse_args(argv)
+
+    names = args.scenarios or sorted(SCENARIOS) + ["rounds"]
+    results = [
+        measure(name, args.frames, args.warmup, args.dt, args.gc_mode)
+        for name in names
+        if name in SCENARIOS
+    ]
+    for result in results:
+        pauses = result["gc"]["pauses"]
+        print(
+            f"{result['scenario']:<10}"
+            f" retained {result['retained_blocks_per_frame']:6.2f} blocks/frame"
+            f"  peak p50 {result['peak_bytes_p50']:6d} B p95 {result['peak_bytes_p95']:6d} B"
+            f"  gc {result['gc']['collections']} max pause {pauses['max_ms']:.2f}ms"
+        )
+    if "rounds" in names:
+        # the history column fills up over its first rounds, so warm past it
+        result = measure_rounds(args.rounds, 25, args.dt)
+        print(
+            f"{'rounds':<10} {result['rounds']} rounds after warm-up:"
+            f" widgets {result['widget_growth']:+d}"
+            f"  instructions {result['instruction_growth']:+d}"
+            f"  glyph renders {result['glyph_renders']}"
+        )
+        results.append(result)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    failures = [failure for result in results for failure in check(result)]
+    for failure in failures:
+        # kivy has replaced sys.stderr with its log by now
+        print(f"over budget: {failure}", file=sys.__stderr__)
+    return 1 if args.check and failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Dict, List
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shiiiuuuu_betbook import BetBook
+
+SEAT_COUNTS = (100, 1000, 10000, 100000)
+MANUAL_SHARE = 0.1
+AUTO_SHARE = 0.5
+
+
+def fill(book: BetBook, seats: int, rng: np.random.Generator):
+    amounts = rng.integers(10, 500, seats).tolist()
+    targets = np.where(
+        rng.random(seats) < AUTO_SHARE, rng.uniform(1.1, 5.0, seats), 0.0
+    ).tolist()
+    book.clear()
+    for player_id in range(seats):
+        book.place(player_id, amounts[player_id], targets[player_id])
+
+
+def scalar_settle(bets: List[tuple], crash_point: float) -> int:
+    # what one-bet-at-a-time settlement costs, for comparison
+    paid = 0
+    for player_id, amount, target, cashed in bets:
+        if cashed:
+            paid += int(amount * cashed)
+        elif 0 < target < crash_point:
+            paid += int(amount * target)
+    return paid
+
+
+def measure(seats: int, repeats: int, seed: int) -> Dict[str, float]:
+    rng = np.random.default_rng(seed)
+    book = BetBook()
+    manual_ids = rng.choice(seats, int(seats * MANUAL_SHARE), replace=False).tolist()
+    settle_times = []
+    cash_out_times = []
+    scalar_times = []
+    for _ in range(repeats):
+        fill(book, seats, rng)
+
+        started = time.perf_counter()
+        for player_id in manual_ids:
+            book.cash_out(player_id, 1.5)
+        if manual_ids:
+            cash_out_times.append((time.perf_counter() - started) / len(manual_ids))
+
+        bets = list(
+            zip(
+                book.player_ids[:seats].tolist(),
+                book.amounts[:seats].tolist(),
+                book.targets[:seats].tolist(),
+                book.cashed[:seats].tolist(),
+            )
+        )
+        started = time.perf_counter()
+        expected = scalar_settle(bets, 3.0)
+        scalar_times.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        settlement = book.settle(3.0)
+        settle_times.append(time.perf_counter() - started)
+        assert settlement.paid == expected
+
+    settle = statistics.median(settle_times)
+    return {
+        "seats": seats,
+        "settle_ms": settle * 1000,
+        "settle_ns_per_seat": settle / seats * 1e9,
+        "scalar_settle_ms": statistics.median(scalar_times) * 1000,
+        "manual_cash_out_us": statistics.median(cash_out_times) * 1e6,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark round settlement")
+    parser.add_argument("--repeats", type=int, default=9)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", metavar="PATH", help="write results to PATH")
+    args = parser.parse_args(argv)
+
+    results = []
+    for seats in SEAT_COUNTS:
+        result = measure(seats, args.repeats, args.seed)
+        results.append(result)
+        print(
+            f"{seats:>7} seats  settle {result['settle_ms']:8.3f} ms"
+            f" ({result['settle_ns_per_seat']:7.1f} ns/seat)"
+            f"  scalar {result['scalar_settle_ms']:8.3f} ms"
+            f"  manual cash-out {result['manual_cash_out_us']:5.2f} us"
+        )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,55 @@
+import os
+import random
+import sys
+import tempfile
+import time
+
+# kivy must be configured before it is first imported: the mock gl backend
+# lets the game widgets build and update on machines without a gpu
+os.environ.setdefault("KIVY_GL_BACKEND", "mock")
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+os.environ.setdefault("KIVY_NO_CONSOLELOG", "1")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shiiiuuuu import (
+    Config,
+    GameState,
+    StateManager,
+    GameEngine,
+    AssetManager,
+    GameView,
+)
+
+
+def isolate_stats() -> str:
+    # keep benchmark rounds out of the player's real stats file
+    directory = tempfile.mkdtemp(prefix="shiiiuuuu-bench-")
+    Config.STATS_FILE = os.path.join(directory, "stats.json")
+    Config.HISTORY_FILE = os.path.join(directory, "history.log")
+    return directory
+
+
+def build_game_view(**kwargs) -> GameView:
+    isolate_stats()
+    state = StateManager()
+    assets = AssetManager(preload=False)
+    engine = GameEngine(state, assets)
+    return GameView(state, engine, assets, **kwargs)
+
+
+def start_flight(view: GameView, bet: int = 10, crash_point: float = 1e9, seed=0):
+    view.state.cooldown_bet = False
+    view.state.cooldown_cashout = False
+    if view.state.state != GameState.BETTING:
+        view.reset_game(0)
+    view.bet_input.text = str(bet)
+    view.place_bet(None)
+    view.state.crash_point = crash_point
+    random.seed(seed)
+
+
+def step(view: GameView, frame: int, dt: float):
+    # drive the multiplier from the simulated clock instead of wall time
+    if view.state.state == GameState.FLYING:
+        view.state.start_time = time.time() - frame * dt
+    view.update_game(dt)
@@ -0,0 +1,463 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shiiiuuuu_core import Config
+from shiiiuuuu_server import (
+    BETTING,
+    ROUND_START,
+    BET_RESULT,
+    CASHED_OUT,
+    CRASHED,
+    RoundClient,
+    raise_file_limit,
+)
+
+SERVER = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "shiiiuuuu_server.py"
+)
+PERCENTILES = (50, 95, 99)
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+    last = len(ordered) - 1
+    summary = {"count": len(ordered)}
+    for p in PERCENTILES:
+        summary[f"p{p}_ms"] = round(ordered[round(p / 100 * last)] * 1000, 3)
+    summary["max_ms"] = round(ordered[-1] * 1000, 3)
+    return summary
+
+
+class Recorder:
+    def __init__(self, rounds: int):
+        self.rounds = rounds
+        self.active = False
+        self.first_round: Optional[int] = None
+        self.crashed_rounds = set()
+        self.done = asyncio.Event()
+        self.bet_latency: List[float] = []
+        self.cash_out_latency: List[float] = []
+        self.start_delay: List[float] = []
+        self.arrivals: Dict[int, List[float]] = {}
+        self.counts = {
+            "bets_sent": 0,
+            "bets_rejected": 0,
+            "cash_outs_sent": 0,
+            "cash_outs_late": 0,
+            "auto_cash_outs": 0,
+            "disconnects": 0,
+            "connect_failures": 0,
+        }
+
+    def measuring(self, round_id: int) -> bool:
+        return self.first_round is not None and round_id >= self.first_round
+
+    def round_open(self, round_id: int):
+        if self.active and self.first_round is None:
+            self.first_round = round_id
+
+    def round_start(self, round_id: int, arrived: float, delay: float):
+        if not self.measuring(round_id):
+            return
+        self.start_delay.append(delay)
+        first_last = self.arrivals.get(round_id)
+        if first_last is None:
+            self.arrivals[round_id] = [arrived, arrived]
+        else:
+            first_last[1] = arrived
+
+    def round_crashed(self, round_id: int):
+        if not self.measuring(round_id):
+            return
+        self.crashed_rounds.add(round_id)
+        if len(self.crashed_rounds) >= self.rounds:
+            self.done.set()
+
+    def summary(self) -> Dict:
+        return {
+            "bet_ack": percentiles(self.bet_latency),
+            "cash_out_ack": percentiles(self.cash_out_latency),
+            "round_start_delay": percentiles(self.start_delay),
+            # time between the first and last client receiving a round start,
+            # all on this process's clock
+            "round_start_fan_out": percentiles(
+                [last - first for first, last in self.arrivals.values()]
+            ),
+            "counts": self.counts,
+        }
+
+
+# one simulated player. bets at a random point early in each betting window,
+# either with an auto target or with a manual target it cashes out at by
+# scheduling the cash-out for the local time the curve reaches it
+class SimulatedPlayer(RoundClient):
+    def __init__(self, recorder: Recorder, options: argparse.Namespace, seed: int):
+        super().__init__()
+        self.recorder = recorder
+        self.options = options
+        self.rng = random.Random(seed)
+        self.loop = asyncio.get_running_loop()
+        self.bet_sent: List[float] = []
+        self.cash_out_sent = 0.0
+        self.manual_target = 0.0
+        self.cash_out_timer: Optional[asyncio.TimerHandle] = None
+        self.bet_timer: Optional[asyncio.TimerHandle] = None
+
+    def connection_lost(self, exc: Optional[Exception]):
+        self.recorder.counts["disconnects"] += 1
+
+    def _apply(self, message):
+        super()._apply(message)
+        kind = message[0]
+        recorder = self.recorder
+        now = time.monotonic()
+        if kind == BETTING:
+            recorder.round_open(message[1])
+            if recorder.measuring(message[1]):
+                self.plan_bet()
+        elif kind == ROUND_START:
+            recorder.round_start(
+                self.round_id, now, self.server_time() - self.start_time
+            )
+            if self.manual_target:
+                self.plan_cash_out()
+        elif kind == BET_RESULT:
+            if self.bet_sent:
+                recorder.bet_latency.append(now - self.bet_sent.pop(0))
+            if not message[4]:
+                recorder.counts["bets_rejected"] += 1
+                self.manual_target = 0.0
+        elif kind == CASHED_OUT:
+            if self.cash_out_sent:
+                recorder.cash_out_latency.append(now - self.cash_out_sent)
+                self.cash_out_sent = 0.0
+                if not message[2]:
+                    recorder.counts["cash_outs_late"] += 1
+            elif recorder.measuring(message[1]):
+                recorder.counts["auto_cash_outs"] += 1
+        elif kind == CRASHED:
+            if self.cash_out_timer is not None:
+                self.cash_out_timer.cancel()
+                self.cash_out_timer = None
+            self.manual_target = 0.0
+            recorder.round_crashed(message[1])
+
+    def plan_bet(self):
+        options = self.options
+        self.manual_target = 0.0
+        if self.rng.random() >= options.bet_share:
+            return
+        delay = self.rng.uniform(0.0, options.bet_spread)
+        self.bet_timer = self.loop.call_later(delay, self.place_bet)
+
+    def place_bet(self):
+        options = self.options
+        rng = self.rng
+        target = 0.0
+        if rng.random() < options.auto_share:
+            target = rng.uniform(*options.auto_range)
+        else:
+            self.manual_target = rng.uniform(*options.cash_out_range)
+        self.bet_sent.append(time.monotonic())
+        self.recorder.counts["bets_sent"] += 1
+        self.bet(rng.choice(options.amounts), target)
+
+    def plan_cash_out(self):
+        factor, exponent = self.growth
+        reach = ((self.manual_target - 1.0) / factor) ** (1.0 / exponent)
+        local_start = self.start_time - self.clock_offset
+        delay = max(0.0, local_start + reach - time.monotonic())
+        self.cash_out_timer = self.loop.call_later(delay, self.send_cash_out)
+
+    def send_cash_out(self):
+        self.cash_out_timer = None
+        self.cash_out_sent = time.monotonic()
+        self.recorder.counts["cash_outs_sent"] += 1
+        self.cash_out()
+
+
+class ProcSampler:
+    # cpu and memory of another process from /proc, linux only
+    def __init__(self, pid: int):
+        self.pid = pid
+        self.ticks = os.sysconf("SC_CLK_TCK")
+        self.cpu_percent: List[float] = []
+        self.rss_kb: List[int] = []
+        self.started_cpu = 0.0
+        self.started_wall = 0.0
+        self.last_cpu = 0.0
+        self.last_wall = 0.0
+
+    def cpu_seconds(self) -> float:
+        with open(f"/proc/{self.pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        # utime and stime are fields 14 and 15; the split drops the first two
+        return (int(fields[11]) + int(fields[12])) / self.ticks
+
+    def status_kb(self, key: str) -> int:
+        with open(f"/proc/{self.pid}/status") as f:
+            for line in f:
+                if line.startswith(key + ":"):
+                    return int(line.split()[1])
+        return 0
+
+    def start(self):
+        self.started_cpu = self.last_cpu = self.cpu_seconds()
+        self.started_wall = self.last_wall = time.monotonic()
+
+    def sample(self):
+        cpu = self.cpu_seconds()
+        wall = time.monotonic()
+        if wall > self.last_wall:
+            self.cpu_percent.append(
+                (cpu - self.last_cpu) / (wall - self.last_wall) * 100
+            )
+        self.last_cpu, self.last_wall = cpu, wall
+        self.rss_kb.append(self.status_kb("VmRSS"))
+
+    async def run(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            self.sample()
+
+    def summary(self) -> Dict:
+        wall = self.last_wall - self.started_wall
+        return {
+            "cpu_seconds": round(self.last_cpu - self.started_cpu, 3),
+            "cpu_percent_mean": round(
+                (self.last_cpu - self.started_cpu) / wall * 100 if wall else 0.0, 1
+            ),
+            "cpu_percent_max": round(max(self.cpu_percent, default=0.0), 1),
+            "rss_kb": self.rss_kb[-1] if self.rss_kb else 0,
+            "rss_peak_kb": self.status_kb("VmHWM"),
+        }
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def spawn_server(options: argparse.Namespace, port: int) -> subprocess.Popen:
+    log = open(options.server_log, "w")
+    return subprocess.Popen(
+        [
+            sys.executable,
+            SERVER,
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--betting-window",
+            str(options.betting_window),
+            "--result-pause",
+            str(options.result_pause),
+            "--balance",
+            str(options.balance),
+        ],
+        stdout=subprocess.DEVNULL,
+        stderr=log,
+    )
+
+
+async def wait_for_port(port: int, process: subprocess.Popen, timeout: float = 10.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        if process.poll() is not None:
+            raise RuntimeError(f"server exited with {process.returncode}")
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+        except OSError:
+            if time.monotonic() > deadline:
+                raise RuntimeError("server did not start listening")
+            await asyncio.sleep(0.05)
+            continue
+        writer.close()
+        return
+
+
+async def connect_players(
+    options: argparse.Namespace, port: int, recorder: Recorder
+) -> List[SimulatedPlayer]:
+    loop = asyncio.get_running_loop()
+    gate = asyncio.Semaphore(options.connect_concurrency)
+    players: List[SimulatedPlayer] = []
+
+    async def connect(index: int):
+        async with gate:
+            try:
+                _, player = await loop.create_connection(
+                    lambda: SimulatedPlayer(recorder, options, options.seed + index),
+                    "127.0.0.1",
+                    port,
+                )
+            except OSError:
+                recorder.counts["connect_failures"] += 1
+                return
+            players.append(player)
+
+    await asyncio.gather(*(connect(index) for index in range(options.clients)))
+    return players
+
+
+async def run_load(options: argparse.Namespace, port: int, pid: int) -> Dict:
+    recorder = Recorder(options.rounds)
+    sampler = ProcSampler(pid)
+
+    connect_started = time.monotonic()
+    players = await connect_players(options, port, recorder)
+    connect_seconds = time.monotonic() - connect_started
+
+    # settle the clock offsets once the connect storm is over
+    await asyncio.sleep(0.5)
+    for player in players:
+        player.ping()
+    await asyncio.sleep(0.5)
+
+    recorder.active = True
+    sampler.start()
+    client_cpu = time.process_time()
+    client_wall = time.monotonic()
+    sampling = asyncio.ensure_future(sampler.run(options.sample_interval))
+    try:
+        await asyncio.wait_for(recorder.done.wait(), options.timeout)
+        timed_out = False
+    except asyncio.TimeoutError:
+        timed_out = True
+    sampler.sample()
+    sampling.cancel()
+    client_cpu = time.process_time() - client_cpu
+    client_wall = time.monotonic() - client_wall
+
+    for player in players:
+        if player.transport is not None:
+            player.transport.close()
+
+    result = recorder.summary()
+    result.update(
+        {
+            "clients": len(players),
+            "rounds": len(recorder.crashed_rounds),
+            "timed_out": timed_out,
+            "connect_seconds": round(connect_seconds, 3),
+            "server": sampler.summary(),
+            # when this nears 100 the generator, not the server, is the limit
+            "load_generator_cpu_percent": round(client_cpu / client_wall * 100, 1),
+        }
+    )
+    return result
+
+
+def parse_range(text: str):
+    low, high = (float(part) for part in text.split(","))
+    return low, high
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Load test the round server with simulated clients"
+    )
+    parser.add_argument("--clients", type=int, default=5000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--betting-window", type=float, default=3.0)
+    parser.add_argument("--result-pause", type=float, default=1.0)
+    parser.add_argument(
+        "--bet-share", type=float, default=0.8, help="chance a client bets a round"
+    )
+    parser.add_argument(
+        "--bet-spread",
+        type=float,
+        default=1.0,
+        metavar="SECONDS",
+        help="bets are sent at a random point in this much of the window",
+    )
+    parser.add_argument(
+        "--auto-share", type=float, default=0.5, help="share of bets with a target"
+    )
+    parser.add_argument("--auto-range", type=parse_range, default=(1.1, 5.0))
+    parser.add_argument("--cash-out-range", type=parse_range, default=(1.05, 3.0))
+    parser.add_argument(
+        "--amounts",
+        type=lambda text: [int(part) for part in text.split(",")],
+        default=Config.BET_PRESETS,
+    )
+    parser.add_argument("--balance", type=int, default=Config.STRESS_BALANCE)
+    parser.add_argument("--connect-concurrency", type=int, default=256)
+    parser.add_argument("--sample-interval", type=float, default=0.5)
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=300.0,
+        metavar="SECONDS",
+        help="give up on rounds that have not crashed by then",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--server-log", default=os.devnull)
+    parser.add_argument("--json", metavar="PATH", help="write the summary to PATH")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    options = parse_args(argv)
+    raise_file_limit()
+    if uvloop is not None:
+        uvloop.install()
+
+    port = free_port()
+    server = spawn_server(options, port)
+    try:
+
+        async def run():
+            await wait_for_port(port, server)
+            return await run_load(options, port, server.pid)
+
+        result = asyncio.run(run())
+    finally:
+        server.terminate()
+        server.wait()
+
+    result["options"] = {
+        key: value for key, value in vars(options).items() if key != "json"
+    }
+    for name in ("bet_ack", "cash_out_ack", "round_start_delay", "round_start_fan_out"):
+        stats = result[name]
+        if stats["count"]:
+            print(
+                f"{name:<20} n={stats['count']:<7} p50 {stats['p50_ms']:8.3f} ms"
+                f"  p95 {stats['p95_ms']:8.3f} ms  p99 {stats['p99_ms']:8.3f} ms"
+            )
+    server_stats = result["server"]
+    print(
+        f"server cpu {server_stats['cpu_percent_mean']}% mean,"
+        f" {server_stats['cpu_percent_max']}% max;"
+        f" rss peak {server_stats['rss_peak_kb']} KiB;"
+        f" load generator cpu {result['load_generator_cpu_percent']}%"
+    )
+    print(json.dumps(result["counts"]))
+
+    if options.json:
+        with open(options.json, "w") as f:
+            json.dump(result, f, indent=2)
+    return 1 if result["timed_out"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,301 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List, Tuple
+
+from benchmarks.headless import build_game_view, isolate_stats, start_flight, step
+from shiiiuuuu import GameEngine, GameState, ParticleField, StateManager, np
+from shiiiuuuu_core import multiplier_at
+
+BASELINE_FILE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "baseline.json"
+)
+OCCUPANCIES = (0.0, 0.25, 0.5, 0.9)
+
+Case = Callable[[], None]
+
+
+def particle_emit_case(occupancy: float) -> Case:
+    pool = build_game_view().particles
+    live = int(len(pool.particles) * occupancy)
+    pool.emit(0, 0, live, (1, 1, 1, 1), (1e9, 1e9), (4, 8), (-1, 1))
+    burst = pool.particles[live : live + 75]
+
+    def run():
+        pool.emit(0, 0, 75, (1, 0.5, 0.2, 0.9), (0.6, 1.2), (6, 12), (-0.5, 0.5))
+        # retire the burst so every iteration sees the same occupancy
+        for particle in burst:
+            particle.active = False
+        pool.active_count = live
+
+    return run
+
+
+def particle_update_case(occupancy: float) -> Case:
+    pool = build_game_view().particles
+    live = int(len(pool.particles) * occupancy)
+    pool.emit(0, 0, live, (1, 1, 1, 1), (1e9, 1e9), (4, 8), (-1, 1))
+
+    def run():
+        pool.update(1 / 60)
+
+    return run
+
+
+def field_update_case(occupancy: float) -> Case:
+    field = ParticleField(seed=0)
+    live = int(len(field.active) * occupancy)
+    field.emit(0, 0, live, (1, 1, 1, 1), (1e9, 1e9), (4, 8), (-1, 1))
+
+    def run():
+        field.update(1 / 60)
+        field.snapshot()
+
+    return run
+
+
+def particle_draw_case(occupancy: float) -> Case:
+    pool = build_game_view().particles
+    field = ParticleField(seed=0)
+    live = int(len(field.active) * occupancy)
+    field.emit(0, 0, live, (1, 1, 1, 1), (1e9, 1e9), (4, 8), (-1, 1))
+    rows = field.snapshot()
+
+    def run():
+        pool.draw_rows(rows)
+
+    return run
+
+
+def crash_point_case() -> Case:
+    state = StateManager()
+    return state.generate_crash_point
+
+
+def multiplier_case() -> Case:
+    state = StateManager()
+    state.state = GameState.FLYING
+    state.start_time = time.time()
+    state.crash_point = 1e9
+
+    def run():
+        state.update_multiplier()
+        state.check_crash()
+
+    return run
+
+
+def flight_path_case() -> Case:
+    engine = GameEngine(StateManager(), None)
+
+    def run():
+        engine.generate_flight_path(1280, 1364)
+
+    return run
+
+
+def plane_position_case() -> Case:
+    state = StateManager()
+    state.state = GameState.FLYING
+    engine = GameEngine(state, None)
+    engine.generate_flight_path(1280, 1364)
+
+    def run():
+        engine.update_plane_position()
+        if engine.current_path_index == len(engine.flight_path) - 1:
+            engine.current_path_index = 0
+
+    return run
+
+
+def save_stats_case() -> Case:
+    state = StateManager()
+    return state.save_stats
+
+
+def load_stats_case() -> Case:
+    state = StateManager()
+    state.save_stats()
+    return state._load_stats
+
+
+def game_frame_case() -> Case:
+    view = build_game_view()
+    start_flight(view)
+    frame = [0]
+
+    def run():
+        step(view, frame[0], 1 / 60)
+        frame[0] += 1
+        if frame[0] >= 600:
+            # restart the flight so the multiplier and path stay in range
+            frame[0] = 0
+            start_flight(view)
+
+    return run
+
+
+def trail_update_case() -> Case:
+    trail = build_game_view().trail
+    frame = [0]
+
+    def run():
+        # a full ring: the plane keeps moving so every slot stays alive
+        frame[0] += 1
+        trail.update(1 / 60, frame[0] % 400, 300 + frame[0] % 200)
+
+    return run
+
+
+def curve_update_case() -> Case:
+    curve = build_game_view().curve
+    frame = [0]
+
+    def run():
+        frame[0] += 1
+        if frame[0] >= 3600:
+            # a minute in, start over so the axes keep the same zoom range
+            frame[0] = 0
+            curve.clear()
+        curve.update(1 / 60, multiplier_at(frame[0] / 60))
+
+    return run
+
+
+def cases() -> Dict[str, Callable[[], Case]]:
+    registry: Dict[str, Callable[[], Case]] = {}
+    for occupancy in OCCUPANCIES:
+        percent = int(occupancy * 100)
+        registry[f"particle_emit_{percent}pct"] = (
+            lambda occupancy=occupancy: particle_emit_case(occupancy)
+        )
+        registry[f"particle_update_{percent}pct"] = (
+            lambda occupancy=occupancy: particle_update_case(occupancy)
+        )
+        if np is not None:
+            registry[f"field_update_snapshot_{percent}pct"] = (
+                lambda occupancy=occupancy: field_update_case(occupancy)
+            )
+            registry[f"particle_draw_rows_{percent}pct"] = (
+                lambda occupancy=occupancy: particle_draw_case(occupancy)
+            )
+    registry["generate_crash_point"] = crash_point_case
+    registry["update_multiplier_check_crash"] = multiplier_case
+    registry["generate_flight_path"] = flight_path_case
+    registry["update_plane_position"] = plane_position_case
+    registry["save_stats"] = save_stats_case
+    registry["load_stats"] = load_stats_case
+    registry["update_game_frame"] = game_frame_case
+    registry["trail_ribbon_update"] = trail_update_case
+    registry["flight_curve_update"] = curve_update_case
+    return registry
+
+
+def time_case(run: Case, repeats: int, min_time: float) -> Dict[str, float]:
+    # calibrate a batch size that takes at least min_time, then repeat it
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            run()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time:
+            break
+        number *= 2
+
+    samples: List[float] = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeats):
+            started = time.perf_counter()
+            for _ in range(number):
+                run()
+            samples.append((time.perf_counter() - started) / number)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    return {
+        "median_us": statistics.median(samples) * 1e6,
+        "min_us": min(samples) * 1e6,
+        "max_us": max(samples) * 1e6,
+        "batch": number,
+        "repeats": repeats,
+    }
+
+
+def compare(
+    results: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float
+) -> List[Tuple[str, float]]:
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+        ratio = result["median_us"] / reference["median_us"]
+        if ratio > 1 + threshold:
+            regressions.append((name, ratio))
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run the hot-path microbenchmarks")
+    parser.add_argument("-k", dest="pattern", help="only run cases containing this")
+    parser.add_argument("--repeats", type=int, default=7)
+    parser.add_argument("--min-time", type=float, default=0.05)
+    parser.add_argument("--json", metavar="PATH", help="write results to PATH")
+    parser.add_argument("--baseline", metavar="PATH", default=BASELINE_FILE)
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="allowed slowdown over the baseline median (0.25 = 25%%)",
+    )
+    parser.add_argument(
+        "--save-baseline", action="store_true", help="overwrite --baseline"
+    )
+    args = parser.parse_args(argv)
+
+    isolate_stats()
+    random.seed(1234)
+    results: Dict[str, Dict] = {}
+    for name, factory in cases().items():
+        if args.pattern and args.pattern not in name:
+            continue
+        results[name] = time_case(factory(), args.repeats, args.min_time)
+        print(f"{name:<32} {results[name]['median_us']:10.2f} us/op")
+
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        return 0
+
+    if not os.path.exists(args.baseline):
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)["results"]
+    regressions = compare(results, baseline, args.threshold)
+    for name, ratio in regressions:
+        # kivy has replaced sys.stderr with its log by now
+        print(f"regression: {name} is {ratio:.2f}x the baseline", file=sys.__stderr__)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
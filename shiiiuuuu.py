@@ -1,12 +1,50 @@
 import random
-import hashlib
+import asyncio
 import time
 import math
 import json
 import os
-from enum import Enum
-from collections import deque
-from typing import List, Tuple, Optional, Dict
+import sys
+import argparse
+import threading
+import bisect
+import gc
+import tempfile
+import traceback
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from functools import partial
+from collections import defaultdict, deque, OrderedDict
+from typing import List, Tuple, Optional, Dict, Callable, Iterator, NamedTuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# taken before kivy is imported so the startup trace includes its cost
+IMPORT_STARTED = time.perf_counter()
+
+from shiiiuuuu_core import (
+    Config,
+    GameState,
+    StateManager,
+    GameEngine,
+    crash_time,
+    write_stats_file,
+    append_crash_history,
+    read_crash_history,
+)
+from shiiiuuuu_optimizer import TargetAnalyzer
+
+# command line options are parsed by this module, not by kivy
+os.environ.setdefault("KIVY_NO_ARGS", "1")
 from kivy.config import Config as KivyConfig
 
 KivyConfig.set("graphics", "resizable", False)
@@ -23,8 +61,25 @@ from kivy.uix.screenmanager import (
 )
 from kivy.uix.button import Button
 from kivy.uix.label import Label
+from kivy.uix.widget import Widget
+from kivy.core.text import Label as CoreLabel
 from kivy.uix.textinput import TextInput
-from kivy.graphics import Color, Rectangle, Line, RoundedRectangle, Ellipse
+from kivy.graphics import (
+    Color,
+    Rectangle,
+    Line,
+    Ellipse,
+    Mesh,
+    PushMatrix,
+    PopMatrix,
+    Scale,
+    Translate,
+    Fbo,
+    ClearColor,
+    ClearBuffers,
+    BorderImage,
+)
+from kivy.graphics.texture import Texture
 from kivy.clock import Clock
 from kivy.animation import Animation
 from kivy.core.audio import SoundLoader
@@ -34,54 +89,31 @@ from kivy.properties import (
     BooleanProperty,
     StringProperty,
     ListProperty,
+    OptionProperty,
 )
 from kivy.lang import Builder
 from kivy.metrics import dp
 from kivy.uix.image import Image
 from kivy.uix.anchorlayout import AnchorLayout
+from kivy.uix.relativelayout import RelativeLayout
+from kivy.logger import Logger
+from kivy.loader import Loader
 
+IMPORT_FINISHED = time.perf_counter()
 
-class GameState(Enum):
-    MENU = "menu"
-    BETTING = "betting"
-    FLYING = "flying"
-    CRASHED = "crashed"
-    RESULT = "result"
-
-
-class Config:
-    INITIAL_BALANCE = 100
-    MIN_BET = 10
-    BET_PRESETS = [10, 50, 100, 500]
-    MAX_PARTICLES = 800
-    TARGET_FPS = 60
-    CRASH_MAX_RANGE = 15.0
-    CRASH_SKEW = 2.5
-    SPECIAL_CHANCE = 0.01
-    SPECIAL_MIN = 10.0
-    SPECIAL_MAX = 50.0
-    GROWTH_FACTOR = 0.05
-    GROWTH_EXPONENT = 1.3
-    FLIGHT_SAMPLES = 400
-    PLANE_START_X = 1150
-    PLANE_START_Y = 330
-    STATS_FILE = "shiiiuuuu_stats.json"
+KEY_F3 = 284
+KEY_F4 = 285
 
 
-Builder.load_string("""
-<StyledButton@Button>:
-    background_color: 0, 0, 0, 0
-    canvas.before:
-        Color:
-            rgba: self.bg_color if hasattr(self, 'bg_color') else (0.2, 0.6, 0.8, 0.8)
-        RoundedRectangle:
-            pos: self.pos
-            size: self.size
-            radius: [dp(20),]
-    font_size: '20sp'
-    bold: True
-    color: 1, 1, 1, 1
+# emit arguments after the position: count, color, lifetime, size, velocity
+EFFECTS = {
+    "launch": (200, (0.5, 0.5, 0.5, 0.5), (1.2, 2.5), (12, 24), (-1.6, 0.8)),
+    "explosion": (400, (1, 0.3, 0.1, 0.8), (0.8, 3.0), (5, 23), (-4, 4)),
+    "explosion_secondary": (200, (1, 0.4, 0.1, 0.7), (0.5, 2.0), (8, 18), (-5, 5)),
+}
 
+
+Builder.load_string("""
 <StyledTextInput@TextInput>:
     background_color: 0, 0, 0, 0
     foreground_color: 1, 1, 1, 0.9
@@ -165,6 +197,20 @@ class ParticlePool:
                 color_inst = Color(1, 1, 1, 0)
                 ellipse_inst = Ellipse(pos=(0, 0), size=(0, 0))
                 self.visuals.append((color_inst, ellipse_inst))
+        self.active_count = 0
+        self.dropped = 0
+        self.budget = max_particles
+        self.emission_scale = 1.0
+        self.size_scale = 1.0
+        self.shown = [0] * max_particles
+        self.stamp = 0
+        self.drawn: Tuple = ()
+
+    def set_quality(self, budget: int, emission_scale: float, size_scale: float):
+        # live particles above a lowered budget are left to expire
+        self.budget = min(budget, len(self.particles))
+        self.emission_scale = emission_scale
+        self.size_scale = size_scale
 
     def emit(
         self,
@@ -176,212 +222,1767 @@ class ParticlePool:
         size_range: Tuple[float, float],
         velocity_range: Tuple[float, float],
     ):
+        count = int(count * self.emission_scale)
+        limit = min(count, self.budget - self.active_count)
         emitted = 0
         for i, particle in enumerate(self.particles):
-            if emitted >= count:
+            if emitted >= limit:
                 break
             if not particle.active:
                 lt = random.uniform(*lifetime_range)
-                sz = random.uniform(*size_range)
+                sz = random.uniform(*size_range) * self.size_scale
                 vx = random.uniform(*velocity_range)
                 vy = random.uniform(*velocity_range)
                 particle.init(x, y, vx, vy, lt, sz, color)
+                self.visuals[i][0].rgba = color
                 emitted += 1
+        self.active_count += emitted
+        self.dropped += count - emitted
 
     def update(self, dt: float):
+        active_count = 0
         for i, particle in enumerate(self.particles):
+            if not particle.active:
+                continue
+            particle.update(dt)
+            color_inst, ellipse_inst = self.visuals[i]
             if particle.active:
-                particle.update(dt)
-                color_inst, ellipse_inst = self.visuals[i]
-                color_inst.rgba = (particle.r, particle.g, particle.b, particle.a)
+                active_count += 1
+                color_inst.a = particle.a
                 ellipse_inst.pos = (
                     particle.x - particle.size / 2,
                     particle.y - particle.size / 2,
                 )
                 ellipse_inst.size = (particle.size, particle.size)
             else:
-                color_inst, ellipse_inst = self.visuals[i]
+                # hide once when the particle dies instead of every frame
                 ellipse_inst.size = (0, 0)
+        self.active_count = active_count
+
+    def draw_rows(self, rows: Tuple):
+        # mirrors a ParticleField snapshot instead of simulating. rows
+        # only hold live particles, so anything drawn last time and not
+        # stamped this time has died
+        shown = self.shown
+        stamp = self.stamp = self.stamp + 1
+        active_count = 0
+        for i, x, y, size, rgba in rows:
+            color_inst, ellipse_inst = self.visuals[i]
+            active_count += 1
+            color_inst.rgba = rgba
+            ellipse_inst.pos = (x, y)
+            ellipse_inst.size = (size, size)
+            shown[i] = stamp
+        for row in self.drawn:
+            if shown[row[0]] != stamp:
+                self.visuals[row[0]][1].size = (0, 0)
+        self.drawn = rows
+        self.active_count = active_count
+
+
+# numpy twin of ParticlePool's physics for the simulation thread, one
+# array per attribute so a tick is a handful of whole-array operations
+class ParticleField:
+    def __init__(self, capacity: int = Config.MAX_PARTICLES, seed=None):
+        self.rng = np.random.default_rng(seed)
+        self.x = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+        self.vx = np.zeros(capacity)
+        self.vy = np.zeros(capacity)
+        self.life = np.zeros(capacity)
+        self.max_life = np.ones(capacity)
+        self.initial_size = np.zeros(capacity)
+        self.rgba = np.zeros((capacity, 4))
+        self.active = np.zeros(capacity, dtype=bool)
+        self.active_count = 0
+        self.dropped = 0
+        self.budget = capacity
+        self.emission_scale = 1.0
+        self.size_scale = 1.0
+
+    def set_quality(self, budget: int, emission_scale: float, size_scale: float):
+        self.budget = min(budget, len(self.active))
+        self.emission_scale = emission_scale
+        self.size_scale = size_scale
+
+    def emit(
+        self,
+        x: float,
+        y: float,
+        count: int,
+        color: Tuple[float, float, float, float],
+        lifetime_range: Tuple[float, float],
+        size_range: Tuple[float, float],
+        velocity_range: Tuple[float, float],
+    ):
+        count = int(count * self.emission_scale)
+        limit = max(0, min(count, self.budget - self.active_count))
+        slots = np.flatnonzero(~self.active)[:limit]
+        emitted = len(slots)
+        if emitted:
+            uniform = self.rng.uniform
+            lifetimes = uniform(*lifetime_range, emitted)
+            self.x[slots] = x
+            self.y[slots] = y
+            self.vx[slots] = uniform(*velocity_range, emitted)
+            self.vy[slots] = uniform(*velocity_range, emitted)
+            self.life[slots] = lifetimes
+            self.max_life[slots] = lifetimes
+            self.initial_size[slots] = uniform(*size_range, emitted) * self.size_scale
+            self.rgba[slots] = color
+            self.active[slots] = True
+        self.active_count += emitted
+        self.dropped += count - emitted
+
+    def update(self, dt: float):
+        # idle slots keep drifting; they are overwritten on the next emit
+        self.life -= dt
+        self.active &= self.life > 0
+        self.active_count = int(np.count_nonzero(self.active))
+        self.x += self.vx * (dt * 60)
+        self.y += self.vy * (dt * 60)
+
+    def snapshot(self) -> Tuple:
+        # python rows of the live particles, (slot, x, y, size, rgba) with
+        # x and y at the corner, so the kivy thread draws them without
+        # touching numpy
+        live = np.flatnonzero(self.active)
+        fade = np.clip(self.life[live] / self.max_life[live], 0.0, None)
+        sizes = self.initial_size[live] * fade
+        colors = self.rgba[live]
+        colors[:, 3] *= fade
+        return tuple(
+            zip(
+                live.tolist(),
+                (self.x[live] - sizes / 2).tolist(),
+                (self.y[live] - sizes / 2).tolist(),
+                sizes.tolist(),
+                map(tuple, colors.tolist()),
+            )
+        )
 
 
+# the exhaust trail as one triangle-strip mesh. a ring keeps the last
+# CAPACITY plane positions, sampled every LIFETIME / CAPACITY seconds
+# whatever the frame rate, and the newest slot follows the plane in
+# between so the ribbon stays attached. each point keeps the unit normal it
+# got on arrival, so a frame only rescales the vertex pairs by age: the
+# strip narrows toward its tail while u runs along a gradient texture that
+# fades it out
+class TrailRibbon:
+    CAPACITY = 32
+    LIFETIME = 0.8
+    WIDTH = 9.0
+    COLOR = (1, 0.5, 0.2)
+    # the exhaust sits below the plane's center
+    OFFSET = -75
+    _texture: Optional[Texture] = None
+
+    def __init__(self, canvas):
+        n = self.CAPACITY
+        self.xs = [0.0] * n
+        self.ys = [0.0] * n
+        self.nxs = [0.0] * n
+        self.nys = [1.0] * n
+        self.born = [0.0] * n
+        self.head = -1
+        self.count = 0
+        self.clock = 0.0
+        self.sampled_at = 0.0
+        self.visible = False
+        # a float array goes to the mesh without the per-element
+        # conversion a list gets on every assignment
+        self.vertices = array("f", bytes(n * 8 * 4))
+        with canvas:
+            Color(1, 1, 1, 1)
+            self.mesh = Mesh(
+                vertices=self.vertices,
+                indices=list(range(n * 2)),
+                mode="triangle_strip",
+                texture=self.gradient(),
+            )
+
+    @classmethod
+    def gradient(cls) -> Texture:
+        if cls._texture is None:
+            r, g, b = (int(c * 255) for c in cls.COLOR)
+            pixels = bytearray()
+            for i in range(64):
+                pixels += bytes((r, g, b, int(230 * (1 - i / 63) ** 1.5)))
+            texture = Texture.create(size=(64, 1), colorfmt="rgba")
+            texture.blit_buffer(bytes(pixels), colorfmt="rgba", bufferfmt="ubyte")
+            cls._texture = texture
+        return cls._texture
+
+    def clear(self):
+        self.head = -1
+        self.count = 0
+        if self.visible:
+            self.vertices[:] = array("f", bytes(len(self.vertices) * 4))
+            self.mesh.vertices = self.vertices
+            self.visible = False
+
+    def update(self, dt: float, x: Optional[float] = None, y: Optional[float] = None):
+        self.clock += dt
+        if x is not None:
+            self._track(x, y + self.OFFSET)
+        elif not self.visible:
+            return
+        self._rebuild()
+
+    def _track(self, x: float, y: float):
+        n = self.CAPACITY
+        if self.count == 0 or self.clock - self.sampled_at >= self.LIFETIME / n:
+            self.head = (self.head + 1) % n
+            self.count = min(self.count + 1, n)
+            self.sampled_at = self.clock
+        slot = self.head
+        self.xs[slot] = x
+        self.ys[slot] = y
+        self.born[slot] = self.clock
+        if self.count > 1:
+            previous = (slot - 1) % n
+            dx = x - self.xs[previous]
+            dy = y - self.ys[previous]
+            length = math.hypot(dx, dy)
+            if length > 1e-6:
+                self.nxs[slot] = -dy / length
+                self.nys[slot] = dx / length
+            else:
+                self.nxs[slot] = self.nxs[previous]
+                self.nys[slot] = self.nys[previous]
+
+    def _rebuild(self):
+        n = self.CAPACITY
+        count = self.count
+        xs, ys, nxs, nys, born = self.xs, self.ys, self.nxs, self.nys, self.born
+        vertices = self.vertices
+        clock = self.clock
+        lifetime = self.LIFETIME
+        width = self.WIDTH
+        oldest = self.head - count + 1
+        alive = False
+        offset = 0
+        for k in range(count):
+            slot = (oldest + k) % n
+            age = (clock - born[slot]) / lifetime
+            if age >= 1.0:
+                age = 1.0
+            else:
+                alive = True
+            half = width * (1.0 - age)
+            x, y = xs[slot], ys[slot]
+            dx, dy = nxs[slot] * half, nys[slot] * half
+            vertices[offset] = x + dx
+            vertices[offset + 1] = y + dy
+            vertices[offset + 2] = age
+            vertices[offset + 3] = 0.0
+            vertices[offset + 4] = x - dx
+            vertices[offset + 5] = y - dy
+            vertices[offset + 6] = age
+            vertices[offset + 7] = 1.0
+            offset += 8
+        # unused pairs collapse onto the newest point and draw nothing
+        if offset < len(vertices):
+            x, y = xs[self.head], ys[self.head]
+            for start in range(offset, len(vertices), 4):
+                vertices[start] = x
+                vertices[start + 1] = y
+                vertices[start + 2] = 1.0
+                vertices[start + 3] = 0.0
+        self.mesh.vertices = vertices
+        self.visible = alive
+
+
+# the multiplier curve, drawn in data units (seconds, multiplier - 1) under
+# a Translate and Scale, so zooming the axes out on a long flight only
+# changes the Scale and never touches a vertex. a sample only becomes a
+# vertex once the chord from the previous vertex would pass more than
+# TOLERANCE pixels from one of the samples it skips; until then the last
+# vertex just follows the newest sample. a line strip outlines the curve
+# and a triangle strip down to the axis fills it. when CAPACITY vertices
+# are used, every other one is dropped: by then the view has zoomed out
+# far enough that the halved detail is below a pixel
+class FlightCurve:
+    CAPACITY = 256
+    TOLERANCE = 0.75
+    MAX_SKIPPED = 64
+    # seconds and multiplier gain shown before the axes start to grow
+    SPAN = (8.0, 1.0)
+    HEADROOM = 1.25
+    EASE = 4.0
+    FILL_ALPHA = 0.18
+
+    def __init__(self, canvas):
+        n = self.CAPACITY
+        self.line = array("f", bytes(n * 4 * 4))
+        self.fill = array("f", bytes(n * 8 * 4))
+        self.indices = list(range(n * 2))
+        self.count = 0
+        self.skipped: List[Tuple[float, float]] = []
+        self.span_x, self.span_y = self.SPAN
+        self.target_x, self.target_y = self.SPAN
+        self.width = 1.0
+        self.height = 1.0
+        self.compactions = 0
+        with canvas:
+            PushMatrix()
+            self.origin = Translate(0, 0)
+            self.scale = Scale(1, 1, 1)
+            self.fill_color = Color(1, 1, 1, 0)
+            self.fill_mesh = Mesh(vertices=self.fill, indices=[], mode="triangle_strip")
+            self.line_color = Color(1, 1, 1, 0)
+            self.line_mesh = Mesh(vertices=self.line, indices=[], mode="line_strip")
+            PopMatrix()
+
+    def layout(self, x: float, y: float, width: float, height: float):
+        self.origin.xy = (x, y)
+        self.width = max(width, 1.0)
+        self.height = max(height, 1.0)
+        self._apply_scale()
+
+    def set_color(self, rgba: Tuple[float, float, float, float]):
+        r, g, b, a = rgba
+        self.line_color.rgba = (r, g, b, a)
+        self.fill_color.rgba = (r, g, b, self.FILL_ALPHA)
+
+    def clear(self):
+        self.count = 0
+        self.skipped.clear()
+        self.span_x, self.span_y = self.SPAN
+        self.target_x, self.target_y = self.SPAN
+        self.line_mesh.indices = []
+        self.fill_mesh.indices = []
+        self._apply_scale()
+
+    def update(self, dt: float, multiplier: Optional[float] = None):
+        if multiplier is not None:
+            self._sample(crash_time(multiplier), multiplier - 1.0)
+        if self.span_x != self.target_x or self.span_y != self.target_y:
+            ease = min(1.0, dt * self.EASE)
+            self.span_x += (self.target_x - self.span_x) * ease
+            self.span_y += (self.target_y - self.span_y) * ease
+            if abs(self.target_x - self.span_x) < 1e-3 * self.target_x:
+                self.span_x = self.target_x
+            if abs(self.target_y - self.span_y) < 1e-3 * self.target_y:
+                self.span_y = self.target_y
+            self._apply_scale()
+
+    def _apply_scale(self):
+        self.scale.x = self.width / self.span_x
+        self.scale.y = self.height / self.span_y
+
+    def _sample(self, x: float, y: float):
+        count = self.count
+        if count == 0:
+            # the curve starts at the origin, plus a live end vertex
+            self._put(0, 0.0, 0.0)
+            self._put(1, x, y)
+            self.count = 1
+            self._set_drawn(2)
+        elif self._visible_detail(x, y):
+            # the previous end vertex stays where it is
+            if count + 1 >= self.CAPACITY:
+                self._compact()
+            self.count += 1
+            self.skipped.clear()
+            self._put(self.count, x, y)
+            self._set_drawn(self.count + 1)
+        else:
+            line = self.line
+            self.skipped.append((line[count * 4], line[count * 4 + 1]))
+            self._put(count, x, y)
+        self.line_mesh.vertices = self.line
+        self.fill_mesh.vertices = self.fill
+        self.target_x = max(self.SPAN[0], x * self.HEADROOM, self.target_x)
+        self.target_y = max(self.SPAN[1], y * self.HEADROOM, self.target_y)
+
+    # whether the chord from the last fixed vertex to (x, y) strays from the
+    # samples it would replace by more than TOLERANCE on screen
+    def _visible_detail(self, x: float, y: float) -> bool:
+        skipped = self.skipped
+        if len(skipped) >= self.MAX_SKIPPED:
+            return True
+        line = self.line
+        base = (self.count - 1) * 4
+        x0, y0 = line[base], line[base + 1]
+        end = self.count * 4
+        sx = self.width / self.span_x
+        sy = self.height / self.span_y
+        dx = (x - x0) * sx
+        dy = (y - y0) * sy
+        length = math.hypot(dx, dy)
+        if length < 1e-9:
+            return False
+        limit = self.TOLERANCE * length
+        # the live end vertex is one of the samples the chord replaces
+        px, py = line[end], line[end + 1]
+        if abs((px - x0) * sx * dy - (py - y0) * sy * dx) > limit:
+            return True
+        for px, py in skipped:
+            if abs((px - x0) * sx * dy - (py - y0) * sy * dx) > limit:
+                return True
+        return False
+
+    def _compact(self):
+        line = self.line
+        count = self.count
+        kept = 0
+        # keeps the origin, the last fixed vertex and the live end vertex
+        for index in list(range(0, count - 1, 2)) + [count - 1, count]:
+            self._put(kept, line[index * 4], line[index * 4 + 1])
+            kept += 1
+        self.count = kept - 1
+        self.compactions += 1
+        self._set_drawn(kept)
+
+    def _put(self, index: int, x: float, y: float):
+        line = self.line
+        fill = self.fill
+        offset = index * 4
+        line[offset] = x
+        line[offset + 1] = y
+        offset = index * 8
+        fill[offset] = x
+        fill[offset + 1] = y
+        fill[offset + 4] = x
+
+    def _set_drawn(self, vertices: int):
+        self.line_mesh.indices = self.indices[:vertices]
+        self.fill_mesh.indices = self.indices[: vertices * 2]
+
+
+# sounds are decoded on a loader thread and textures through kivy's async
+# loader; readiness callbacks always run on the main thread
 class AssetManager:
-    def __init__(self):
-        self.sounds: Dict[str, Optional[object]] = {}
-        self._load_sounds()
+    SOUND_FILES = {
+        "bet": "bet.wav",
+        "cashout": "cash_out.wav",
+        "crash": "crash.wav",
+    }
+    TEXTURE_FILES = {
+        "plane": "plane_icon.png",
+    }
+    VOICES_PER_SOUND = 3
+    # how long a voice may play without reporting a position before its
+    # latency is given up as unmeasurable
+    PLAYBACK_TIMEOUT = 1.0
+
+    def __init__(self, preload: bool = True):
+        self.sounds: Dict[str, List[object]] = {}
+        self.textures: Dict[str, object] = {}
+        self.ready_callbacks: Dict[str, List[Callable]] = {}
+        self.next_voice: Dict[str, int] = {}
+        self.play_requested: Dict[object, float] = {}
+        self.latencies: deque = deque(maxlen=128)
+        self.latency_callbacks: List[Callable[[float], None]] = []
+        self.unmeasured = 0
+        self.poll_playback = Clock.create_trigger(self._poll_playback, 0, interval=True)
+        self.loader_thread: Optional[threading.Thread] = None
+        if preload:
+            self.preload()
+
+    def preload(self):
+        self._load_textures()
+        self.loader_thread = threading.Thread(
+            target=self._load_sounds, name="asset-loader", daemon=True
+        )
+        self.loader_thread.start()
+
+    async def preload_async(self):
+        self._load_textures()
+        loop = asyncio.get_event_loop()
+        for key, filename in self.SOUND_FILES.items():
+            voices = await loop.run_in_executor(None, self._load_voices, filename)
+            self._sounds_loaded(key, voices, 0)
+
+    def _load_textures(self):
+        for key, filename in self.TEXTURE_FILES.items():
+            proxy = Loader.image(filename)
+            if proxy.loaded:
+                self._texture_loaded(key, proxy)
+            else:
+                proxy.bind(on_load=partial(self._texture_loaded, key))
 
-    def _load_sounds(self):
-        sound_files = {
-            "bet": "bet.wav",
-            "cashout": "cash_out.wav",
-            "crash": "crash.wav",
-        }
-        for key, filename in sound_files.items():
+    def _load_voices(self, filename: str) -> List[object]:
+        voices = []
+        for _ in range(self.VOICES_PER_SOUND):
             try:
                 sound = SoundLoader.load(filename)
-                if sound:
-                    sound.volume = 0.7
-                self.sounds[key] = sound
-            except:
-                self.sounds[key] = None
+            except Exception:
+                sound = None
+            if not sound:
+                break
+            sound.volume = 0.7
+            voices.append(sound)
+        return voices
+
+    def _load_sounds(self):
+        for key, filename in self.SOUND_FILES.items():
+            voices = self._load_voices(filename)
+            Clock.schedule_once(partial(self._sounds_loaded, key, voices))
+
+    def _sounds_loaded(self, key: str, voices: List[object], dt: float):
+        self.sounds[key] = voices
+        self._notify_ready(key, voices)
+
+    def _texture_loaded(self, key: str, proxy, *args):
+        texture = proxy.image.texture
+        self.textures[key] = texture
+        self._notify_ready(key, texture)
+
+    def _notify_ready(self, key: str, asset):
+        for callback in self.ready_callbacks.pop(key, ()):
+            callback(key, asset)
+
+    def on_ready(self, key: str, callback: Callable):
+        if key in self.sounds:
+            callback(key, self.sounds[key])
+        elif key in self.textures:
+            callback(key, self.textures[key])
+        else:
+            self.ready_callbacks.setdefault(key, []).append(callback)
+
+    def is_ready(self) -> bool:
+        sounds_ready = len(self.sounds) == len(self.SOUND_FILES)
+        return sounds_ready and len(self.textures) == len(self.TEXTURE_FILES)
 
     def play_sound(self, key: str):
-        sound = self.sounds.get(key)
-        if sound:
-            sound.play()
+        voices = self.sounds.get(key)
+        if not voices:
+            return
 
+        # prefer an idle voice, otherwise steal the next one in rotation
+        index = self.next_voice.get(key, 0)
+        for offset in range(len(voices)):
+            candidate = (index + offset) % len(voices)
+            if voices[candidate].state != "play":
+                index = candidate
+                break
+        self.next_voice[key] = (index + 1) % len(voices)
+
+        voice = voices[index]
+        if voice.state == "play":
+            voice.stop()
+        if voice in self.play_requested:
+            # stolen before it reported a position
+            self.unmeasured += 1
+        self.play_requested[voice] = time.perf_counter()
+        voice.play()
+        self.poll_playback()
+
+    def on_latency(self, callback: Callable[[float], None]):
+        self.latency_callbacks.append(callback)
+
+    # sound.play() dispatches on_play before the backend has produced any
+    # audio, so latency is taken from the backend's playback position: the
+    # first time it is past zero, the sound became audible `position`
+    # seconds ago. backends without a position (sdl2) only count as
+    # unmeasured, so the numbers never include a guess
+    def _poll_playback(self, dt: float):
+        now = time.perf_counter()
+        for voice, requested in list(self.play_requested.items()):
+            position = voice.get_pos()
+            if position > 0:
+                latency = max(0.0, now - position - requested)
+                self.latencies.append(latency)
+                for callback in self.latency_callbacks:
+                    callback(latency)
+            elif voice.state == "play" and now - requested < self.PLAYBACK_TIMEOUT:
+                continue
+            else:
+                self.unmeasured += 1
+            del self.play_requested[voice]
+        if not self.play_requested:
+            self.poll_playback.cancel()
+
+    def latency_stats(self) -> Dict[str, float]:
+        if not self.latencies:
+            return {"count": 0, "unmeasured": self.unmeasured}
+        ordered = sorted(self.latencies)
+        return {
+            "count": len(ordered),
+            "unmeasured": self.unmeasured,
+            "last_ms": self.latencies[-1] * 1000,
+            "mean_ms": sum(ordered) / len(ordered) * 1000,
+            "p95_ms": ordered[int(0.95 * (len(ordered) - 1))] * 1000,
+            "max_ms": ordered[-1] * 1000,
+        }
 
-class StateManager:
+
+# redelivers StateManager events on the kivy thread. with --sim-thread the
+# ui and app-level listeners bind here instead of on the state manager,
+# which is driven from the simulation thread
+class EventRelay:
     def __init__(self):
-        self.state = GameState.BETTING
-        self.balance = Config.INITIAL_BALANCE
-        self.current_bet = 0
-        self.multiplier = 1.0
-        self.crash_point = 0.0
-        self.start_time = 0.0
-        self.history: deque = deque(maxlen=5)
-        self.stats = self._load_stats()
-        self.cooldown_bet = False
-        self.cooldown_cashout = False
-
-    def _load_stats(self) -> Dict:
-        default_stats = {
-            "total_games": 0,
-            "wins": 0,
-            "losses": 0,
-            "highest_multiplier": 1.0,
-            "biggest_win": 0,
+        self.listeners: Dict[str, List[Callable]] = defaultdict(list)
+
+    def bind(self, event: str, callback: Callable):
+        self.listeners[event].append(callback)
+
+    def emit(self, event: str, value):
+        for callback in self.listeners[event]:
+            callback(value)
+
+
+class SimSnapshot(NamedTuple):
+    tick: int
+    event_seq: int
+    state: GameState
+    multiplier: float
+    current_bet: int
+    plane: Tuple[float, float]
+    particles: Tuple
+    dropped: int
+
+
+# runs StateManager, GameEngine and a ParticleField at a fixed rate off the
+# kivy thread. the ui pushes commands through `inbox` and the simulation
+# pushes ui events through `outbox`; both are deques, whose append and
+# popleft are atomic, so neither side takes a lock. every tick ends by
+# publishing a new read-only snapshot with a single reference swap, and
+# the snapshot's event_seq says which outbox events it already reflects.
+# the ui replays those events into `relay`
+class SimulationThread(threading.Thread):
+    def __init__(
+        self,
+        state_manager: StateManager,
+        engine: GameEngine,
+        rate: float = Config.TARGET_FPS,
+        relay: Optional[EventRelay] = None,
+    ):
+        super().__init__(name="simulation", daemon=True)
+        self.state = state_manager
+        self.engine = engine
+        self.relay = relay or EventRelay()
+        for event in state_manager.listeners:
+            state_manager.bind(event, partial(self._forward, event))
+        self.period = 1.0 / rate
+        self.field = ParticleField()
+        self.inbox: deque = deque()
+        self.outbox: deque = deque()
+        self.event_seq = 0
+        self.tick = 0
+        self.now = time.perf_counter()
+        self.timers: List[Tuple[float, Callable]] = []
+        self.explosion_pos = (0.0, 0.0)
+        self.tick_time = StageHistogram()
+        self.overruns = 0
+        self.stopping = threading.Event()
+        self.commands: Dict[str, Callable] = {
+            "pending_bet": self.state.set_pending_bet,
+            "place_bet": self._place_bet,
+            "cash_out": self._cash_out,
+            "reset_balance": self._reset_balance,
+            "quality": self._set_quality,
         }
-        if os.path.exists(Config.STATS_FILE):
-            try:
-                with open(Config.STATS_FILE, "r") as f:
-                    return json.load(f)
-            except:
-                return default_stats
-        return default_stats
+        self.snapshot: Optional[SimSnapshot] = None
+        self._publish_snapshot()
 
-    def save_stats(self):
-        try:
-            with open(Config.STATS_FILE, "w") as f:
-                json.dump(self.stats, f)
-        except:
-            pass
+    def submit(self, command: str, *args):
+        self.inbox.append((command, args))
 
-    def reset_balance(self):
-        self.balance = Config.INITIAL_BALANCE
-        self.history.clear()
+    def publish(self, event: str, value):
+        self.event_seq += 1
+        self.outbox.append((self.event_seq, event, value))
 
-    def can_place_bet(self, amount: int) -> bool:
-        return (
-            self.state == GameState.BETTING
-            and not self.cooldown_bet
-            and amount >= Config.MIN_BET
-            and amount <= self.balance
-        )
-
-    def place_bet(self, amount: int):
-        self.current_bet = amount
-        self.balance -= amount
-        self.state = GameState.FLYING
-        self.multiplier = 1.0
-        self.start_time = time.time()
-        self.stats["total_games"] += 1
-        self.generate_crash_point()
-        self.cooldown_bet = True
-
-    def generate_crash_point(self):
-        seed = hashlib.sha256(str(time.time() + random.random()).encode()).hexdigest()
-        random.seed(seed)
-        raw = random.random()
-        self.crash_point = 1.0 + (raw**Config.CRASH_SKEW) * Config.CRASH_MAX_RANGE
-        if random.random() < Config.SPECIAL_CHANCE:
-            self.crash_point = random.uniform(Config.SPECIAL_MIN, Config.SPECIAL_MAX)
-
-    def update_multiplier(self):
-        if self.state != GameState.FLYING:
-            return
-        elapsed = time.time() - self.start_time
-        self.multiplier = 1.0 + Config.GROWTH_FACTOR * (elapsed**Config.GROWTH_EXPONENT)
-
-    def check_crash(self) -> bool:
-        if self.state == GameState.FLYING and self.multiplier >= self.crash_point:
-            self.state = GameState.CRASHED
-            self.stats["losses"] += 1
-            self.history.append({"multiplier": self.multiplier, "success": False})
-            self.save_stats()
-            return True
-        return False
+    def _forward(self, event: str, value):
+        if threading.current_thread() is self:
+            self.publish(event, value)
+        else:
+            # already on the kivy thread, e.g. the async stats writer
+            self.relay.emit(event, value)
+
+    def drain_events(self, upto: int):
+        outbox, relay = self.outbox, self.relay
+        while outbox and outbox[0][0] <= upto:
+            _, event, value = outbox.popleft()
+            relay.emit(event, value)
+
+    def stop(self):
+        self.stopping.set()
+        if self.is_alive():
+            self.join(timeout=1.0)
+
+    def run(self):
+        last = next_tick = time.perf_counter()
+        while not self.stopping.is_set():
+            now = time.perf_counter()
+            self.step(min(now - last, 0.1), now)
+            last = now
+            finished = time.perf_counter()
+            self.tick_time.record(finished - now)
+            next_tick += self.period
+            if next_tick < finished:
+                # drop missed ticks instead of bursting to catch up
+                self.overruns += 1
+                next_tick = finished
+            else:
+                self.stopping.wait(next_tick - finished)
+
+    def step(self, dt: float, now: float):
+        self.now = now
+        inbox = self.inbox
+        while inbox:
+            command, args = inbox.popleft()
+            self.commands[command](*args)
+        self._run_timers()
+
+        state, engine = self.state, self.engine
+        if state.state == GameState.FLYING:
+            state.update_multiplier()
+            engine.update_plane_position()
+            if state.check_crash():
+                self._crash()
+
+        self.field.update(dt)
+        self.tick += 1
+        self._publish_snapshot()
+
+    def _publish_snapshot(self):
+        state, engine = self.state, self.engine
+        self.snapshot = SimSnapshot(
+            self.tick,
+            self.event_seq,
+            state.state,
+            state.multiplier,
+            state.current_bet,
+            (engine.plane_x, engine.plane_y),
+            self.field.snapshot(),
+            self.field.dropped,
+        )
+
+    def _after(self, delay: float, callback: Callable):
+        self.timers.append((self.now + delay, callback))
 
-    def can_cash_out(self) -> bool:
-        return self.state == GameState.FLYING and not self.cooldown_cashout
+    def _run_timers(self):
+        due = [timer for timer in self.timers if timer[0] <= self.now]
+        for timer in due:
+            self.timers.remove(timer)
+            timer[1]()
 
-    def cash_out(self) -> int:
-        winnings = int(self.current_bet * self.multiplier)
-        self.balance += winnings
-        profit = winnings - self.current_bet
-        self.stats["wins"] += 1
-        self.stats["highest_multiplier"] = max(
-            self.stats["highest_multiplier"], self.multiplier
+    def _place_bet(
+        self,
+        amount: int,
+        width: float,
+        height: float,
+        crash_point: Optional[float] = None,
+    ):
+        if not self.state.can_place_bet(amount):
+            return
+        self.state.place_bet(amount)
+        if crash_point is not None:
+            self.state.crash_point = crash_point
+        self.engine.generate_flight_path(width, height)
+        self.engine.reset_plane()
+        self.field.emit(
+            self.engine.plane_x, self.engine.plane_y - 60, *EFFECTS["launch"]
         )
-        self.stats["biggest_win"] = max(self.stats["biggest_win"], profit)
-        self.history.append({"multiplier": self.multiplier, "success": True})
-        self.state = GameState.RESULT
-        self.cooldown_cashout = True
-        self.save_stats()
-        return winnings
+        self.publish("bet_placed", amount)
+        self._after(0.5, self._clear_bet_cooldown)
 
-    def reset_to_betting(self):
-        self.state = GameState.BETTING
-        self.multiplier = 1.0
-        self.current_bet = 0
+    def _clear_bet_cooldown(self):
+        self.state.cooldown_bet = False
 
+    def _clear_cashout_cooldown(self):
+        self.state.cooldown_cashout = False
 
-class GameEngine:
-    def __init__(self, state_manager: StateManager, assets: AssetManager):
+    def _cash_out(self):
+        if not self.state.can_cash_out():
+            return
+        winnings = self.state.cash_out()
+        self.publish("cashed_out", winnings)
+        self._after(0.5, self._clear_cashout_cooldown)
+        self._after(1.0, self._reset)
+
+    def _crash(self):
+        self.explosion_pos = (self.engine.plane_x, self.engine.plane_y)
+        self.field.emit(*self.explosion_pos, *EFFECTS["explosion"])
+        self.publish("crashed", self.state.multiplier)
+        self._after(0.1, self._second_explosion)
+        self._after(1.5, self._reset)
+
+    def _second_explosion(self):
+        self.field.emit(*self.explosion_pos, *EFFECTS["explosion_secondary"])
+
+    def _reset(self):
+        self.state.reset_to_betting()
+        self.engine.reset_plane()
+        self.publish("reset", None)
+
+    def _reset_balance(self):
+        if self.state.state == GameState.BETTING:
+            self.state.reset_balance()
+
+    def _set_quality(self, tier: Dict[str, float]):
+        self.field.set_quality(int(tier["particles"]), tier["emission"], tier["size"])
+
+
+# background coroutines for --async. they run on the loop kivy's async
+# runner drives, so they interleave with frames instead of needing threads
+class ServiceHost:
+    def __init__(self):
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.tasks: List[asyncio.Task] = []
+
+    def start(self):
+        self.loop = asyncio.get_event_loop()
+
+    def spawn(self, coro, name: str) -> asyncio.Task:
+        task = self.loop.create_task(coro)
+        self.tasks.append(task)
+        task.add_done_callback(partial(self._task_done, name))
+        return task
+
+    def _task_done(self, name: str, task: asyncio.Task):
+        self.tasks.remove(task)
+        if not task.cancelled() and task.exception() is not None:
+            Logger.error("Services: %s failed: %r", name, task.exception())
+
+    def stop(self):
+        for task in list(self.tasks):
+            task.cancel()
+
+
+# writes stats off the ui thread; requests that arrive while a write is in
+# flight collapse into one write of the newest stats, while their crash
+# points are all kept and appended together
+class AsyncStatsWriter:
+    def __init__(self, host: ServiceHost, state_manager: StateManager):
+        self.loop = host.loop
         self.state = state_manager
-        self.assets = assets
-        self.flight_path: List[Tuple[float, float]] = []
-        self.current_path_index = 0
-        self.plane_x = Config.PLANE_START_X
-        self.plane_y = Config.PLANE_START_Y
-        self.plane_angle = 0.0
-
-    def generate_flight_path(self, width: float, height: float):
-        self.flight_path = []
-        for i in range(Config.FLIGHT_SAMPLES):
-            t = i / Config.FLIGHT_SAMPLES
-            x = Config.PLANE_START_X + t * -475
-
-            if t < 0.15:
-                y = Config.PLANE_START_Y + t * 2000
-            else:
-                base_y = Config.PLANE_START_Y + 300 + (t - 0.15) * 225
-                y = base_y + 75 * math.sin((t - 0.15) * 15)
+        self.pending: Optional[Dict] = None
+        self.pending_rounds: List[float] = []
+        # guards pending, which save_stats may fill from the sim thread
+        self.lock = threading.Lock()
+        self.wakeup = asyncio.Event()
+        # one worker keeps writes in order
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.requests = 0
+        self.writes = 0
+        state_manager.stats_writer = self.request
+        host.spawn(self.run(), "stats-writer")
+
+    def request(self, stats: Dict, rounds: List[float]):
+        # save_stats may run on the simulation thread. the save is recorded
+        # right away, so flush() finds it even if the loop never gets to
+        # the wakeup
+        with self.lock:
+            self.requests += 1
+            self.pending = stats
+            self.pending_rounds.extend(rounds)
+        self.loop.call_soon_threadsafe(self.wakeup.set)
+
+    @staticmethod
+    def write(stats: Dict, rounds: List[float]) -> float:
+        append_crash_history(Config.HISTORY_FILE, rounds)
+        return write_stats_file(Config.STATS_FILE, stats)
+
+    async def run(self):
+        while True:
+            await self.wakeup.wait()
+            self.wakeup.clear()
+            with self.lock:
+                stats, self.pending = self.pending, None
+                rounds, self.pending_rounds = self.pending_rounds, []
+            if stats is None:
+                # woken for a save an earlier pass already took
+                continue
+            duration = await self.loop.run_in_executor(
+                self.executor, self.write, stats, rounds
+            )
+            self.writes += 1
+            self.state._emit("stats_saved", duration)
+
+    def flush(self):
+        # let an in-flight write land before the final one
+        self.executor.shutdown(wait=True)
+        with self.lock:
+            stats, self.pending = self.pending, None
+            rounds, self.pending_rounds = self.pending_rounds, []
+        if stats is not None:
+            self.write(stats, rounds)
+
+
+# a heartbeat coroutine stamps the time every half budget; a plain thread
+# watches the stamp and, when the loop has not come back within the
+# budget, logs the task that holds it and the main thread's stack. every
+# stall is counted, but at most one is logged per REPORT_INTERVAL
+class StallWatchdog:
+    REPORT_INTERVAL = 1.0
+
+    def __init__(self, host: ServiceHost, budget_ms: float = Config.STALL_BUDGET_MS):
+        self.loop = host.loop
+        self.budget = budget_ms / 1000
+        self.interval = self.budget / 2
+        self.loop_thread_id = threading.get_ident()
+        self.last_beat = time.perf_counter()
+        self.stalled = False
+        self.stalls = 0
+        self.max_stall = 0.0
+        self.last_report = 0.0
+        self.stopping = threading.Event()
+        host.spawn(self.heartbeat(), "watchdog-heartbeat")
+        self.thread = threading.Thread(
+            target=self.monitor, name="stall-watchdog", daemon=True
+        )
+        self.thread.start()
+
+    async def heartbeat(self):
+        while True:
+            self.last_beat = time.perf_counter()
+            await asyncio.sleep(self.interval)
+
+    def monitor(self):
+        while not self.stopping.wait(self.interval / 2):
+            stalled_for = time.perf_counter() - self.last_beat - self.interval
+            if stalled_for <= self.budget:
+                self.stalled = False
+                continue
+            self.max_stall = max(self.max_stall, stalled_for)
+            if not self.stalled:
+                self.stalled = True
+                self.stalls += 1
+                now = time.perf_counter()
+                if now - self.last_report >= self.REPORT_INTERVAL:
+                    self.last_report = now
+                    self.report(stalled_for)
+
+    def report(self, stalled_for: float):
+        task = asyncio.current_task(self.loop)
+        frame = sys._current_frames().get(self.loop_thread_id)
+        # innermost frames are the ones holding the loop
+        stack = "".join(traceback.format_stack(frame)[-8:]) if frame else ""
+        Logger.warning(
+            "Watchdog: event loop blocked for %.1fms in %s\n%s",
+            stalled_for * 1000,
+            task.get_name() if task is not None else "a callback",
+            stack,
+        )
 
-            self.flight_path.append((x, y))
-        self.current_path_index = 0
+    def stop(self):
+        self.stopping.set()
+
+    def summary(self) -> Dict:
+        return {
+            "budget_ms": self.budget * 1000,
+            "stalls": self.stalls,
+            "max_stall_ms": self.max_stall * 1000,
+        }
+
+
+class StageHistogram:
+    # log-spaced bucket upper bounds from 1us to roughly 2s
+    BOUNDS = [1e-6 * 1.2**i for i in range(80)]
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
 
-    def update_plane_position(self):
-        if self.state.state != GameState.FLYING:
+    def reset(self):
+        for index in range(len(self.counts)):
+            self.counts[index] = 0
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float):
+        self.counts[bisect.bisect_left(self.BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= target:
+                # the bucket bound can lie above anything recorded in it
+                if index < len(self.BOUNDS):
+                    return min(self.BOUNDS[index], self.max)
+                return self.max
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count * 1000 if self.count else 0.0,
+            "p50_ms": self.percentile(0.50) * 1000,
+            "p95_ms": self.percentile(0.95) * 1000,
+            "p99_ms": self.percentile(0.99) * 1000,
+            "max_ms": self.max * 1000,
+        }
+
+
+# callers check `enabled` before timing, so a disabled profiler costs one
+# attribute lookup per stage
+class FrameProfiler:
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.stages: Dict[str, StageHistogram] = {}
+
+    def lap(self, name: str, started: float) -> float:
+        now = time.perf_counter()
+        histogram = self.stages.get(name)
+        if histogram is None:
+            histogram = self.stages[name] = StageHistogram()
+        histogram.record(now - started)
+        return now
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        return {name: hist.summary() for name, hist in self.stages.items()}
+
+    def reset(self):
+        self.stages.clear()
+
+    def dump(self, path: str = Config.PROFILE_FILE):
+        with open(path, "w") as f:
+            json.dump(self.summary(), f, indent=2)
+
+
+# keeps collector pauses out of flights: "freeze" moves every live object
+# to the permanent generation and disables collection until the round
+# ends, "tuned" raises the gen0 threshold for the flight instead
+class GcPolicy:
+    MODES = ("default", "freeze", "tuned")
+
+    def __init__(self, mode: str = "default"):
+        self.mode = mode
+        self.pauses = StageHistogram()
+        self.collections = [0, 0, 0]
+        self.default_threshold = gc.get_threshold()
+        self.pause_started = 0.0
+        gc.callbacks.append(self._on_gc)
+
+    def watch_state(self, events):
+        # a StateManager, or the EventRelay the simulation thread feeds
+        events.bind("state", self._on_state)
+
+    def _on_state(self, state: GameState):
+        if state == GameState.FLYING:
+            self.begin_flight()
+        else:
+            self.end_flight()
+
+    def begin_flight(self):
+        if self.mode == "freeze":
+            gc.freeze()
+            gc.disable()
+        elif self.mode == "tuned":
+            gc.set_threshold(Config.GC_FLIGHT_THRESHOLD, *self.default_threshold[1:])
+
+    def end_flight(self):
+        if self.mode == "freeze" and not gc.isenabled():
+            gc.enable()
+            gc.unfreeze()
+        elif self.mode == "tuned":
+            gc.set_threshold(*self.default_threshold)
+
+    def _on_gc(self, phase: str, info: Dict):
+        if phase == "start":
+            self.pause_started = time.perf_counter()
+        else:
+            self.pauses.record(time.perf_counter() - self.pause_started)
+            self.collections[info["generation"]] += 1
+
+    def reset(self):
+        self.pauses.reset()
+        for generation in range(len(self.collections)):
+            self.collections[generation] = 0
+
+    def close(self):
+        self.end_flight()
+        if self._on_gc in gc.callbacks:
+            gc.callbacks.remove(self._on_gc)
+
+    def summary(self) -> Dict:
+        return {
+            "mode": self.mode,
+            "collections": list(self.collections),
+            "pauses": self.pauses.summary(),
+        }
+
+
+# steps particle and background detail down when too many frames miss the
+# target frame time, and back up after sustained headroom. upgrades need
+# several clean windows in a row, and every downgrade that undoes an
+# upgrade doubles that wait so a borderline machine settles on one tier
+class QualityController:
+    TIERS: List[Tuple[str, Dict[str, float]]] = [
+        (
+            "high",
+            {
+                "particles": 800,
+                "emission": 1.0,
+                "size": 1.0,
+                "stars": 1.0,
+            },
+        ),
+        (
+            "medium",
+            {
+                "particles": 500,
+                "emission": 0.6,
+                "size": 0.85,
+                "stars": 0.5,
+            },
+        ),
+        (
+            "low",
+            {
+                "particles": 250,
+                "emission": 0.35,
+                "size": 0.7,
+                "stars": 0.25,
+            },
+        ),
+        (
+            "minimal",
+            {
+                "particles": 100,
+                "emission": 0.15,
+                "size": 0.6,
+                "stars": 0.0,
+            },
+        ),
+    ]
+    NAMES = [name for name, _ in TIERS]
+    MODES = ["auto"] + NAMES
+    WINDOW_FRAMES = 60
+    MISS_FACTOR = 1.5
+    DOWNGRADE_MISS_RATIO = 0.2
+    UPGRADE_MISS_RATIO = 0.02
+    UPGRADE_WINDOWS = 3
+    MAX_UPGRADE_WINDOWS = 48
+    COOLDOWN_WINDOWS = 2
+
+    def __init__(self, mode: str = "auto"):
+        self.adaptive = mode == "auto"
+        self.index = 0 if self.adaptive else self.NAMES.index(mode)
+        self.frame_budget = self.MISS_FACTOR / Config.TARGET_FPS
+        self.frames = 0
+        self.misses = 0
+        self.clean_windows = 0
+        self.upgrade_windows = self.UPGRADE_WINDOWS
+        self.cooldown = 0
+        self.last_change: Optional[str] = None
+        self.changes = 0
+        self.listeners: List[Callable] = []
+
+    @property
+    def name(self) -> str:
+        return self.TIERS[self.index][0]
+
+    @property
+    def tier(self) -> Dict[str, float]:
+        return self.TIERS[self.index][1]
+
+    def bind(self, callback: Callable):
+        self.listeners.append(callback)
+        callback(self.tier)
+
+    def set_tier(self, index: int):
+        index = max(0, min(len(self.TIERS) - 1, index))
+        if index == self.index:
+            return
+        self.index = index
+        self.changes += 1
+        Logger.info("Quality: switched to %s", self.name)
+        for callback in self.listeners:
+            callback(self.tier)
+
+    def observe(self, dt: float):
+        if not self.adaptive:
+            return
+        self.frames += 1
+        if dt > self.frame_budget:
+            self.misses += 1
+        if self.frames < self.WINDOW_FRAMES:
+            return
+
+        miss_ratio = self.misses / self.frames
+        self.frames = 0
+        self.misses = 0
+        # let the previous change show up in the frame times first
+        if self.cooldown:
+            self.cooldown -= 1
+            return
+
+        if miss_ratio > self.DOWNGRADE_MISS_RATIO:
+            self.clean_windows = 0
+            if self.index < len(self.TIERS) - 1:
+                if self.last_change == "up":
+                    self.upgrade_windows = min(
+                        self.upgrade_windows * 2, self.MAX_UPGRADE_WINDOWS
+                    )
+                self.last_change = "down"
+                self.cooldown = self.COOLDOWN_WINDOWS
+                self.set_tier(self.index + 1)
+        elif miss_ratio <= self.UPGRADE_MISS_RATIO:
+            self.clean_windows += 1
+            if self.clean_windows >= self.upgrade_windows and self.index > 0:
+                self.clean_windows = 0
+                self.last_change = "up"
+                self.cooldown = self.COOLDOWN_WINDOWS
+                self.set_tier(self.index - 1)
+        else:
+            self.clean_windows = 0
+
+    def summary(self) -> Dict:
+        return {
+            "mode": "auto" if self.adaptive else self.name,
+            "tier": self.name,
+            "changes": self.changes,
+        }
+
+
+class MetricCounter:
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self.value = 0
+
+    def inc(self, amount: int = 1):
+        self.value += amount
+
+    def render(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.help_text}",
+            f"# TYPE {self.name} counter",
+            f"{self.name} {self.value}",
+        ]
+
+
+class MetricHistogram:
+    def __init__(self, name: str, help_text: str, bounds: List[float]):
+        self.name = name
+        self.help_text = help_text
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.help_text}",
+            f"# TYPE {self.name} histogram",
+        ]
+        # observe() keeps running on the main thread. one copy of the buckets
+        # (list() does not release the gil) gives every cumulative line,
+        # +Inf and _count from the same moment, so they can never disagree;
+        # _sum may include one observation more or less, which is allowed
+        counts = list(self.counts)
+        cumulative = 0
+        for bound, bucket_count in zip(self.bounds, counts):
+            cumulative += bucket_count
+            lines.append(f'{self.name}_bucket{{le="{bound}"}} {cumulative}')
+        cumulative += counts[-1]
+        lines.append(f'{self.name}_bucket{{le="+Inf"}} {cumulative}')
+        lines.append(f"{self.name}_sum {self.total}")
+        lines.append(f"{self.name}_count {cumulative}")
+        return lines
+
+
+# hot-path updates are plain attribute increments on the main thread; the
+# exporter threads only read them, and gauges are sampled at scrape time
+class GameMetrics:
+    FRAME_BOUNDS = [0.004, 0.008, 0.0167, 0.025, 0.0333, 0.05, 0.1, 0.25]
+    SAVE_BOUNDS = [0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1]
+    SOUND_BOUNDS = [0.01, 0.02, 0.04, 0.08, 0.16, 0.32]
+
+    def __init__(self):
+        self.frame_interval = MetricHistogram(
+            "shiiiuuuu_frame_interval_seconds",
+            "Time between game loop frames.",
+            self.FRAME_BOUNDS,
+        )
+        self.update_time = MetricHistogram(
+            "shiiiuuuu_update_seconds",
+            "Time spent inside one game loop update.",
+            self.FRAME_BOUNDS,
+        )
+        self.stats_save = MetricHistogram(
+            "shiiiuuuu_stats_save_seconds",
+            "Time spent writing the stats file.",
+            self.SAVE_BOUNDS,
+        )
+        self.sound_latency = MetricHistogram(
+            "shiiiuuuu_sound_latency_seconds",
+            "Time from a game event to its sound playing, on backends that"
+            " report a playback position.",
+            self.SOUND_BOUNDS,
+        )
+        self.rounds = MetricCounter("shiiiuuuu_rounds_total", "Rounds played.")
+        self.wins = MetricCounter("shiiiuuuu_wins_total", "Rounds cashed out.")
+        self.losses = MetricCounter("shiiiuuuu_losses_total", "Rounds lost.")
+        self.balance = 0
+        self.gauges: List[Tuple[str, str, str, Callable[[], float]]] = []
+
+    def add_gauge(
+        self,
+        name: str,
+        help_text: str,
+        read: Callable[[], float],
+        kind: str = "gauge",
+    ):
+        self.gauges.append((name, help_text, kind, read))
+
+    def watch_state(self, state_manager: "StateManager", events=None):
+        # with the simulation thread, `events` is the EventRelay that
+        # replays the state manager's events on the kivy thread
+        if events is None:
+            events = state_manager
+        self.balance = state_manager.balance
+        events.bind("state", self._on_state)
+        events.bind("balance", self._on_balance)
+        events.bind("stats_saved", self.stats_save.observe)
+        self.add_gauge(
+            "shiiiuuuu_balance",
+            "Current player balance.",
+            lambda: self.balance,
+        )
+
+    def watch_particles(self, particles: ParticlePool):
+        self.add_gauge(
+            "shiiiuuuu_particles_active",
+            "Live particles in the pool.",
+            lambda: particles.active_count,
+        )
+        self.add_gauge(
+            "shiiiuuuu_particles_dropped_total",
+            "Particles requested while the pool was full.",
+            lambda: particles.dropped,
+            kind="counter",
+        )
+
+    def watch_sounds(self, assets: AssetManager):
+        assets.on_latency(self.sound_latency.observe)
+        self.add_gauge(
+            "shiiiuuuu_sound_unmeasured_total",
+            "Sounds whose latency the audio backend could not report.",
+            lambda: assets.unmeasured,
+            kind="counter",
+        )
+
+    def _on_balance(self, balance: int):
+        self.balance = balance
+
+    def _on_state(self, state: GameState):
+        if state == GameState.FLYING:
+            self.rounds.inc()
+        elif state == GameState.CRASHED:
+            self.losses.inc()
+        elif state == GameState.RESULT:
+            self.wins.inc()
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in (
+            self.frame_interval,
+            self.update_time,
+            self.stats_save,
+            self.sound_latency,
+            self.rounds,
+            self.wins,
+            self.losses,
+        ):
+            lines.extend(metric.render())
+        for name, help_text, kind, read in self.gauges:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.append(f"{name} {read()}")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsExporter:
+    def __init__(self, metrics: GameMetrics):
+        self.metrics = metrics
+        self.server: Optional[ThreadingHTTPServer] = None
+        self.textfile_stop = threading.Event()
+
+    def serve(self, port: int, host: str = "127.0.0.1"):
+        metrics = self.metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(
+            target=self.server.serve_forever, name="metrics-http", daemon=True
+        ).start()
+
+    def write_textfile(self, path: str, interval: float = Config.METRICS_INTERVAL):
+        def run():
+            while not self.textfile_stop.wait(interval):
+                self._write_textfile(path)
+
+        threading.Thread(target=run, name="metrics-textfile", daemon=True).start()
+
+    def _write_textfile(self, path: str):
+        # node_exporter may read at any time, so swap the file in atomically
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w") as f:
+            f.write(self.metrics.render())
+        os.replace(temp_path, path)
+
+    def stop(self, textfile_path: Optional[str] = None):
+        self.textfile_stop.set()
+        if textfile_path:
+            self._write_textfile(textfile_path)
+        if self.server is not None:
+            self.server.shutdown()
+            self.server = None
+
+
+# static backgrounds are rendered once per star count into a shared fbo
+# and drawn as a single textured quad by every screen
+class StaticLayerCache:
+    fbos: Dict[Tuple[int, int, int], Fbo] = {}
+
+    @classmethod
+    def background(cls, stars: int):
+        size = (int(Window.width), int(Window.height))
+        key = (stars, size[0], size[1])
+        fbo = cls.fbos.get(key)
+        if fbo is None:
+            fbo = Fbo(size=size)
+            with fbo:
+                ClearColor(0, 0, 0, 0)
+                ClearBuffers()
+                Color(0.05, 0.05, 0.15, 1)
+                Rectangle(pos=(0, 0), size=size)
+                Color(1, 1, 1, 0.8)
+                for _ in range(stars):
+                    x = random.randint(0, size[0])
+                    y = random.randint(0, size[1])
+                    star_size = random.uniform(2, 4)
+                    Ellipse(pos=(x, y), size=(star_size, star_size))
+            fbo.draw()
+            cls.fbos[key] = fbo
+        return fbo.texture
+
+    @classmethod
+    def draw_background(cls, widget: Widget, stars: int = 0) -> Rectangle:
+        # screens draw in their own coordinate space, plain widgets do not
+        relative = isinstance(widget, RelativeLayout)
+        with widget.canvas.before:
+            Color(1, 1, 1, 1)
+            rect = Rectangle(
+                texture=cls.background(stars),
+                pos=(0, 0) if relative else widget.pos,
+                size=widget.size,
+            )
+
+        def update_rect(instance, value):
+            if not relative:
+                rect.pos = instance.pos
+            rect.size = instance.size
+
+        widget.bind(pos=update_rect, size=update_rect)
+        return rect
+
+
+class GlyphCache:
+    def __init__(self, max_glyphs: int = 256):
+        self.max_glyphs = max_glyphs
+        self.renders = 0
+        self._textures: "OrderedDict[Tuple[str, float, bool], object]" = OrderedDict()
+
+    def get(self, char: str, font_size: float, bold: bool):
+        key = (char, font_size, bold)
+        texture = self._textures.get(key)
+        if texture is not None:
+            self._textures.move_to_end(key)
+            return texture
+
+        core = CoreLabel(text=char, font_size=font_size, bold=bold)
+        core.refresh()
+        texture = core.texture
+        self.renders += 1
+        self._textures[key] = texture
+        if len(self._textures) > self.max_glyphs:
+            self._textures.popitem(last=False)
+        return texture
+
+
+# composes text from cached glyph quads so per-frame numbers never
+# go through the text provider once the glyphs are warm
+class GlyphLabel(Widget):
+    cache = GlyphCache()
+
+    text = StringProperty("")
+    color = ListProperty([1, 1, 1, 1])
+    font_size = NumericProperty("15sp")
+    bold = BooleanProperty(False)
+    halign = OptionProperty("center", options=["left", "center"])
+
+    def __init__(self, max_chars: int = 16, **kwargs):
+        super().__init__(**kwargs)
+        self.glyphs: List[Rectangle] = []
+        with self.canvas:
+            self.color_inst = Color(*self.color)
+            for _ in range(max_chars):
+                self.glyphs.append(Rectangle(pos=(0, 0), size=(0, 0)))
+        self.bind(
+            text=self._layout_glyphs,
+            pos=self._layout_glyphs,
+            size=self._layout_glyphs,
+            font_size=self._layout_glyphs,
+            bold=self._layout_glyphs,
+            halign=self._layout_glyphs,
+            color=self._update_color,
+        )
+        self._layout_glyphs()
+
+    def _update_color(self, *args):
+        self.color_inst.rgba = self.color
+
+    def _layout_glyphs(self, *args):
+        text = self.text
+        while len(self.glyphs) < len(text):
+            rect = Rectangle(pos=(0, 0), size=(0, 0))
+            self.canvas.add(rect)
+            self.glyphs.append(rect)
+
+        textures = [self.cache.get(char, self.font_size, self.bold) for char in text]
+        text_width = sum(texture.width for texture in textures)
+        text_height = max((texture.height for texture in textures), default=0)
+
+        if self.halign == "left":
+            x = self.x
+        else:
+            x = self.center_x - text_width / 2
+        y = self.center_y - text_height / 2
+
+        for i, rect in enumerate(self.glyphs):
+            if i < len(textures):
+                texture = textures[i]
+                rect.texture = texture
+                rect.pos = (x, y)
+                rect.size = texture.size
+                x += texture.width
+            elif rect.size[0]:
+                rect.size = (0, 0)
+
+
+class FloatingTextPool:
+    FADE_IN = 0.2
+    RISE = 0.8
+    FADE_OUT = 0.2
+
+    def __init__(self, parent: Widget, size: int = 3):
+        self.labels: List[GlyphLabel] = []
+        self.ages: List[float] = [0.0] * size
+        self.active: List[bool] = [False] * size
+        self.base_y: List[float] = [0.0] * size
+        self.active_count = 0
+        self.rise = dp(100)
+        for _ in range(size):
+            label = GlyphLabel(
+                font_size="36sp",
+                bold=True,
+                color=(0.2, 1, 0.2, 1),
+                size_hint=(None, None),
+                size=(150, 50),
+                opacity=0,
+                max_chars=12,
+            )
+            parent.add_widget(label)
+            self.labels.append(label)
+
+    def show(self, text: str, center_x: float, center_y: float):
+        # reuse an idle label, or the one closest to finishing
+        index = max(
+            range(len(self.labels)), key=lambda i: (not self.active[i], self.ages[i])
+        )
+        if not self.active[index]:
+            self.active[index] = True
+            self.active_count += 1
+        self.ages[index] = 0.0
+        label = self.labels[index]
+        label.text = text
+        label.center = (center_x, center_y)
+        label.opacity = 0
+        self.base_y[index] = label.y
+
+    def update(self, dt: float):
+        if not self.active_count:
             return
+        for i, label in enumerate(self.labels):
+            if not self.active[i]:
+                continue
+            age = self.ages[i] + dt
+            self.ages[i] = age
+            if age < self.FADE_IN:
+                label.opacity = age / self.FADE_IN
+            elif age < self.FADE_IN + self.RISE:
+                label.opacity = 1
+                label.y = self.base_y[i] + self.rise * (age - self.FADE_IN) / self.RISE
+            elif age < self.FADE_IN + self.RISE + self.FADE_OUT:
+                label.y = self.base_y[i] + self.rise
+                label.opacity = 1 - (age - self.FADE_IN - self.RISE) / self.FADE_OUT
+            else:
+                label.opacity = 0
+                self.active[i] = False
+                self.active_count -= 1
+
+
+# every rounded button shares one white 9-patch texture tinted by its
+# own color instruction, so layout passes only move the existing quads
+class RoundedButton(Button):
+    TEXTURE_RADIUS = 32
+    shared_texture: Optional[Texture] = None
+
+    bg_color = ListProperty([0.2, 0.6, 0.8, 0.8])
+    radius = NumericProperty(dp(12))
 
-        if self.current_path_index < len(self.flight_path):
-            self.current_path_index = min(
-                len(self.flight_path) - 1, self.current_path_index + 1
+    def __init__(self, **kwargs):
+        kwargs.setdefault("background_color", (0, 0, 0, 0))
+        kwargs.setdefault("bold", True)
+        super().__init__(**kwargs)
+        border = self.TEXTURE_RADIUS
+        with self.canvas.before:
+            self.bg_color_inst = Color(*self.bg_color)
+            self.bg_rect = BorderImage(
+                texture=self.rounded_texture(),
+                border=(border, border, border, border),
+                display_border=[self.radius] * 4,
+                pos=self.pos,
+                size=self.size,
             )
-            self.plane_x, self.plane_y = self.flight_path[self.current_path_index]
+        self.bind(
+            pos=self._update_bg,
+            size=self._update_bg,
+            radius=self._update_radius,
+            bg_color=self._update_color,
+        )
+
+    @classmethod
+    def rounded_texture(cls) -> Texture:
+        if cls.shared_texture is None:
+            texture = Texture.create(size=(2 * cls.TEXTURE_RADIUS + 2,) * 2)
+            texture.add_reload_observer(cls._blit_rounded)
+            cls._blit_rounded(texture)
+            cls.shared_texture = texture
+        return cls.shared_texture
+
+    @classmethod
+    def _blit_rounded(cls, texture: Texture):
+        radius = cls.TEXTURE_RADIUS
+        side = texture.width
+        pixels = bytearray(side * side * 4)
+        for y in range(side):
+            # distance from the nearest corner circle center, 0 on straight edges
+            dy = max(0.0, abs(y + 0.5 - side / 2) - (side / 2 - radius))
+            for x in range(side):
+                dx = max(0.0, abs(x + 0.5 - side / 2) - (side / 2 - radius))
+                coverage = min(1.0, max(0.0, radius - math.hypot(dx, dy) + 0.5))
+                offset = (y * side + x) * 4
+                pixels[offset : offset + 4] = bytes(
+                    (255, 255, 255, int(coverage * 255))
+                )
+        texture.blit_buffer(bytes(pixels), colorfmt="rgba", bufferfmt="ubyte")
+
+    def _update_bg(self, *args):
+        self.bg_rect.pos = self.pos
+        self.bg_rect.size = self.size
 
-    def get_multiplier_color(self) -> Tuple[float, float, float, float]:
-        if self.state.multiplier < 2.0:
-            return (0.2, 0.8, 0.2, 0.9)
-        elif self.state.multiplier < 5.0:
-            return (1, 0.7, 0.2, 0.9)
-        return (1, 0.2, 0.2, 0.9)
+    def _update_radius(self, *args):
+        self.bg_rect.display_border = [self.radius] * 4
 
-    def reset_plane(self):
-        self.plane_x = Config.PLANE_START_X
-        self.plane_y = Config.PLANE_START_Y
-        self.plane_angle = 0.0
-        self.current_path_index = 0
+    def _update_color(self, *args):
+        self.bg_color_inst.rgba = self.bg_color
+
+
+class ControlGroups:
+    def __init__(self):
+        self.groups: Dict[str, List[Widget]] = {}
+        self.disabled: Dict[str, bool] = {}
+
+    def register(self, name: str, widget: Widget):
+        self.groups.setdefault(name, []).append(widget)
+        widget.disabled = self.disabled.get(name, False)
+
+    def set_disabled(self, name: str, disabled: bool):
+        if self.disabled.get(name) == disabled:
+            return
+        self.disabled[name] = disabled
+        for widget in self.groups.get(name, ()):
+            widget.disabled = disabled
+
+
+class ProfilerOverlay(Label):
+    REFRESH_INTERVAL = 0.25
+
+    def __init__(self, profiler: FrameProfiler, **kwargs):
+        kwargs.setdefault("font_size", "12sp")
+        kwargs.setdefault("color", (1, 1, 0.6, 1))
+        kwargs.setdefault("halign", "right")
+        kwargs.setdefault("valign", "top")
+        kwargs.setdefault("size_hint", (None, None))
+        super().__init__(**kwargs)
+        self.profiler = profiler
+        self.refresh_event = None
+        self.draw_started = 0.0
+
+    def show(self):
+        Window.add_widget(self)
+        Window.bind(on_draw=self._on_draw, on_flip=self._on_flip, size=self._place)
+        self._place()
+        self.refresh_event = Clock.schedule_interval(
+            self.refresh, self.REFRESH_INTERVAL
+        )
+
+    def hide(self):
+        Window.remove_widget(self)
+        Window.unbind(on_draw=self._on_draw, on_flip=self._on_flip, size=self._place)
+        self.refresh_event.cancel()
+        self.refresh_event = None
+
+    def _place(self, *args):
+        self.size = (dp(320), Window.height)
+        self.text_size = self.size
+        self.pos = (Window.width - self.width - dp(10), -dp(10))
+
+    def _on_draw(self, *args):
+        self.draw_started = time.perf_counter()
+
+    def _on_flip(self, *args):
+        if self.profiler.enabled and self.draw_started:
+            self.profiler.lap("draw", self.draw_started)
+
+    def refresh(self, dt: float):
+        lines = [f"{'stage':<10} {'p50':>6} {'p95':>6} {'p99':>6} ms"]
+        for name, stats in sorted(self.profiler.summary().items()):
+            lines.append(
+                f"{name:<10} {stats['p50_ms']:6.2f} {stats['p95_ms']:6.2f} "
+                f"{stats['p99_ms']:6.2f}"
+            )
+        self.text = "\n".join(lines)
 
 
 class StartScreen(Screen):
@@ -391,15 +1992,7 @@ class StartScreen(Screen):
         self.create_ui()
 
     def create_background(self):
-        with self.canvas.before:
-            Color(0.05, 0.05, 0.15, 1)
-            Rectangle(size=(5000, 5000), pos=(0, 0))
-            Color(1, 1, 1, 0.8)
-            for _ in range(100):
-                x = random.randint(0, Window.width)
-                y = random.randint(0, Window.height)
-                size = random.uniform(2, 4)
-                Ellipse(pos=(x, y), size=(size, size))
+        self.bg = StaticLayerCache.draw_background(self, stars=100)
 
     def create_ui(self):
         layout = BoxLayout(orientation="vertical", padding=dp(40), spacing=dp(25))
@@ -417,62 +2010,27 @@ class StartScreen(Screen):
             orientation="vertical", spacing=dp(25), size_hint_y=0.6
         )
 
-        btn_start = self._create_button(
-            "START GAME", (0.2, 0.7, 0.3, 0.9), self.start_game
-        )
-        btn_stats = self._create_button("STATS", (0.3, 0.5, 0.8, 0.9), self.show_stats)
-        btn_credits = self._create_button(
-            "CREDITS", (0.6, 0.3, 0.7, 0.9), self.show_credits
-        )
-        btn_exit = self._create_button("EXIT", (0.8, 0.2, 0.2, 0.9), self.exit_game)
-
-        button_layout.add_widget(btn_start)
-        button_layout.add_widget(btn_stats)
-        button_layout.add_widget(btn_credits)
-        button_layout.add_widget(btn_exit)
+        buttons = [
+            ("START GAME", (0.2, 0.7, 0.3, 0.9), self.start_game),
+            ("STATS", (0.3, 0.5, 0.8, 0.9), self.show_stats),
+            ("CREDITS", (0.6, 0.3, 0.7, 0.9), self.show_credits),
+            ("EXIT", (0.8, 0.2, 0.2, 0.9), self.exit_game),
+        ]
+        for text, color, callback in buttons:
+            btn = RoundedButton(
+                text=text,
+                bg_color=color,
+                radius=dp(12),
+                font_size="26sp",
+                size_hint_y=None,
+                height=dp(90),
+            )
+            btn.bind(on_press=callback)
+            button_layout.add_widget(btn)
 
         layout.add_widget(button_layout)
         self.add_widget(layout)
 
-    def _create_button(
-        self, text: str, color: Tuple[float, float, float, float], callback
-    ):
-        btn = Button(
-            text=text,
-            font_size="26sp",
-            size_hint_y=None,
-            height=dp(90),
-            bold=True,
-            background_color=(0, 0, 0, 0),
-        )
-        btn.bg_color = color
-        btn.bind(on_press=callback)
-
-        with btn.canvas.before:
-            Color(*color)
-            RoundedRectangle(
-                pos=btn.pos,
-                size=btn.size,
-                radius=[
-                    dp(12),
-                ],
-            )
-
-        def update_bg(instance, value):
-            btn.canvas.before.clear()
-            with btn.canvas.before:
-                Color(*color)
-                RoundedRectangle(
-                    pos=instance.pos,
-                    size=instance.size,
-                    radius=[
-                        dp(12),
-                    ],
-                )
-
-        btn.bind(pos=update_bg, size=update_bg)
-        return btn
-
     def start_game(self, instance):
         self.manager.transition = SlideTransition(direction="left")
         self.manager.current = "game"
@@ -495,13 +2053,22 @@ class StatsScreen(Screen):
     def __init__(self, state_manager: StateManager, **kwargs):
         super().__init__(**kwargs)
         self.state = state_manager
+        # the history file only grows, so each visit reads just the lines
+        # appended since the last one and folds them into the sorted points.
+        # that runs on a worker thread, which alone touches the analyzer;
+        # the label is filled in on the main thread when it finishes
+        self.analyzer = TargetAnalyzer()
+        self.history_offset = 0
+        self.best_text = "Best Target: reading history"
+        self.best_rounds = -1
+        self.best_label: Optional[Label] = None
+        self.refreshing = False
+        self.refresh_again = False
         self.create_background()
         self.create_ui()
 
     def create_background(self):
-        with self.canvas.before:
-            Color(0.05, 0.05, 0.15, 1)
-            Rectangle(size=(5000, 5000), pos=(0, 0))
+        self.bg = StaticLayerCache.draw_background(self)
 
     def create_ui(self):
         self.layout = BoxLayout(orientation="vertical", padding=dp(40), spacing=dp(25))
@@ -520,48 +2087,19 @@ class StatsScreen(Screen):
         )
         self.layout.add_widget(self.stats_content)
 
-        btn_back = self._create_back_button()
-        self.layout.add_widget(btn_back)
-
-        self.add_widget(self.layout)
-
-    def _create_back_button(self):
-        btn = Button(
+        btn_back = RoundedButton(
             text="BACK",
+            bg_color=(0.3, 0.4, 0.8, 0.9),
+            radius=dp(12),
             size_hint=(0.5, None),
             font_size="32sp",
             height=dp(80),
             pos_hint={"center_x": 0.5},
-            bold=True,
-            background_color=(0, 0, 0, 0),
-        )
-        color = (0.3, 0.4, 0.8, 0.9)
-
-        with btn.canvas.before:
-            Color(*color)
-            RoundedRectangle(
-                pos=btn.pos,
-                size=btn.size,
-                radius=[
-                    dp(12),
-                ],
-            )
-
-        def update_bg(instance, value):
-            btn.canvas.before.clear()
-            with btn.canvas.before:
-                Color(*color)
-                RoundedRectangle(
-                    pos=instance.pos,
-                    size=instance.size,
-                    radius=[
-                        dp(12),
-                    ],
-                )
+        )
+        btn_back.bind(on_press=self.go_back)
+        self.layout.add_widget(btn_back)
 
-        btn.bind(pos=update_bg, size=update_bg)
-        btn.bind(on_press=self.go_back)
-        return btn
+        self.add_widget(self.layout)
 
     def update_stats(self):
         self.stats_content.clear_widgets()
@@ -575,6 +2113,77 @@ class StatsScreen(Screen):
                 text = f"{key.replace('_', ' ').title()}: {value}"
             label = Label(text=text, font_size="24sp", color=(1, 1, 1, 0.9), bold=True)
             self.stats_content.add_widget(label)
+        self.best_label = Label(
+            text=self.best_text,
+            font_size="24sp",
+            color=(1, 0.84, 0, 0.9),
+            bold=True,
+        )
+        self.stats_content.add_widget(self.best_label)
+        self.refresh_best_target()
+
+    def refresh_best_target(self):
+        if self.refreshing:
+            self.refresh_again = True
+            return
+        self.refreshing = True
+        threading.Thread(
+            target=self._read_best_target, name="history-reader", daemon=True
+        ).start()
+
+    def _read_best_target(self):
+        text = None
+        try:
+            text = self.best_target_text()
+        except Exception:
+            Logger.exception("Stats: could not read %s", Config.HISTORY_FILE)
+            # start over from the top of the file next time
+            self.analyzer = TargetAnalyzer()
+            self.history_offset = 0
+            self.best_rounds = -1
+        finally:
+            # always hand back, or refreshing stays set for the session
+            Clock.schedule_once(partial(self._best_target_read, text))
+
+    def _best_target_read(self, text: Optional[str], dt: float):
+        self.refreshing = False
+        if text is not None:
+            self.best_label.text = text
+        if self.refresh_again:
+            self.refresh_again = False
+            self.refresh_best_target()
+
+    def best_target_text(self) -> str:
+        try:
+            size = os.path.getsize(Config.HISTORY_FILE)
+        except OSError:
+            size = 0
+        if size < self.history_offset:
+            # truncated or replaced, start over
+            self.analyzer = TargetAnalyzer()
+            self.history_offset = 0
+            self.best_rounds = -1
+        points, self.history_offset = read_crash_history(
+            Config.HISTORY_FILE, self.history_offset
+        )
+        self.analyzer.add(points)
+        rounds = len(self.analyzer)
+        if rounds != self.best_rounds:
+            self.best_rounds = rounds
+            self.best_text = self._format_best(rounds)
+        return self.best_text
+
+    def _format_best(self, rounds: int) -> str:
+        if rounds < Config.OPTIMIZER_MIN_ROUNDS:
+            return f"Best Target: needs {Config.OPTIMIZER_MIN_ROUNDS} rounds ({rounds})"
+        best = self.analyzer.optimum()
+        if best is None:
+            return f"Best Target: none hit {Config.OPTIMIZER_MIN_HITS} times yet"
+        return (
+            f"Best Target: {best.target:.2f}x "
+            f"(returns {best.expected_return:.2f}, hits {best.hit_rate:.0%}"
+            f" of {rounds})"
+        )
 
     def go_back(self, instance):
         self.manager.transition = SlideTransition(direction="down")
@@ -588,9 +2197,7 @@ class CreditsScreen(Screen):
         self.create_ui()
 
     def create_background(self):
-        with self.canvas.before:
-            Color(0.05, 0.05, 0.15, 1)
-            Rectangle(size=(5000, 5000), pos=(0, 0))
+        self.bg = StaticLayerCache.draw_background(self)
 
     def create_ui(self):
         layout = BoxLayout(orientation="vertical", padding=dp(40), spacing=dp(25))
@@ -622,48 +2229,19 @@ class CreditsScreen(Screen):
 
         layout.add_widget(credits_content)
 
-        btn_back = self._create_back_button()
-        layout.add_widget(btn_back)
-
-        self.add_widget(layout)
-
-    def _create_back_button(self):
-        btn = Button(
+        btn_back = RoundedButton(
             text="BACK",
+            bg_color=(0.3, 0.4, 0.8, 0.9),
+            radius=dp(12),
             size_hint=(0.5, None),
             font_size="32sp",
             height=dp(80),
             pos_hint={"center_x": 0.5},
-            bold=True,
-            background_color=(0, 0, 0, 0),
-        )
-        color = (0.3, 0.4, 0.8, 0.9)
-
-        with btn.canvas.before:
-            Color(*color)
-            RoundedRectangle(
-                pos=btn.pos,
-                size=btn.size,
-                radius=[
-                    dp(12),
-                ],
-            )
-
-        def update_bg(instance, value):
-            btn.canvas.before.clear()
-            with btn.canvas.before:
-                Color(*color)
-                RoundedRectangle(
-                    pos=instance.pos,
-                    size=instance.size,
-                    radius=[
-                        dp(12),
-                    ],
-                )
+        )
+        btn_back.bind(on_press=self.go_back)
+        layout.add_widget(btn_back)
 
-        btn.bind(pos=update_bg, size=update_bg)
-        btn.bind(on_press=self.go_back)
-        return btn
+        self.add_widget(layout)
 
     def go_back(self, instance):
         self.manager.transition = SlideTransition(direction="down")
@@ -671,69 +2249,199 @@ class CreditsScreen(Screen):
 
 
 class GameScreen(Screen):
-    def __init__(self, **kwargs):
+    def __init__(
+        self,
+        state_manager: Optional[StateManager] = None,
+        profiler: Optional[FrameProfiler] = None,
+        metrics: Optional[GameMetrics] = None,
+        quality: Optional[QualityController] = None,
+        sim_thread: bool = False,
+        services: Optional[ServiceHost] = None,
+        relay: Optional[EventRelay] = None,
+        deferred: bool = False,
+        **kwargs,
+    ):
         super().__init__(**kwargs)
-        self.state_manager = StateManager()
-        self.assets = AssetManager()
-        self.engine = GameEngine(self.state_manager, self.assets)
+        self.state_manager = state_manager or StateManager()
+        self.profiler = profiler
+        self.metrics = metrics
+        self.quality = quality
+        self.sim_thread = sim_thread
+        self.services = services
+        self.relay = relay
         self.particles = None
-        self.game_view = GameView(self.state_manager, self.engine, self.assets)
+        self.sim: Optional[SimulationThread] = None
+        if not deferred:
+            for _ in self.build_steps():
+                pass
+
+    def build_steps(self) -> Iterator[str]:
+        # first, so the loader thread decodes sounds and textures while
+        # the widgets below are built
+        services = self.services
+        self.assets = AssetManager(preload=services is None)
+        if services is not None:
+            services.spawn(self.assets.preload_async(), "asset-preload")
+        self.engine = GameEngine(self.state_manager, self.assets)
+        if self.sim_thread:
+            self.sim = SimulationThread(
+                self.state_manager, self.engine, relay=self.relay
+            )
+        yield "assets"
+        self.game_view = GameView(
+            self.state_manager,
+            self.engine,
+            self.assets,
+            profiler=self.profiler,
+            metrics=self.metrics,
+            quality=self.quality,
+            sim=self.sim,
+            deferred=True,
+        )
+        yield from self.game_view.build_steps()
         self.add_widget(self.game_view)
+        if self.sim is not None:
+            self.sim.start()
+        yield "attach"
+
+    def on_pre_enter(self, *args):
+        self.game_view.start_updates()
+
+    def on_leave(self, *args):
+        self.game_view.stop_updates()
 
 
 class GameView(FloatLayout):
+    BACKGROUND_STARS = 120
+
     def __init__(
         self,
         state_manager: StateManager,
         engine: GameEngine,
         assets: AssetManager,
+        profiler: Optional[FrameProfiler] = None,
+        metrics: Optional[GameMetrics] = None,
+        quality: Optional[QualityController] = None,
+        sim: Optional[SimulationThread] = None,
+        deferred: bool = False,
         **kwargs,
     ):
         super().__init__(**kwargs)
         self.state = state_manager
         self.engine = engine
         self.assets = assets
+        self.profiler = profiler or FrameProfiler()
+        self.metrics = metrics
+        self.quality = quality
+        self.sim = sim
+        self._rendered_tick = -1
         self.particles = None
-
+        self._shown_multiplier_cents = 100
+        self._shown_multiplier_color = None
+        self._shown_potential_cents = 0
+        # what the controls reflect, kept up to date by state events only,
+        # so with the simulation thread the ui never reads its StateManager.
+        # the simulation is not started yet when these are read
+        self.shown_state = state_manager.state
+        self.shown_balance = state_manager.balance
+        self.shown_bet_valid = state_manager.bet_valid
+        self.controls = ControlGroups()
+        if not deferred:
+            for _ in self.build_steps():
+                pass
+
+    # the widgets are built in steps so a prewarm can spread them over
+    # frames; each step names what it just built
+    def build_steps(self) -> Iterator[str]:
         self.create_background()
+        yield "background"
         self.create_game_area()
+        yield "game_area"
         self.create_ui()
+        yield "ui"
+        self.create_controls()
+        yield "controls"
+        self.create_history()
+        self.floating_texts = FloatingTextPool(self)
 
-        Clock.schedule_interval(self.update_game, 1.0 / Config.TARGET_FPS)
+        # reusable clock events, so rounds do not allocate callbacks
+        self.explosion_pos = (0.0, 0.0)
+        self.clear_bet_cooldown = Clock.create_trigger(self._clear_bet_cooldown, 0.5)
+        self.clear_cashout_cooldown = Clock.create_trigger(
+            self._clear_cashout_cooldown, 0.5
+        )
+        self.reset_after_cash_out = Clock.create_trigger(self.reset_game, 1.0)
+        self.reset_after_crash = Clock.create_trigger(self.reset_game, 1.5)
+        self.second_explosion = Clock.create_trigger(self._emit_second_explosion, 0.1)
+
+        handlers: Dict[str, Callable] = {
+            "state": self._on_state,
+            "balance": self._on_balance,
+            "bet_valid": self._on_bet_valid,
+            "history": self.update_history_display,
+        }
+        if self.sim is None:
+            events = self.state
+        else:
+            # fired on the simulation thread, replayed from the outbox
+            events = self.sim.relay
+            handlers.update(
+                bet_placed=self._show_bet,
+                cashed_out=self._show_cash_out,
+                crashed=self._show_crash,
+                reset=self._show_reset,
+            )
+        for event, handler in handlers.items():
+            events.bind(event, handler)
+        self._on_bet_text(self.bet_input, self.bet_input.text)
+        self._sync_controls()
+        if self.quality is not None:
+            self.quality.bind(self._apply_quality)
+
+        self.update_event = Clock.create_trigger(
+            self.update_game, 1.0 / Config.TARGET_FPS, interval=True
+        )
+        yield "history"
+
+    def start_updates(self):
+        self.update_event()
+
+    def stop_updates(self):
+        self.update_event.cancel()
 
     def create_background(self):
-        with self.canvas.before:
-            Color(0.05, 0.05, 0.15, 1)
-            self.bg = Rectangle(pos=self.pos, size=self.size)
-            Color(1, 1, 1, 0.8)
-            for _ in range(120):
-                x = random.randint(0, Window.width)
-                y = random.randint(0, Window.height)
-                size = random.uniform(2, 4)
-                Ellipse(pos=(x, y), size=(size, size))
-        self.bind(pos=self._update_bg, size=self._update_bg)
+        self.bg = StaticLayerCache.draw_background(self, stars=self.BACKGROUND_STARS)
 
-    def _update_bg(self, *args):
-        self.bg.pos = self.pos
-        self.bg.size = self.size
+    def _apply_quality(self, tier: Dict[str, float]):
+        self.particles.set_quality(
+            int(tier["particles"]), tier["emission"], tier["size"]
+        )
+        if self.sim is not None:
+            self.sim.submit("quality", tier)
+        self.bg.texture = StaticLayerCache.background(
+            int(self.BACKGROUND_STARS * tier["stars"])
+        )
 
     def create_game_area(self):
         self.plane_image = Image(
-            source="plane_icon.png",
             size_hint=(None, None),
             size=(dp(80), dp(80)),
             allow_stretch=True,
             keep_ratio=True,
         )
         self.plane_image.center = (Config.PLANE_START_X, Config.PLANE_START_Y)
+        self.assets.on_ready(
+            "plane", lambda key, texture: setattr(self.plane_image, "texture", texture)
+        )
         self.add_widget(self.plane_image)
 
-        self.multiplier_label = Label(
+        self.multiplier_label = GlyphLabel(
             text="1.00x",
             font_size="84sp",
             color=(1, 1, 1, 0.9),
             bold=True,
             size_hint=(None, None),
+            max_chars=8,
         )
         self.multiplier_label.pos = ((self.width + 100) / 2, self.height - 130)
         self.bind(
@@ -754,11 +2462,23 @@ class GameView(FloatLayout):
             opacity=0,
         )
         self.add_widget(self.crash_label)
+        # under the plane and labels, above the background
+        self.curve = FlightCurve(self.canvas.before)
+        self.bind(size=self._layout_curve)
+        self._layout_curve()
+        self.trail = TrailRibbon(self.canvas)
         self.particles = ParticlePool(self.canvas)
+        if self.metrics is not None:
+            self.metrics.watch_particles(self.particles)
+            self.metrics.watch_sounds(self.assets)
+
+    def _layout_curve(self, *args):
+        # right of the history column, between the controls and the labels
+        self.curve.layout(130, 290, self.width - 170, self.height - 510)
 
     def create_ui(self):
         self.balance_label = Label(
-            text=f"Balance: ${self.state.balance:.2f}",
+            text=f"Balance: ${self.shown_balance:.2f}",
             font_size="21sp",
             color=(1, 1, 1, 0.9),
             bold=True,
@@ -774,32 +2494,36 @@ class GameView(FloatLayout):
         )
         self.add_widget(self.balance_label)
 
-        self.potential_label = Label(
+        self.potential_label = GlyphLabel(
             text="Potential: $0.00",
             font_size="21sp",
             color=(0.2, 1, 0.2, 0.9),
             bold=True,
             size_hint=(None, None),
+            size=(400, 100),
             halign="left",
+            max_chars=24,
         )
-        self.potential_label.text_size = (400, None)
-        self.potential_label.pos = (160, self.height - 175)
+        self.potential_label.pos = (10, self.height - 175)
         self.bind(
             height=lambda *args: setattr(
-                self.potential_label, "pos", (160, self.height - 175)
+                self.potential_label, "pos", (10, self.height - 175)
             )
         )
         self.add_widget(self.potential_label)
 
-        reset_btn = self._create_styled_btn(
-            "RESET BALANCE", (0.7, 0.3, 0.3, 0.9), (400, 100)
+        reset_btn = self._create_game_button(
+            "RESET BALANCE", (0.7, 0.3, 0.3, 0.9), (400, 100), 15
         )
         reset_btn.pos = (30, 30)
         self.bind(size=lambda *args: setattr(reset_btn, "pos", (30, 30)))
         reset_btn.bind(on_press=self.reset_balance)
+        self.controls.register("reset", reset_btn)
         self.add_widget(reset_btn)
 
-        back_btn = self._create_styled_btn("BACK", (0.3, 0.4, 0.8, 0.9), (150, 120))
+        back_btn = self._create_game_button(
+            "BACK", (0.3, 0.4, 0.8, 0.9), (150, 120), 15
+        )
         back_btn.pos = (self.width - 165, self.height - 140)
         self.bind(
             size=lambda *args: setattr(
@@ -807,36 +2531,18 @@ class GameView(FloatLayout):
             )
         )
         back_btn.bind(on_press=self.go_back)
+        self.controls.register("navigation", back_btn)
         self.add_widget(back_btn)
 
-        self.create_controls()
-        self.create_history()
-
-    def _create_styled_btn(self, text, color, size):
-        btn = Button(
+    def _create_game_button(self, text, color, size, radius):
+        return RoundedButton(
             text=text,
+            bg_color=color,
+            radius=radius,
             size_hint=(None, None),
             size=size,
-            background_color=(0, 0, 0, 0),
-            bold=True,
             font_size="24sp",
         )
-        with btn.canvas.before:
-            Color(*color)
-            btn.bg_rect = RoundedRectangle(
-                pos=btn.pos,
-                size=btn.size,
-                radius=[
-                    15,
-                ],
-            )
-
-        def update_bg(instance, value):
-            btn.bg_rect.pos = instance.pos
-            btn.bg_rect.size = instance.size
-
-        btn.bind(pos=update_bg, size=update_bg)
-        return btn
 
     def create_controls(self):
         bet_label = Label(
@@ -862,128 +2568,93 @@ class GameView(FloatLayout):
             padding=[10, 20],
         )
         self.bet_input.pos = (310, 150)
-        self.bet_input.bind(text=lambda *args: self.update_button_states())
+        self.bet_input.bind(text=self._on_bet_text)
+        self.controls.register("bet_input", self.bet_input)
         self.add_widget(self.bet_input)
 
-        btn_increase = self._create_bet_button("+", (0.2, 0.7, 0.2, 0.9), (200, 100))
+        btn_increase = self._create_game_button(
+            "+", (0.2, 0.7, 0.2, 0.9), (200, 100), 12
+        )
         btn_increase.pos = (450, 150)
         btn_increase.bind(on_press=lambda x: self.adjust_bet(10))
+        self.controls.register("bet_adjust", btn_increase)
         self.add_widget(btn_increase)
 
-        btn_decrease = self._create_bet_button("-", (0.7, 0.2, 0.2, 0.9), (200, 100))
+        btn_decrease = self._create_game_button(
+            "-", (0.7, 0.2, 0.2, 0.9), (200, 100), 12
+        )
         btn_decrease.pos = (680, 150)
         btn_decrease.bind(on_press=lambda x: self.adjust_bet(-10))
+        self.controls.register("bet_adjust", btn_decrease)
         self.add_widget(btn_decrease)
 
         preset_positions = [0, 110, 220, 330]
         for i, preset in enumerate(Config.BET_PRESETS):
-            btn = self._create_bet_button(str(preset), (0.3, 0.4, 0.6, 0.9), (100, 100))
+            btn = self._create_game_button(
+                str(preset), (0.3, 0.4, 0.6, 0.9), (100, 100), 12
+            )
             btn.pos = (preset_positions[i] + 450, 30)
             btn.bind(on_press=lambda x, p=preset: self.set_bet(p))
+            self.controls.register("bet_adjust", btn)
             self.add_widget(btn)
 
-        self.place_bet_btn = self._create_action_button(
-            "PLACE BET", (0.1, 0.7, 0.2, 0.9), (350, 100)
+        self.place_bet_btn = self._create_game_button(
+            "PLACE BET", (0.1, 0.7, 0.2, 0.9), (350, 100), 15
         )
         self.place_bet_btn.pos = (900, 150)
         self.place_bet_btn.bind(on_press=self.place_bet)
+        self.controls.register("place_bet", self.place_bet_btn)
         self.add_widget(self.place_bet_btn)
 
-        self.cash_out_btn = self._create_action_button(
-            "CASH OUT", (0.8, 0.1, 0.1, 0.9), (350, 100)
+        self.cash_out_btn = self._create_game_button(
+            "CASH OUT", (0.8, 0.1, 0.1, 0.9), (350, 100), 15
         )
         self.cash_out_btn.pos = (900, 30)
-        self.cash_out_btn.disabled = True
         self.cash_out_btn.bind(on_press=self.cash_out)
+        self.controls.register("cash_out", self.cash_out_btn)
         self.add_widget(self.cash_out_btn)
 
-    def _create_bet_button(self, text, color, size):
-        btn = Button(
-            text=text,
-            size_hint=(None, None),
-            size=size,
-            background_color=(0, 0, 0, 0),
-            bold=True,
-            font_size="24sp",
-        )
-        with btn.canvas.before:
-            Color(*color)
-            btn.bg_rect = RoundedRectangle(
-                pos=btn.pos,
-                size=btn.size,
-                radius=[
-                    12,
-                ],
-            )
-
-        def update_bg(instance, value):
-            btn.bg_rect.pos = instance.pos
-            btn.bg_rect.size = instance.size
-
-        btn.bind(pos=update_bg, size=update_bg)
-        return btn
-
-    def _create_action_button(self, text, color, size):
-        btn = Button(
-            text=text,
-            size_hint=(None, None),
-            size=size,
-            background_color=(0, 0, 0, 0),
-            bold=True,
-            font_size="24sp",
-        )
-        with btn.canvas.before:
-            Color(*color)
-            btn.bg_rect = RoundedRectangle(
-                pos=btn.pos,
-                size=btn.size,
-                radius=[
-                    15,
-                ],
-            )
-
-        def update_bg(instance, value):
-            btn.bg_rect.pos = instance.pos
-            btn.bg_rect.size = instance.size
-
-        btn.bind(pos=update_bg, size=update_bg)
-        return btn
-
-    def update_button_states(self):
-        is_flying = self.state.state == GameState.FLYING
-
+    def _on_bet_text(self, instance, text: str):
         try:
-            bet_amount = int(self.bet_input.text)
-            valid_bet = (
-                bet_amount >= Config.MIN_BET and bet_amount <= self.state.balance
-            )
-        except:
-            valid_bet = False
-
-        can_bet = self.state.state == GameState.BETTING and valid_bet
-        no_balance = self.state.balance < Config.MIN_BET
-
-        self.place_bet_btn.disabled = not can_bet or is_flying
-        self.cash_out_btn.disabled = not is_flying
-        self.bet_input.disabled = is_flying or no_balance
+            amount = int(text)
+        except ValueError:
+            amount = 0
+        if self.sim is not None:
+            self.sim.submit("pending_bet", amount)
+        else:
+            self.state.set_pending_bet(amount)
+
+    def _on_state(self, state: GameState):
+        self.shown_state = state
+        self._sync_controls()
+
+    def _on_balance(self, balance: int):
+        self.shown_balance = balance
+        self.balance_label.text = f"Balance: ${balance:.2f}"
+        self._sync_controls()
+
+    def _on_bet_valid(self, valid: bool):
+        self.shown_bet_valid = valid
+        self._sync_controls()
+
+    def _sync_controls(self):
+        is_flying = self.shown_state == GameState.FLYING
+        valid_bet = self.shown_bet_valid
+        can_bet = self.shown_state == GameState.BETTING and valid_bet
+        no_balance = self.shown_balance < Config.MIN_BET
+
+        self.controls.set_disabled("place_bet", not can_bet)
+        self.controls.set_disabled("cash_out", not is_flying)
+        self.controls.set_disabled("bet_input", is_flying or no_balance)
+        self.controls.set_disabled("bet_adjust", is_flying or no_balance)
+        self.controls.set_disabled("navigation", is_flying or no_balance)
+        self.controls.set_disabled("reset", is_flying)
 
         if not valid_bet and not is_flying and not no_balance:
             self.bet_input.background_color = (1, 0.8, 0.8, 1)
         else:
             self.bet_input.background_color = (1, 1, 1, 1)
 
-        for child in self.children:
-            if isinstance(child, Button):
-                btn_text = child.text
-                if btn_text in ["+", "-"] or btn_text in [
-                    str(p) for p in Config.BET_PRESETS
-                ]:
-                    child.disabled = is_flying or no_balance
-                elif btn_text == "BACK":
-                    child.disabled = is_flying or no_balance
-                elif "RESET" in btn_text:
-                    child.disabled = is_flying
-
     def create_history(self):
         history_title = Label(
             text="History",
@@ -1012,6 +2683,18 @@ class GameView(FloatLayout):
         )
         history_container.add_widget(self.history_display)
 
+        self.history_slots: List[GlyphLabel] = [
+            GlyphLabel(
+                font_size="16sp",
+                bold=True,
+                color=(1, 0.6, 0.8, 1),
+                size_hint=(1, None),
+                height=45,
+                max_chars=8,
+            )
+            for _ in range(self.state.history.maxlen)
+        ]
+
         history_container.pos = (30, self.height - 660)
         self.bind(
             size=lambda *args: setattr(
@@ -1022,41 +2705,120 @@ class GameView(FloatLayout):
         self.add_widget(history_container)
 
     def update_game(self, dt: float):
-        if self.state.state == GameState.FLYING:
-            self.state.update_multiplier()
-            self.engine.update_plane_position()
-            self.plane_image.pos = (
-                self.engine.plane_x - dp(40),
-                self.engine.plane_y - dp(40),
-            )
-            self.plane_image.center = (self.engine.plane_x, self.engine.plane_y)
+        metrics = self.metrics
+        if metrics is not None:
+            metrics.frame_interval.observe(dt)
+            update_started = time.perf_counter()
+
+        profiler = self.profiler
+        timed = profiler.enabled
+        if timed:
+            frame_started = started = time.perf_counter()
+
+        if self.sim is not None:
+            self._render_snapshot()
+            if timed:
+                started = profiler.lap("snapshot", started)
+        else:
+            if self.state.state == GameState.FLYING:
+                self.state.update_multiplier()
+                if timed:
+                    started = profiler.lap("multiplier", started)
+
+                self.engine.update_plane_position()
+                self.plane_image.center = (self.engine.plane_x, self.engine.plane_y)
+                if timed:
+                    started = profiler.lap("plane", started)
+
+                self._show_multiplier(self.state.multiplier, self.state.current_bet)
+                if timed:
+                    started = profiler.lap("labels", started)
+
+                if self.state.check_crash():
+                    self.trigger_crash()
+                if timed:
+                    started = profiler.lap("crash", started)
+
+            self.particles.update(dt)
+            if timed:
+                started = profiler.lap("particles", started)
+
+        self._update_trail(dt)
+        if timed:
+            started = profiler.lap("trail", started)
+
+        self._update_curve(dt)
+        if timed:
+            started = profiler.lap("curve", started)
+
+        self.floating_texts.update(dt)
+        if timed:
+            profiler.lap("floating", started)
+            profiler.lap("frame", frame_started)
+
+        if self.quality is not None:
+            self.quality.observe(dt)
+
+        if metrics is not None:
+            metrics.update_time.observe(time.perf_counter() - update_started)
+
+    def _update_trail(self, dt: float):
+        if self.sim is not None:
+            snapshot = self.sim.snapshot
+            flying = snapshot.state == GameState.FLYING
+            x, y = snapshot.plane
+        else:
+            flying = self.state.state == GameState.FLYING
+            x, y = self.engine.plane_x, self.engine.plane_y
+        if flying:
+            self.trail.update(dt, x, y)
+        else:
+            self.trail.update(dt)
 
-            self.multiplier_label.text = f"{self.state.multiplier:.2f}x"
-            color = self.engine.get_multiplier_color()
+    def _update_curve(self, dt: float):
+        if self.sim is not None:
+            snapshot = self.sim.snapshot
+            flying = snapshot.state == GameState.FLYING
+            multiplier = snapshot.multiplier
+        else:
+            flying = self.state.state == GameState.FLYING
+            multiplier = self.state.multiplier
+        self.curve.update(dt, multiplier if flying else None)
+
+    def _show_multiplier(self, multiplier: float, bet: int):
+        # only format and re-layout when the displayed cents change
+        cents = round(multiplier * 100)
+        if cents != self._shown_multiplier_cents:
+            self._shown_multiplier_cents = cents
+            self.multiplier_label.text = f"{cents / 100:.2f}x"
+
+        # colors are constant tuples, so identity tracks the tier
+        color = self.engine.get_multiplier_color(multiplier)
+        if color is not self._shown_multiplier_color:
+            self._shown_multiplier_color = color
             self.multiplier_label.color = color
+            self.curve.set_color(color)
 
-            self.potential_label.text = (
-                f"Potential: ${self.state.current_bet * self.state.multiplier:.2f}"
-            )
+        potential_cents = round(bet * multiplier * 100)
+        if potential_cents != self._shown_potential_cents:
+            self._shown_potential_cents = potential_cents
+            self.potential_label.text = f"Potential: ${potential_cents / 100:.2f}"
 
-            if random.random() < 0.5:
-                self.particles.emit(
-                    self.engine.plane_x,
-                    self.engine.plane_y - 75,
-                    75,
-                    (1, 0.5, 0.2, 0.9),
-                    (0.6, 1.2),
-                    (6, 12),
-                    (-0.5, 0.5),
-                )
-
-            if self.state.check_crash():
-                self.trigger_crash()
-
-        self.particles.update(dt)
+    def _render_snapshot(self):
+        snapshot = self.sim.snapshot
+        if snapshot.tick == self._rendered_tick:
+            return
+        self._rendered_tick = snapshot.tick
+        # replay only the events this snapshot already reflects
+        self.sim.drain_events(snapshot.event_seq)
+        if snapshot.state == GameState.FLYING:
+            self.plane_image.center = snapshot.plane
+            self._show_multiplier(snapshot.multiplier, snapshot.current_bet)
+        self.particles.draw_rows(snapshot.particles)
+        self.particles.dropped = snapshot.dropped
 
     def adjust_bet(self, amount: int):
-        if self.state.state != GameState.BETTING:
+        if self.shown_state != GameState.BETTING:
             return
         try:
             current = int(self.bet_input.text)
@@ -1064,12 +2826,10 @@ class GameView(FloatLayout):
             self.bet_input.text = str(new_bet)
         except:
             self.bet_input.text = str(Config.MIN_BET)
-        self.update_button_states()
 
     def set_bet(self, amount: int):
-        if self.state.state == GameState.BETTING:
+        if self.shown_state == GameState.BETTING:
             self.bet_input.text = str(max(Config.MIN_BET, amount))
-        self.update_button_states()
 
     def place_bet(self, instance):
         try:
@@ -1078,170 +2838,649 @@ class GameView(FloatLayout):
             self.bet_input.text = str(Config.MIN_BET)
             return
 
+        if self.sim is not None:
+            # the simulation checks the bet against its own state
+            self.sim.submit("place_bet", amount, self.width, self.height)
+            return
+
         if not self.state.can_place_bet(amount):
             return
 
         self.state.place_bet(amount)
-        self.update_button_states()
-        self.assets.play_sound("bet")
-        self.balance_label.text = f"Balance: ${self.state.balance:.2f}"
+        self._show_bet(amount)
 
         self.engine.generate_flight_path(self.width, self.height)
         self.engine.reset_plane()
 
-        self.place_bet_btn.disabled = True
-        self.cash_out_btn.disabled = False
-        self.bet_input.disabled = True
-
         self.particles.emit(
-            self.engine.plane_x,
-            self.engine.plane_y - 60,
-            200,
-            (0.5, 0.5, 0.5, 0.5),
-            (1.2, 2.5),
-            (12, 24),
-            (-1.6, 0.8),
+            self.engine.plane_x, self.engine.plane_y - 60, *EFFECTS["launch"]
         )
 
-        Clock.schedule_once(lambda dt: setattr(self.state, "cooldown_bet", False), 0.5)
+        self.clear_bet_cooldown()
+
+    def _show_bet(self, amount: int):
+        # the plane is back at the start; no segment back to the last flight
+        self.trail.clear()
+        self.curve.clear()
+        self.assets.play_sound("bet")
+
+    def _clear_bet_cooldown(self, dt):
+        self.state.cooldown_bet = False
+
+    def _clear_cashout_cooldown(self, dt):
+        self.state.cooldown_cashout = False
 
     def cash_out(self, instance):
+        if self.sim is not None:
+            self.sim.submit("cash_out")
+            return
         if not self.state.can_cash_out():
             return
 
         winnings = self.state.cash_out()
-        self.assets.play_sound("cashout")
-        self.balance_label.text = f"Balance: ${self.state.balance:.2f}"
+        self._show_cash_out(winnings)
 
-        self.show_cash_out_success(winnings)
-        self.update_button_states()
-        self.update_history_display()
+        self.clear_cashout_cooldown()
+        self.reset_after_cash_out()
 
-        Clock.schedule_once(
-            lambda dt: setattr(self.state, "cooldown_cashout", False), 0.5
-        )
-        Clock.schedule_once(self.reset_game, 1.0)
+    def _show_cash_out(self, winnings: int):
+        self.assets.play_sound("cashout")
+        self.show_cash_out_success(winnings)
 
     def trigger_crash(self):
+        self._show_crash(self.state.multiplier)
+
+        self.explosion_pos = (self.engine.plane_x, self.engine.plane_y)
+        self.particles.emit(*self.explosion_pos, *EFFECTS["explosion"])
+        self.second_explosion()
+        self.reset_after_crash()
+
+    def _show_crash(self, multiplier: float):
         self.assets.play_sound("crash")
-        self.update_button_states()
-        self.crash_label.text = f"CRASHED AT {self.state.multiplier:.2f}x!"
+        self.crash_label.text = f"CRASHED AT {multiplier:.2f}x!"
         Animation(opacity=1, duration=1.0).start(self.crash_label)
-
-        explosion_x = self.engine.plane_x
-        explosion_y = self.engine.plane_y
-        self.particles.emit(
-            explosion_x,
-            explosion_y,
-            400,
-            (1, 0.3, 0.1, 0.8),
-            (0.8, 3.0),
-            (5, 23),
-            (-4, 4),
-        )
-        Clock.schedule_once(
-            lambda dt: self.particles.emit(
-                explosion_x,
-                explosion_y,
-                200,
-                (1, 0.4, 0.1, 0.7),
-                (0.5, 2.0),
-                (8, 18),
-                (-5, 5),
-            ),
-            0.1,
-        )
         Animation(opacity=0, duration=0.3).start(self.plane_image)
 
-        self.update_history_display()
-        Clock.schedule_once(self.reset_game, 1.5)
+    def _emit_second_explosion(self, dt):
+        self.particles.emit(*self.explosion_pos, *EFFECTS["explosion_secondary"])
 
     def show_cash_out_success(self, amount: int):
-        success_label = Label(
-            text=f"+${amount}",
-            font_size="36sp",
-            bold=True,
-            color=(0.2, 1, 0.2, 1),
-            size_hint=(None, None),
-            size=(150, 50),
-            opacity=0,
+        self.floating_texts.show(
+            f"+${amount}", self.plane_image.center_x, self.plane_image.center_y + 100
         )
-        success_label.center = (self.engine.plane_x, self.engine.plane_y + 100)
-        self.add_widget(success_label)
 
-        anim = (
-            Animation(opacity=1, duration=0.2)
-            + Animation(pos=(success_label.x, success_label.y + dp(100)), duration=0.8)
-            + Animation(opacity=0, duration=0.2)
-        )
-        anim.bind(on_complete=lambda *args: self.remove_widget(success_label))
-        anim.start(success_label)
-
-    def update_history_display(self):
-        self.history_display.clear_widgets()
-        history_list = list(self.state.history)
-        self.history_display.height = len(history_list) * 53
-        for result in history_list:
-            mult = result["multiplier"]
-
-            result_label = Label(
-                text=f"{mult:.2f}x",
-                font_size="16sp",
-                bold=True,
-                color=(1, 0.6, 0.8, 1),
-                size_hint=(1, None),
-                height=45,
-            )
-            self.history_display.add_widget(result_label)
+    def update_history_display(self, multipliers: Tuple[float, ...]):
+        self.history_display.height = len(multipliers) * 53
+        for i, slot in enumerate(self.history_slots):
+            if i < len(multipliers):
+                slot.text = f"{multipliers[i]:.2f}x"
+                if slot.parent is None:
+                    self.history_display.add_widget(slot)
+            elif slot.parent is not None:
+                self.history_display.remove_widget(slot)
 
     def reset_game(self, dt):
         self.state.reset_to_betting()
         self.engine.reset_plane()
+        self._show_reset(None)
+
+    def _show_reset(self, value):
         self.plane_image.pos = (Config.PLANE_START_X - 40, Config.PLANE_START_Y - 40)
         self.plane_image.center = (Config.PLANE_START_X, Config.PLANE_START_Y)
         self.plane_image.center = (Config.PLANE_START_X, Config.PLANE_START_Y)
         self.plane_image.opacity = 1
-
-        self.place_bet_btn.disabled = False
-        self.cash_out_btn.disabled = True
-        self.bet_input.disabled = False
+        self.curve.clear()
 
         self.multiplier_label.text = "1.00x"
         self.multiplier_label.color = (1, 1, 1, 0.9)
+        self._shown_multiplier_cents = 100
+        self._shown_multiplier_color = None
         Animation(opacity=0, duration=0.5).start(self.crash_label)
         self.potential_label.text = "Potential: $0.00"
-        self.update_button_states()
+        self._shown_potential_cents = 0
 
     def reset_balance(self, instance):
+        if self.sim is not None:
+            self.sim.submit("reset_balance")
+            return
         if self.state.state == GameState.BETTING:
             self.state.reset_balance()
-            self.balance_label.text = f"Balance: ${self.state.balance:.2f}"
-            self.update_button_states()
-            self.update_history_display()
 
     def go_back(self, instance):
-        if self.state.state == GameState.BETTING:
+        if self.shown_state == GameState.BETTING:
             self.parent.manager.transition = SlideTransition(direction="right")
             self.parent.manager.current = "start"
 
 
+class LazyScreenManager(ScreenManager):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.factories: Dict[str, Callable[[], Screen]] = {}
+        self.building: Dict[str, Tuple[Screen, Iterator[str]]] = {}
+
+    def register(self, name: str, factory: Callable[[], Screen]):
+        self.factories[name] = factory
+
+    def _start(self, name: str):
+        factory = self.factories.pop(name, None)
+        if factory is not None:
+            screen = factory()
+            steps = getattr(screen, "build_steps", None)
+            self.building[name] = (screen, steps() if steps else iter(()))
+
+    def _finish(self, name: str):
+        entry = self.building.pop(name, None)
+        if entry is not None:
+            screen, steps = entry
+            for _ in steps:
+                pass
+            self.add_widget(screen)
+
+    # builds a screen one step per next(), so the caller can spread it over
+    # frames. navigating to the screen first finishes it on the spot
+    def build_steps(self, name: str) -> Iterator[str]:
+        self._start(name)
+        entry = self.building.get(name)
+        if entry is None:
+            return
+        yield "create"
+        yield from entry[1]
+        self._finish(name)
+
+    def ensure_screen(self, name: str) -> Screen:
+        self._start(name)
+        self._finish(name)
+        return super().get_screen(name)
+
+    def get_screen(self, name: str) -> Screen:
+        return self.ensure_screen(name)
+
+
+class StartupTrace:
+    def __init__(self, budget_ms: float = Config.STARTUP_BUDGET_MS):
+        self.budget_ms = budget_ms
+        self.marks: Dict[str, float] = {
+            "import_started": IMPORT_STARTED,
+            "import_finished": IMPORT_FINISHED,
+        }
+        self.prewarm_steps: Dict[str, float] = {}
+
+    def mark(self, name: str):
+        self.marks[name] = time.perf_counter()
+
+    def record_step(self, name: str, seconds: float):
+        self.prewarm_steps[name] = round(seconds * 1000, 2)
+
+    def _span_ms(self, start: str, end: str) -> Optional[float]:
+        if start in self.marks and end in self.marks:
+            return round((self.marks[end] - self.marks[start]) * 1000, 2)
+        return None
+
+    def report(self) -> Dict:
+        interactive_ms = self._span_ms("import_started", "first_frame")
+        return {
+            "import_ms": self._span_ms("import_started", "import_finished"),
+            "build_ms": self._span_ms("build_started", "build_finished"),
+            "first_frame_ms": self._span_ms("build_finished", "first_frame"),
+            "time_to_interactive_ms": interactive_ms,
+            "prewarm_ms": self._span_ms("prewarm_started", "prewarm_finished"),
+            # work per frame; the longest step is the longest the menu stalls
+            "prewarm_steps_ms": self.prewarm_steps,
+            "prewarm_work_ms": round(sum(self.prewarm_steps.values()), 2),
+            "prewarm_max_step_ms": max(self.prewarm_steps.values(), default=0.0),
+            "budget_ms": self.budget_ms,
+            "over_budget": interactive_ms is not None
+            and interactive_ms > self.budget_ms,
+        }
+
+
+def peak_rss_kb() -> Optional[int]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # linux reports kilobytes, macos bytes
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+# plays a fixed script through the real GameView and screen manager, with
+# crash points forced after each bet so every run does the same work
+class StressDirector:
+    def __init__(self, app: "shiiiuuuu", report_path: str):
+        self.app = app
+        self.report_path = report_path
+        self.frame_times = StageHistogram()
+        self.frame_budget = 1.5 / Config.TARGET_FPS
+        self.dropped_frames = 0
+        self.last_flip: Optional[float] = None
+        self.counts = {"rounds": 0, "cash_outs": 0, "crashes": 0, "transitions": 0}
+        self.peak_particles = 0
+        self.error: Optional[str] = None
+        self.view: Optional[GameView] = None
+        self.script: Optional[Iterator[Callable[[], bool]]] = None
+        self.waiting: Optional[Callable[[], bool]] = None
+        self.step_started = 0.0
+        self.started = 0.0
+        self.tick_event = None
+
+    def start(self):
+        self.view = self.app.root.get_screen("game").game_view
+        self.particles_dropped = self.view.particles.dropped
+        self.script = self.run_script()
+        self.started = self.step_started = time.perf_counter()
+        Window.bind(on_flip=self._on_flip)
+        self.tick_event = Clock.schedule_interval(self._tick, 0)
+
+    def run_script(self) -> Iterator[Callable[[], bool]]:
+        yield from self.navigate("game")
+        # rapid bets, cashed out as soon as the cooldown allows
+        for _ in range(10):
+            yield from self.play_round(Config.MIN_BET, 5.0, cash_out_at=1.02)
+        # long flights keep the trail ribbon full
+        for crash_point in (2.0, 3.0):
+            yield from self.play_round(50, crash_point)
+        # back-to-back crashes at full particle load
+        for _ in range(6):
+            yield from self.play_round(Config.MIN_BET, 1.25)
+        for name in ("start", "stats", "start", "credits", "start", "game"):
+            yield from self.navigate(name)
+        # mixed results churn the history column
+        for index in range(8):
+            cash_out_at = 1.3 if index % 2 else None
+            yield from self.play_round(100, 1.6, cash_out_at=cash_out_at)
+
+    def navigate(self, name: str) -> Iterator[Callable[[], bool]]:
+        manager = self.app.root
+        screen = manager.get_screen(name)
+        if name == "stats":
+            screen.update_stats()
+        manager.transition = SlideTransition(direction="left")
+        manager.current = name
+        self.counts["transitions"] += 1
+        yield lambda: not manager.transition.is_active
+
+    def play_round(
+        self, bet: int, crash_point: float, cash_out_at: Optional[float] = None
+    ) -> Iterator[Callable[[], bool]]:
+        view, state = self.view, self.view.state
+        yield lambda: state.state == GameState.BETTING and not state.cooldown_bet
+        view.bet_input.text = str(bet)
+        if view.sim is None:
+            view.place_bet(None)
+            state.crash_point = crash_point
+        else:
+            view.sim.submit("place_bet", bet, view.width, view.height, crash_point)
+            yield lambda: state.state != GameState.BETTING
+        self.counts["rounds"] += 1
+
+        if cash_out_at is not None:
+            yield lambda: state.state != GameState.FLYING or (
+                state.multiplier >= cash_out_at and state.can_cash_out()
+            )
+            if state.state == GameState.FLYING:
+                view.cash_out(None)
+                self.counts["cash_outs"] += 1
+        yield lambda: state.state != GameState.FLYING
+        if state.state == GameState.CRASHED:
+            self.counts["crashes"] += 1
+
+    def _on_flip(self, *args):
+        now = time.perf_counter()
+        if self.last_flip is not None:
+            interval = now - self.last_flip
+            self.frame_times.record(interval)
+            if interval > self.frame_budget:
+                self.dropped_frames += 1
+        self.last_flip = now
+
+    def _tick(self, dt: float):
+        self.peak_particles = max(self.peak_particles, self.view.particles.active_count)
+        now = time.perf_counter()
+        if self.waiting is not None and not self.waiting():
+            if now - self.step_started > Config.STRESS_STEP_TIMEOUT:
+                self.error = "script step timed out"
+                self.finish()
+            return
+        try:
+            self.waiting = next(self.script)
+            self.step_started = now
+        except StopIteration:
+            self.finish()
+
+    def report(self) -> Dict:
+        frames = self.frame_times.count
+        return {
+            "completed": self.error is None,
+            "error": self.error,
+            "duration_s": round(time.perf_counter() - self.started, 2),
+            "frames": frames,
+            "frame_ms": self.frame_times.summary(),
+            "frame_budget_ms": self.frame_budget * 1000,
+            "dropped_frames": self.dropped_frames,
+            "dropped_ratio": self.dropped_frames / frames if frames else 0.0,
+            "peak_particles": self.peak_particles,
+            "particles_dropped": self.view.particles.dropped - self.particles_dropped,
+            "peak_rss_kb": peak_rss_kb(),
+            "gc": self.app.gc_policy.summary(),
+            "quality": self.app.quality.summary(),
+            "sound_latency": self.view.assets.latency_stats(),
+            **self.counts,
+        }
+
+    def finish(self):
+        self.tick_event.cancel()
+        Window.unbind(on_flip=self._on_flip)
+        report = self.report()
+        with open(self.report_path, "w") as f:
+            json.dump(report, f, indent=2)
+        Logger.info(
+            "Stress: %s frames, p99 %.2fms, %s dropped, peak rss %skB",
+            report["frames"],
+            report["frame_ms"]["p99_ms"],
+            report["dropped_frames"],
+            report["peak_rss_kb"],
+        )
+        self.app.exit_code = 0 if report["completed"] else 1
+        self.app.stop()
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Shiiiuuuu crash game")
+    parser.add_argument(
+        "--startup-trace",
+        metavar="PATH",
+        help="write startup timings as json to PATH and exit once warmed up",
+    )
+    parser.add_argument(
+        "--startup-budget",
+        type=float,
+        default=Config.STARTUP_BUDGET_MS,
+        metavar="MS",
+        help="time-to-interactive budget checked by --startup-trace",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="time every frame stage from launch and show the overlay (F3)",
+    )
+    parser.add_argument(
+        "--profile-dump",
+        default=Config.PROFILE_FILE,
+        metavar="PATH",
+        help="where F4 and exit with --profile write stage percentiles",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        metavar="PORT",
+        help="serve prometheus metrics on 127.0.0.1:PORT/metrics",
+    )
+    parser.add_argument(
+        "--metrics-textfile",
+        metavar="PATH",
+        help="periodically write prometheus metrics to PATH",
+    )
+    parser.add_argument(
+        "--metrics-interval",
+        type=float,
+        default=Config.METRICS_INTERVAL,
+        metavar="SECONDS",
+        help="how often --metrics-textfile is rewritten",
+    )
+    parser.add_argument(
+        "--gc-mode",
+        choices=GcPolicy.MODES,
+        default="default",
+        help="freeze or tune the garbage collector during flights",
+    )
+    parser.add_argument(
+        "--quality",
+        choices=QualityController.MODES,
+        default="auto",
+        help="pin a quality tier instead of adapting to frame time",
+    )
+    parser.add_argument(
+        "--sim-thread",
+        action="store_true",
+        help="run game logic and particle physics on a separate thread (numpy)",
+    )
+    parser.add_argument(
+        "--async",
+        dest="async_loop",
+        action="store_true",
+        help="run under kivy's asyncio runner and host background services",
+    )
+    parser.add_argument(
+        "--stall-budget",
+        type=float,
+        default=Config.STALL_BUDGET_MS,
+        metavar="MS",
+        help="with --async, report tasks that hold the loop longer than this",
+    )
+    parser.add_argument(
+        "--stress",
+        action="store_true",
+        help="play a scripted stress session, write a report and exit",
+    )
+    parser.add_argument(
+        "--stress-report",
+        default=Config.STRESS_REPORT_FILE,
+        metavar="PATH",
+        help="where --stress writes its json report",
+    )
+    return parser.parse_args(argv)
+
+
 class shiiiuuuu(App):
+    def __init__(self, options: Optional[argparse.Namespace] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.options = options or parse_args([])
+        self.trace = StartupTrace(self.options.startup_budget)
+        self.prewarm: Optional[Iterator[str]] = None
+        self.profiler = FrameProfiler(enabled=self.options.profile)
+        self.profiler_overlay: Optional[ProfilerOverlay] = None
+        self.metrics: Optional[GameMetrics] = None
+        self.metrics_exporter: Optional[MetricsExporter] = None
+        self.gc_policy = GcPolicy(self.options.gc_mode)
+        self.quality = QualityController(self.options.quality)
+        self.services: Optional[ServiceHost] = None
+        self.stats_writer: Optional[AsyncStatsWriter] = None
+        self.watchdog: Optional[StallWatchdog] = None
+        if self.options.sim_thread and np is None:
+            Logger.warning("Simulation: numpy is not installed, using the main thread")
+            self.options.sim_thread = False
+        self.stress: Optional[StressDirector] = None
+        if self.options.stress:
+            # scripted rounds must not touch the player's stats
+            stress_dir = tempfile.mkdtemp(prefix="shiiiuuuu-stress-")
+            Config.STATS_FILE = os.path.join(stress_dir, "stats.json")
+            Config.HISTORY_FILE = os.path.join(stress_dir, "history.log")
+            self.stress = StressDirector(self, self.options.stress_report)
+        self.exit_code = 0
+        self.stopped = False
+
     def build(self):
+        self.trace.mark("build_started")
         self.title = "Shiiiuuuu"
-        sm = ScreenManager(transition=FadeTransition())
+        # stress rounds bet far more than a player's starting balance
+        self.state_manager = StateManager(
+            Config.STRESS_BALANCE if self.stress is not None else Config.INITIAL_BALANCE
+        )
+        # with the simulation thread, app-level listeners hear the state
+        # manager's events when the ui replays them, not on the sim thread
+        self.relay = EventRelay() if self.options.sim_thread else None
+        self.gc_policy.watch_state(self.relay or self.state_manager)
+        if self.options.async_loop:
+            self.start_services()
+        self.start_metrics()
+        sm = LazyScreenManager(transition=FadeTransition())
+
+        sm.register(
+            "game",
+            lambda: GameScreen(
+                deferred=True,
+                state_manager=self.state_manager,
+                profiler=self.profiler,
+                metrics=self.metrics,
+                quality=self.quality,
+                sim_thread=self.options.sim_thread,
+                services=self.services,
+                relay=self.relay,
+                name="game",
+            ),
+        )
+        sm.register("stats", lambda: StatsScreen(self.state_manager, name="stats"))
+        sm.register("credits", lambda: CreditsScreen(name="credits"))
+        sm.add_widget(StartScreen(name="start"))
+
+        Window.bind(on_flip=self._on_first_flip, on_key_down=self._on_key_down)
+        if self.options.profile:
+            self.toggle_profiler_overlay()
+        self.trace.mark("build_finished")
+        return sm
 
-        start_screen = StartScreen(name="start")
-        game_screen = GameScreen(name="game")
-        stats_screen = StatsScreen(game_screen.state_manager, name="stats")
-        credits_screen = CreditsScreen(name="credits")
+    def _on_key_down(self, window, key, scancode, codepoint, modifiers):
+        if key == KEY_F3:
+            self.toggle_profiler_overlay()
+            return True
+        if key == KEY_F4:
+            self.profiler.dump(self.options.profile_dump)
+            Logger.info("Profiler: wrote %s", self.options.profile_dump)
+            return True
+        return False
 
-        sm.add_widget(start_screen)
-        sm.add_widget(game_screen)
-        sm.add_widget(stats_screen)
-        sm.add_widget(credits_screen)
+    def toggle_profiler_overlay(self):
+        if self.profiler_overlay is None:
+            self.profiler_overlay = ProfilerOverlay(self.profiler)
+        if self.profiler_overlay.parent is None:
+            self.profiler.enabled = True
+            self.profiler_overlay.show()
+        else:
+            self.profiler_overlay.hide()
+            self.profiler.enabled = self.options.profile
+
+    def start_services(self):
+        self.services = ServiceHost()
+        self.services.start()
+        self.stats_writer = AsyncStatsWriter(self.services, self.state_manager)
+        self.watchdog = StallWatchdog(self.services, self.options.stall_budget)
+
+    def stop_services(self):
+        # detach the writer before the loop goes away, so a later save
+        # writes the files itself instead of scheduling onto a closed loop
+        self.state_manager.stats_writer = None
+        self.watchdog.stop()
+        self.services.stop()
+        self.stats_writer.flush()
+        watchdog = self.watchdog.summary()
+        Logger.info(
+            "Services: %s stats writes for %s saves, %s loop stalls over %.1fms"
+            " (max %.1fms)",
+            self.stats_writer.writes,
+            self.stats_writer.requests,
+            watchdog["stalls"],
+            watchdog["budget_ms"],
+            watchdog["max_stall_ms"],
+        )
 
-        return sm
+    def start_metrics(self):
+        options = self.options
+        if options.metrics_port is None and not options.metrics_textfile:
+            return
+        self.metrics = GameMetrics()
+        self.metrics.watch_state(self.state_manager, self.relay)
+        self.metrics.add_gauge(
+            "shiiiuuuu_quality_tier",
+            "Current quality tier, 0 is the highest.",
+            lambda: self.quality.index,
+        )
+        self.metrics_exporter = MetricsExporter(self.metrics)
+        if options.metrics_port is not None:
+            self.metrics_exporter.serve(options.metrics_port)
+        if options.metrics_textfile:
+            self.metrics_exporter.write_textfile(
+                options.metrics_textfile, options.metrics_interval
+            )
+
+    def on_stop(self):
+        # App.stop() dispatches on_stop and run()/async_run() dispatch it
+        # again once the event loop returns, so the second call is a no-op
+        if self.stopped:
+            return
+        self.stopped = True
+        if self.root is not None and self.root.has_screen("game"):
+            sim = self.root.get_screen("game").sim
+            if sim is not None:
+                sim.stop()
+                Logger.info(
+                    "Simulation: p99 tick %.2fms, %s overruns",
+                    sim.tick_time.percentile(0.99) * 1000,
+                    sim.overruns,
+                )
+        if self.options.profile:
+            self.profiler.dump(self.options.profile_dump)
+        if self.metrics_exporter is not None:
+            self.metrics_exporter.stop(self.options.metrics_textfile)
+        gc_summary = self.gc_policy.summary()
+        Logger.info(
+            "GC: mode %s, %s collections, p99 pause %.2fms, max %.2fms",
+            gc_summary["mode"],
+            gc_summary["collections"],
+            gc_summary["pauses"]["p99_ms"],
+            gc_summary["pauses"]["max_ms"],
+        )
+        self.gc_policy.close()
+        if self.services is not None:
+            self.stop_services()
+
+    def _on_first_flip(self, *args):
+        Window.unbind(on_flip=self._on_first_flip)
+        self.trace.mark("first_frame")
+        # build the game screen over the next frames, once the menu is visible
+        self.trace.mark("prewarm_started")
+        self.prewarm = self.root.build_steps("game")
+        Clock.schedule_once(self._prewarm_step, 0)
+
+    def _prewarm_step(self, dt):
+        started = time.perf_counter()
+        step = next(self.prewarm, None)
+        if step is not None:
+            self.trace.record_step(step, time.perf_counter() - started)
+            Clock.schedule_once(self._prewarm_step, 0)
+            return
+        self.trace.mark("prewarm_finished")
+        self._report_startup()
+        if self.stress is not None:
+            self.stress.start()
+
+    def _report_startup(self):
+        report = self.trace.report()
+        Logger.info(
+            "Startup: interactive in %sms (import %sms, build %sms),"
+            " prewarm %sms over %s frames, longest step %sms",
+            report["time_to_interactive_ms"],
+            report["import_ms"],
+            report["build_ms"],
+            report["prewarm_work_ms"],
+            len(report["prewarm_steps_ms"]),
+            report["prewarm_max_step_ms"],
+        )
+        if report["over_budget"]:
+            Logger.warning(
+                "Startup: time to interactive exceeded the %sms budget",
+                report["budget_ms"],
+            )
+
+        if self.options.startup_trace:
+            with open(self.options.startup_trace, "w") as f:
+                json.dump(report, f, indent=2)
+            self.exit_code = 1 if report["over_budget"] else 0
+            self.stop()
 
 
 if __name__ == "__main__":
-    shiiiuuuu().run()
+    app = shiiiuuuu(parse_args())
+    if app.options.async_loop:
+        asyncio.run(app.async_run(async_lib="asyncio"))
+    else:
+        app.run()
+    sys.exit(app.exit_code)
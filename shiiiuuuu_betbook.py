@@ -0,0 +1,98 @@
+from typing import Dict, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+
+class Settlement(NamedTuple):
+    wagered: int
+    paid: int
+    seats: int
+    manual: int
+    auto_player_ids: np.ndarray
+    auto_multipliers: np.ndarray
+    auto_payouts: np.ndarray
+    losers: int
+
+
+# every seat of a shared round in parallel arrays. manual cash-outs find
+# their seat through a dict and are paid on the spot; everything still
+# riding at the crash is settled in one vectorized pass, auto targets
+# below the crash point winning at their target and the rest losing
+class BetBook:
+    def __init__(self, capacity: int = 1024):
+        self.player_ids = np.zeros(capacity, dtype=np.int64)
+        self.amounts = np.zeros(capacity, dtype=np.int64)
+        self.targets = np.zeros(capacity)
+        self.cashed = np.zeros(capacity)
+        self.count = 0
+        self.manual = 0
+        self.seats: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __contains__(self, player_id: int) -> bool:
+        return player_id in self.seats
+
+    def clear(self):
+        self.count = 0
+        self.manual = 0
+        self.seats.clear()
+
+    def _grow(self):
+        capacity = len(self.amounts) * 2
+        for name in ("player_ids", "amounts", "targets", "cashed"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[: self.count] = old[: self.count]
+            setattr(self, name, new)
+
+    def place(self, player_id: int, amount: int, target: float = 0.0) -> int:
+        if self.count == len(self.amounts):
+            self._grow()
+        seat = self.count
+        self.player_ids[seat] = player_id
+        self.amounts[seat] = amount
+        # a target of 0 means the seat only cashes out manually
+        self.targets[seat] = target
+        self.cashed[seat] = 0.0
+        self.seats[player_id] = seat
+        self.count += 1
+        return seat
+
+    def cash_out(
+        self, player_id: int, multiplier: float
+    ) -> Optional[Tuple[float, int]]:
+        seat = self.seats.get(player_id)
+        if seat is None or self.cashed[seat]:
+            return None
+        # an auto target already passed pays at the target, not later
+        target = self.targets[seat]
+        if 0 < target <= multiplier:
+            multiplier = float(target)
+        self.cashed[seat] = multiplier
+        self.manual += 1
+        return multiplier, int(self.amounts[seat] * multiplier)
+
+    def settle(self, crash_point: float) -> Settlement:
+        n = self.count
+        amounts = self.amounts[:n]
+        targets = self.targets[:n]
+        cashed = self.cashed[:n]
+
+        riding = cashed == 0
+        auto = riding & (targets > 0) & (targets < crash_point)
+        cashed[auto] = targets[auto]
+        payouts = np.floor(amounts * cashed).astype(np.int64)
+        auto_payouts = payouts[auto]
+
+        return Settlement(
+            wagered=int(amounts.sum()),
+            paid=int(payouts.sum()),
+            seats=n,
+            manual=self.manual,
+            auto_player_ids=self.player_ids[:n][auto],
+            auto_multipliers=targets[auto],
+            auto_payouts=auto_payouts,
+            losers=int(np.count_nonzero(cashed == 0)),
+        )
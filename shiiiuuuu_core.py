@@ -0,0 +1,334 @@
+import random
+import hashlib
+import time
+import math
+import json
+import os
+from enum import Enum
+from collections import deque
+from typing import List, Tuple, Optional, Dict, Callable
+
+# game rules and round state with no kivy or numpy imports, shared by the
+# app, the round server and the terminal frontend
+
+
+class GameState(Enum):
+    MENU = "menu"
+    BETTING = "betting"
+    FLYING = "flying"
+    CRASHED = "crashed"
+    RESULT = "result"
+
+
+class Config:
+    INITIAL_BALANCE = 100
+    MIN_BET = 10
+    BET_PRESETS = [10, 50, 100, 500]
+    MAX_PARTICLES = 800
+    TARGET_FPS = 60
+    CRASH_MAX_RANGE = 15.0
+    CRASH_SKEW = 2.5
+    SPECIAL_CHANCE = 0.01
+    SPECIAL_MIN = 10.0
+    SPECIAL_MAX = 50.0
+    GROWTH_FACTOR = 0.05
+    GROWTH_EXPONENT = 1.3
+    FLIGHT_SAMPLES = 400
+    PLANE_START_X = 1150
+    PLANE_START_Y = 330
+    STATS_FILE = "shiiiuuuu_stats.json"
+    STARTUP_BUDGET_MS = 1500
+    PROFILE_FILE = "shiiiuuuu_profile.json"
+    METRICS_INTERVAL = 15.0
+    GC_FLIGHT_THRESHOLD = 50000
+    STRESS_REPORT_FILE = "shiiiuuuu_stress.json"
+    STRESS_BALANCE = 1000000
+    STRESS_STEP_TIMEOUT = 60.0
+    STALL_BUDGET_MS = 1000 / 60
+    SERVER_PORT = 7777
+    SERVER_BETTING_WINDOW = 5.0
+    SERVER_RESULT_PAUSE = 3.0
+    SERVER_MAX_WRITE_BUFFER = 64 * 1024
+    HISTORY_FILE = "shiiiuuuu_history.log"
+    OPTIMIZER_MIN_ROUNDS = 20
+    # a target must have survived this many rounds to be reported as best
+    OPTIMIZER_MIN_HITS = 10
+
+
+def generate_crash_point(
+    rng: Optional[random.Random] = None, config: type = Config
+) -> float:
+    if rng is None:
+        seed = hashlib.sha256(str(time.time() + random.random()).encode()).hexdigest()
+        random.seed(seed)
+        rng = random
+    raw = rng.random()
+    crash_point = 1.0 + (raw**config.CRASH_SKEW) * config.CRASH_MAX_RANGE
+    if rng.random() < config.SPECIAL_CHANCE:
+        crash_point = rng.uniform(config.SPECIAL_MIN, config.SPECIAL_MAX)
+    return crash_point
+
+
+def multiplier_at(elapsed: float, config: type = Config) -> float:
+    return 1.0 + config.GROWTH_FACTOR * (elapsed**config.GROWTH_EXPONENT)
+
+
+# inverse of multiplier_at: seconds after the start when the round crashes
+def crash_time(crash_point: float, config: type = Config) -> float:
+    return ((crash_point - 1.0) / config.GROWTH_FACTOR) ** (
+        1.0 / config.GROWTH_EXPONENT
+    )
+
+
+def write_stats_file(path: str, stats: Dict) -> float:
+    started = time.perf_counter()
+    try:
+        with open(path, "w") as f:
+            json.dump(stats, f)
+    except:
+        pass
+    return time.perf_counter() - started
+
+
+# one crash point per line, appended as rounds finish
+def append_crash_history(path: str, crash_points: List[float]):
+    if not crash_points:
+        return
+    try:
+        with open(path, "a") as f:
+            f.write("".join(f"{point:.4f}\n" for point in crash_points))
+    except OSError:
+        pass
+
+
+def load_crash_history(path: str) -> List[float]:
+    return read_crash_history(path)[0]
+
+
+# the points appended after byte `offset`, and the offset to read from next
+# time. a line still being written is left for the next read
+def read_crash_history(path: str, offset: int = 0) -> Tuple[List[float], int]:
+    points = []
+    try:
+        with open(path, "rb") as f:
+            f.seek(offset)
+            data = f.read()
+    except OSError:
+        return points, offset
+    end = data.rfind(b"\n") + 1
+    for line in data[:end].splitlines():
+        try:
+            points.append(float(line))
+        except ValueError:
+            continue
+    return points, offset + end
+
+
+class StateManager:
+    def __init__(self, initial_balance: int = Config.INITIAL_BALANCE):
+        self.state = GameState.BETTING
+        # what the balance starts at and what reset_balance() restores
+        self.initial_balance = initial_balance
+        self.balance = initial_balance
+        self.pending_bet = 0
+        self.bet_valid = False
+        self.current_bet = 0
+        self.multiplier = 1.0
+        self.crash_point = 0.0
+        self.start_time = 0.0
+        self.history: deque = deque(maxlen=5)
+        self.stats = self._load_stats()
+        self.cooldown_bet = False
+        self.cooldown_cashout = False
+        # crash points of finished rounds not yet appended to HISTORY_FILE
+        self.unrecorded: List[float] = []
+        # when set, save_stats hands a copy of the stats and the unrecorded
+        # crash points to this callable instead of writing the files itself
+        self.stats_writer: Optional[Callable[[Dict, List[float]], None]] = None
+        self.listeners: Dict[str, List[Callable]] = {
+            "state": [],
+            "balance": [],
+            "bet_valid": [],
+            "history": [],
+            "stats_saved": [],
+        }
+
+    def bind(self, event: str, callback: Callable):
+        self.listeners[event].append(callback)
+
+    def _emit(self, event: str, value):
+        for callback in self.listeners[event]:
+            callback(value)
+
+    def _set_state(self, state: GameState):
+        if state != self.state:
+            self.state = state
+            self._emit("state", state)
+
+    def _set_balance(self, balance: int):
+        if balance != self.balance:
+            self.balance = balance
+            self._emit("balance", balance)
+            self._update_bet_valid()
+
+    def _update_bet_valid(self):
+        valid = Config.MIN_BET <= self.pending_bet <= self.balance
+        if valid != self.bet_valid:
+            self.bet_valid = valid
+            self._emit("bet_valid", valid)
+
+    def _push_history(self, multiplier: float, success: bool):
+        self.history.append({"multiplier": multiplier, "success": success})
+        self._emit_history()
+
+    def _emit_history(self):
+        # listeners get the multipliers oldest first, not the live deque
+        self._emit("history", tuple(entry["multiplier"] for entry in self.history))
+
+    def set_pending_bet(self, amount: int):
+        self.pending_bet = amount
+        self._update_bet_valid()
+
+    def _load_stats(self) -> Dict:
+        default_stats = {
+            "total_games": 0,
+            "wins": 0,
+            "losses": 0,
+            "highest_multiplier": 1.0,
+            "biggest_win": 0,
+        }
+        if os.path.exists(Config.STATS_FILE):
+            try:
+                with open(Config.STATS_FILE, "r") as f:
+                    return json.load(f)
+            except:
+                return default_stats
+        return default_stats
+
+    def save_stats(self):
+        rounds, self.unrecorded = self.unrecorded, []
+        if self.stats_writer is not None:
+            self.stats_writer(dict(self.stats), rounds)
+            return
+        append_crash_history(Config.HISTORY_FILE, rounds)
+        self._emit("stats_saved", write_stats_file(Config.STATS_FILE, self.stats))
+
+    def reset_balance(self):
+        self.history.clear()
+        self._emit_history()
+        self._set_balance(self.initial_balance)
+
+    def can_place_bet(self, amount: int) -> bool:
+        return (
+            self.state == GameState.BETTING
+            and not self.cooldown_bet
+            and amount >= Config.MIN_BET
+            and amount <= self.balance
+        )
+
+    def place_bet(self, amount: int):
+        self.current_bet = amount
+        self.multiplier = 1.0
+        self.start_time = time.time()
+        self.stats["total_games"] += 1
+        self.generate_crash_point()
+        self.cooldown_bet = True
+        self._set_balance(self.balance - amount)
+        self._set_state(GameState.FLYING)
+
+    def generate_crash_point(self):
+        self.crash_point = generate_crash_point()
+
+    def update_multiplier(self):
+        if self.state != GameState.FLYING:
+            return
+        self.multiplier = multiplier_at(time.time() - self.start_time)
+
+    def check_crash(self) -> bool:
+        if self.state == GameState.FLYING and self.multiplier >= self.crash_point:
+            self.stats["losses"] += 1
+            self._push_history(self.multiplier, False)
+            self.unrecorded.append(self.crash_point)
+            self.save_stats()
+            self._set_state(GameState.CRASHED)
+            return True
+        return False
+
+    def can_cash_out(self) -> bool:
+        return self.state == GameState.FLYING and not self.cooldown_cashout
+
+    def cash_out(self) -> int:
+        winnings = int(self.current_bet * self.multiplier)
+        profit = winnings - self.current_bet
+        self.stats["wins"] += 1
+        self.stats["highest_multiplier"] = max(
+            self.stats["highest_multiplier"], self.multiplier
+        )
+        self.stats["biggest_win"] = max(self.stats["biggest_win"], profit)
+        self._push_history(self.multiplier, True)
+        # the round's crash point was drawn either way; cashing out early
+        # does not change it
+        self.unrecorded.append(self.crash_point)
+        self.cooldown_cashout = True
+        self.save_stats()
+        self._set_balance(self.balance + winnings)
+        self._set_state(GameState.RESULT)
+        return winnings
+
+    def reset_to_betting(self):
+        self.multiplier = 1.0
+        self.current_bet = 0
+        self._set_state(GameState.BETTING)
+
+
+class GameEngine:
+    def __init__(self, state_manager: StateManager, assets=None):
+        self.state = state_manager
+        self.assets = assets
+        self.flight_path: List[Tuple[float, float]] = []
+        self.current_path_index = 0
+        self.plane_x = Config.PLANE_START_X
+        self.plane_y = Config.PLANE_START_Y
+        self.plane_angle = 0.0
+
+    def generate_flight_path(self, width: float, height: float):
+        self.flight_path = []
+        for i in range(Config.FLIGHT_SAMPLES):
+            t = i / Config.FLIGHT_SAMPLES
+            x = Config.PLANE_START_X + t * -475
+
+            if t < 0.15:
+                y = Config.PLANE_START_Y + t * 2000
+            else:
+                base_y = Config.PLANE_START_Y + 300 + (t - 0.15) * 225
+                y = base_y + 75 * math.sin((t - 0.15) * 15)
+
+            self.flight_path.append((x, y))
+        self.current_path_index = 0
+
+    def update_plane_position(self):
+        if self.state.state != GameState.FLYING:
+            return
+
+        if self.current_path_index < len(self.flight_path):
+            self.current_path_index = min(
+                len(self.flight_path) - 1, self.current_path_index + 1
+            )
+            self.plane_x, self.plane_y = self.flight_path[self.current_path_index]
+
+    def get_multiplier_color(
+        self, multiplier: Optional[float] = None
+    ) -> Tuple[float, float, float, float]:
+        if multiplier is None:
+            multiplier = self.state.multiplier
+        if multiplier < 2.0:
+            return (0.2, 0.8, 0.2, 0.9)
+        elif multiplier < 5.0:
+            return (1, 0.7, 0.2, 0.9)
+        return (1, 0.2, 0.2, 0.9)
+
+    def reset_plane(self):
+        self.plane_x = Config.PLANE_START_X
+        self.plane_y = Config.PLANE_START_Y
+        self.plane_angle = 0.0
+        self.current_path_index = 0
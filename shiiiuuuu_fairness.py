@@ -0,0 +1,434 @@
+import argparse
+import hashlib
+import hmac
+import inspect
+import json
+import logging
+import math
+import multiprocessing
+import os
+import platform
+import random
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from shiiiuuuu_core import Config, generate_crash_point
+
+logger = logging.getLogger("shiiiuuuu.fairness")
+
+# resolution of the probability-integral-transform histogram. the ks
+# statistic is read off its edges, so it can only under-read the true
+# distance by at most 1 / PIT_BINS
+PIT_BINS = 1 << 16
+# equiprobable bins for the chi-square test, each a run of PIT bins
+CHI_SQUARE_BINS = 256
+# 16.0 is left out: at the default Config it is special_floor(), where a
+# tail test counts the same points as the special_chance test
+TAIL_THRESHOLDS = (2.0, 5.0, 10.0, 25.0, 40.0)
+KEY_ENV = "SHIIIUUUU_FAIRNESS_KEY"
+
+
+# cdf of the distribution generate_crash_point declares: with probability
+# 1 - SPECIAL_CHANCE the skewed base draw, otherwise a uniform special draw
+def declared_cdf(x: np.ndarray, config: type = Config) -> np.ndarray:
+    base = np.clip((x - 1.0) / config.CRASH_MAX_RANGE, 0.0, 1.0) ** (
+        1.0 / config.CRASH_SKEW
+    )
+    special = np.clip(
+        (x - config.SPECIAL_MIN) / (config.SPECIAL_MAX - config.SPECIAL_MIN), 0.0, 1.0
+    )
+    return (1.0 - config.SPECIAL_CHANCE) * base + config.SPECIAL_CHANCE * special
+
+
+def special_floor(config: type = Config) -> float:
+    return max(1.0 + config.CRASH_MAX_RANGE, config.SPECIAL_MIN)
+
+
+def declared_tail(threshold: float, config: type = Config) -> float:
+    return 1.0 - float(declared_cdf(np.array([threshold]), config)[0])
+
+
+# everything the tests need, in constant memory. two accumulators merge by
+# adding their fields, so chunks can be drawn anywhere in any order
+class FairnessAccumulator:
+    def __init__(self):
+        self.count = 0
+        self.pit_histogram = np.zeros(PIT_BINS, dtype=np.int64)
+        self.tail_counts = np.zeros(len(TAIL_THRESHOLDS), dtype=np.int64)
+        # points above the base range, which only the special branch reaches
+        self.special_only = 0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+        # lag-1 pair sums within each chunk; pairs never span two chunks,
+        # since chunks come from unrelated random streams
+        self.pairs = 0
+        self.sum_x = 0.0
+        self.sum_y = 0.0
+        self.sum_xx = 0.0
+        self.sum_yy = 0.0
+        self.sum_xy = 0.0
+
+    def add(self, points: np.ndarray, config: type = Config):
+        u = declared_cdf(points, config)
+        bins = np.minimum((u * PIT_BINS).astype(np.int64), PIT_BINS - 1)
+        self.pit_histogram += np.bincount(bins, minlength=PIT_BINS)
+        for index, threshold in enumerate(TAIL_THRESHOLDS):
+            self.tail_counts[index] += np.count_nonzero(points >= threshold)
+        self.special_only += np.count_nonzero(points >= special_floor(config))
+        self.count += len(points)
+        self.minimum = min(self.minimum, float(points.min()))
+        self.maximum = max(self.maximum, float(points.max()))
+
+        x = u[:-1]
+        y = u[1:]
+        self.pairs += len(x)
+        self.sum_x += float(x.sum())
+        self.sum_y += float(y.sum())
+        self.sum_xx += float(np.dot(x, x))
+        self.sum_yy += float(np.dot(y, y))
+        self.sum_xy += float(np.dot(x, y))
+
+    def merge(self, other: "FairnessAccumulator"):
+        self.count += other.count
+        self.pit_histogram += other.pit_histogram
+        self.tail_counts += other.tail_counts
+        self.special_only += other.special_only
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+        self.pairs += other.pairs
+        self.sum_x += other.sum_x
+        self.sum_y += other.sum_y
+        self.sum_xx += other.sum_xx
+        self.sum_yy += other.sum_yy
+        self.sum_xy += other.sum_xy
+
+
+def kolmogorov_sf(t: float) -> float:
+    if t < 0.2:
+        return 1.0
+    total = 0.0
+    for k in range(1, 101):
+        term = math.exp(-2.0 * k * k * t * t)
+        total += term if k % 2 else -term
+        if term < 1e-16:
+            break
+    return min(1.0, max(0.0, 2.0 * total))
+
+
+# upper regularized incomplete gamma, series below a + 1 and a continued
+# fraction above it
+def chi_square_sf(statistic: float, df: int) -> float:
+    a = df / 2.0
+    x = statistic / 2.0
+    if x <= 0:
+        return 1.0
+    log_prefix = a * math.log(x) - x - math.lgamma(a)
+    if x < a + 1.0:
+        term = total = 1.0 / a
+        n = a
+        for _ in range(10000):
+            n += 1.0
+            term *= x / n
+            total += term
+            if abs(term) < abs(total) * 1e-15:
+                break
+        return max(0.0, 1.0 - total * math.exp(log_prefix))
+    b = x + 1.0 - a
+    c = 1.0 / 1e-300
+    d = 1.0 / b
+    h = d
+    for i in range(1, 10000):
+        an = -i * (i - a)
+        b += 2.0
+        d = an * d + b
+        d = d if abs(d) > 1e-300 else 1e-300
+        c = b + an / c
+        c = c if abs(c) > 1e-300 else 1e-300
+        d = 1.0 / d
+        delta = d * c
+        h *= delta
+        if abs(delta - 1.0) < 1e-15:
+            break
+    return min(1.0, math.exp(log_prefix) * h)
+
+
+def normal_two_sided(z: float) -> float:
+    return math.erfc(abs(z) / math.sqrt(2.0))
+
+
+def analyse(acc: FairnessAccumulator, config: type = Config) -> Dict:
+    n = acc.count
+    tests = {}
+
+    cumulative = np.cumsum(acc.pit_histogram) / n
+    edges = np.arange(1, PIT_BINS + 1) / PIT_BINS
+    ks = float(np.max(np.abs(cumulative - edges)))
+    tests["kolmogorov_smirnov"] = {
+        "statistic": ks,
+        "p_value": kolmogorov_sf(ks * math.sqrt(n)),
+        "resolution": 1.0 / PIT_BINS,
+    }
+
+    observed = acc.pit_histogram.reshape(CHI_SQUARE_BINS, -1).sum(axis=1)
+    expected = n / CHI_SQUARE_BINS
+    chi_square = float(((observed - expected) ** 2).sum() / expected)
+    tests["chi_square"] = {
+        "statistic": chi_square,
+        "df": CHI_SQUARE_BINS - 1,
+        "bins": CHI_SQUARE_BINS,
+        "p_value": chi_square_sf(chi_square, CHI_SQUARE_BINS - 1),
+    }
+
+    m = acc.pairs
+    covariance = m * acc.sum_xy - acc.sum_x * acc.sum_y
+    spread = (m * acc.sum_xx - acc.sum_x**2) * (m * acc.sum_yy - acc.sum_y**2)
+    r = covariance / math.sqrt(spread) if spread > 0 else 0.0
+    z = r * math.sqrt(m)
+    tests["serial_correlation"] = {
+        "lag": 1,
+        "pairs": m,
+        "r": r,
+        "z": z,
+        "p_value": normal_two_sided(z),
+    }
+
+    low = special_floor(config)
+    for threshold, count in zip(TAIL_THRESHOLDS, acc.tail_counts.tolist()):
+        if threshold == low:
+            # the special_chance test below, counted twice in the correction
+            continue
+        p = declared_tail(threshold, config)
+        expected = n * p
+        sd = math.sqrt(n * p * (1.0 - p))
+        z = (count - expected) / sd if sd > 0 else 0.0
+        tests[f"tail_ge_{threshold:g}"] = {
+            "observed": count,
+            "expected": expected,
+            "z": z,
+            "p_value": normal_two_sided(z) if sd > 0 else float(count == 0),
+        }
+
+    # above the base range only the special branch can land, which gives an
+    # estimate of SPECIAL_CHANCE that does not depend on the base draw
+    if low < config.SPECIAL_MAX:
+        share = (config.SPECIAL_MAX - low) / (config.SPECIAL_MAX - config.SPECIAL_MIN)
+        p = config.SPECIAL_CHANCE * share
+        above = acc.special_only
+        sd = math.sqrt(n * p * (1.0 - p))
+        z = (above - n * p) / sd
+        tests["special_chance"] = {
+            "declared": config.SPECIAL_CHANCE,
+            "estimate": above / (n * share),
+            "z": z,
+            "p_value": normal_two_sided(z),
+        }
+    return tests
+
+
+def run_chunk(task: Tuple[Optional[bytes], int]) -> FairnessAccumulator:
+    seed, size = task
+    # the real generator, one call per point. a seeded chunk passes its own
+    # stream, which makes the run reproducible but only tests the mapping
+    # from uniforms to crash points. the game passes rng=None, which reseeds
+    # the global random from the clock on every call; unseeded chunks take
+    # that path so its entropy is tested too, just not reproducibly
+    rng = random.Random(seed) if seed is not None else None
+    points = np.fromiter(
+        (generate_crash_point(rng) for _ in range(size)), dtype=np.float64, count=size
+    )
+    acc = FairnessAccumulator()
+    acc.add(points)
+    return acc
+
+
+def chunk_seed(root: bytes, index: int) -> bytes:
+    return hashlib.sha256(root + index.to_bytes(8, "big")).digest()
+
+
+def chunk_tasks(root: bytes, samples: int, chunk: int) -> List[Tuple[bytes, int]]:
+    tasks = []
+    for index, start in enumerate(range(0, samples, chunk)):
+        tasks.append((chunk_seed(root, index), min(chunk, samples - start)))
+    return tasks
+
+
+def production_tasks(samples: int, chunk: int) -> List[Tuple[None, int]]:
+    return [(None, min(chunk, samples - start)) for start in range(0, samples, chunk)]
+
+
+def draw(pool, tasks: List[Tuple], label: str) -> FairnessAccumulator:
+    total = FairnessAccumulator()
+    step = max(1, len(tasks) // 10)
+    for done, acc in enumerate(pool.imap_unordered(run_chunk, tasks), 1):
+        total.merge(acc)
+        if done % step == 0 or done == len(tasks):
+            logger.info(
+                "%s: %s/%s chunks, %s points", label, done, len(tasks), total.count
+            )
+    return total
+
+
+def generator_fingerprint() -> str:
+    return hashlib.sha256(inspect.getsource(generate_crash_point).encode()).hexdigest()
+
+
+def canonical(document: Dict) -> bytes:
+    return json.dumps(document, sort_keys=True, separators=(",", ":")).encode()
+
+
+def sign(report: Dict, key: bytes) -> Dict:
+    return {
+        "report": report,
+        "signature": {
+            "algorithm": "HMAC-SHA256",
+            "value": hmac.new(key, canonical(report), hashlib.sha256).hexdigest(),
+        },
+    }
+
+
+def verify(document: Dict, key: bytes) -> bool:
+    expected = hmac.new(key, canonical(document["report"]), hashlib.sha256)
+    return hmac.compare_digest(expected.hexdigest(), document["signature"]["value"])
+
+
+def build_report(
+    acc: FairnessAccumulator,
+    production: FairnessAccumulator,
+    root: bytes,
+    options: argparse.Namespace,
+    processes: int,
+    elapsed: float,
+) -> Dict:
+    tests = analyse(acc)
+    if production.count:
+        for name, result in analyse(production).items():
+            tests[f"production_{name}"] = result
+    threshold = options.alpha / len(tests)
+    for result in tests.values():
+        result["passed"] = result["p_value"] >= threshold
+    return {
+        "generator": {
+            "function": "shiiiuuuu_core.generate_crash_point",
+            "source_sha256": generator_fingerprint(),
+            "config": {
+                key: getattr(Config, key)
+                for key in (
+                    "CRASH_MAX_RANGE",
+                    "CRASH_SKEW",
+                    "SPECIAL_CHANCE",
+                    "SPECIAL_MIN",
+                    "SPECIAL_MAX",
+                )
+            },
+        },
+        "run": {
+            "samples": acc.count,
+            "chunk": options.chunk,
+            "root_seed": root.hex(),
+            "processes": processes,
+            "seconds": round(elapsed, 3),
+            "samples_per_second": round(acc.count / elapsed) if elapsed else None,
+            # drawn through rng=None as the game does; not reproducible
+            "production_samples": production.count,
+            "python": platform.python_version(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        },
+        "observed": {"minimum": acc.minimum, "maximum": acc.maximum},
+        # bonferroni: each test is held to alpha divided by the test count
+        "alpha": options.alpha,
+        "per_test_alpha": threshold,
+        "tests": tests,
+        "passed": all(result["passed"] for result in tests.values()),
+    }
+
+
+def load_key(options: argparse.Namespace) -> Optional[bytes]:
+    if options.key_file:
+        with open(options.key_file, "rb") as f:
+            return f.read().strip()
+    key = os.environ.get(KEY_ENV)
+    return key.encode() if key else None
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Verify generate_crash_point against its declared distribution"
+    )
+    parser.add_argument("--samples", type=int, default=100_000_000)
+    parser.add_argument("--chunk", type=int, default=1_000_000)
+    parser.add_argument(
+        "--production-samples",
+        type=int,
+        default=1_000_000,
+        help="points drawn through the game's own rng=None path",
+    )
+    parser.add_argument(
+        "--processes", type=int, default=os.cpu_count() or 1, metavar="N"
+    )
+    parser.add_argument(
+        "--seed", help="root seed as hex; random when omitted, recorded either way"
+    )
+    parser.add_argument("--alpha", type=float, default=0.001)
+    parser.add_argument(
+        "--key-file", help=f"HMAC key for signing; defaults to ${KEY_ENV}"
+    )
+    parser.add_argument("--out", default="shiiiuuuu_fairness.json", metavar="PATH")
+    parser.add_argument(
+        "--verify", metavar="PATH", help="check the signature of an existing report"
+    )
+    options = parser.parse_args(argv)
+    if load_key(options) is None:
+        parser.error(f"a signing key is required: pass --key-file or set ${KEY_ENV}")
+    return options
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    options = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    key = load_key(options)
+
+    if options.verify:
+        with open(options.verify) as f:
+            document = json.load(f)
+        valid = verify(document, key)
+        logger.info("signature %s", "valid" if valid else "INVALID")
+        return 0 if valid else 1
+
+    root = bytes.fromhex(options.seed) if options.seed else os.urandom(16)
+    tasks = chunk_tasks(root, options.samples, options.chunk)
+    processes = max(1, min(options.processes, len(tasks)))
+    started = time.perf_counter()
+    with multiprocessing.Pool(processes) as pool:
+        total = draw(pool, tasks, "seeded")
+        elapsed = time.perf_counter() - started
+        production = draw(
+            pool,
+            production_tasks(options.production_samples, options.chunk),
+            "production",
+        )
+
+    report = build_report(total, production, root, options, processes, elapsed)
+    with open(options.out, "w") as f:
+        json.dump(sign(report, key), f, indent=2)
+    for name, result in report["tests"].items():
+        logger.info(
+            "%-32s p=%.4g %s",
+            name,
+            result["p_value"],
+            "ok" if result["passed"] else "FAIL",
+        )
+    logger.info(
+        "%s points in %.1fs on %s processes, report written to %s",
+        total.count,
+        elapsed,
+        processes,
+        options.out,
+    )
+    return 0 if report["passed"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
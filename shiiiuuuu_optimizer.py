@@ -0,0 +1,171 @@
+import argparse
+import bisect
+import csv
+import heapq
+import json
+import sys
+from typing import Iterable, List, NamedTuple, Optional
+
+from shiiiuuuu_core import Config, load_crash_history
+
+
+class TargetStats(NamedTuple):
+    target: float
+    hit_rate: float
+    # per unit staked: the payout, not the profit
+    expected_return: float
+    variance: float
+    # rounds whose crash point was above the target
+    hits: int
+
+
+# fixed cash-out targets evaluated against a crash history. a target wins a
+# round when the round's crash point is above it. the history is sorted
+# once and new rounds are folded in as they arrive; a single target is then
+# a bisect, and a whole ascending grid is one bisect per target, each
+# starting where the previous one stopped
+class TargetAnalyzer:
+    # batches up to this size are inserted one by one; larger ones are
+    # sorted and merged in a single pass
+    INSORT_LIMIT = 64
+
+    def __init__(self, crash_points: Iterable[float] = ()):
+        self.points = sorted(crash_points)
+        self.rounds = len(self.points)
+
+    def __len__(self) -> int:
+        return self.rounds
+
+    def add(self, crash_points: Iterable[float]):
+        new = sorted(crash_points)
+        if len(new) <= self.INSORT_LIMIT:
+            for point in new:
+                bisect.insort(self.points, point)
+        else:
+            self.points = list(heapq.merge(self.points, new))
+        self.rounds = len(self.points)
+
+    def _stats(self, target: float, survivors: int) -> TargetStats:
+        hit_rate = survivors / self.rounds
+        return TargetStats(
+            target,
+            hit_rate,
+            target * hit_rate,
+            target * target * hit_rate * (1.0 - hit_rate),
+            survivors,
+        )
+
+    def evaluate(self, target: float) -> TargetStats:
+        return self._stats(
+            target, self.rounds - bisect.bisect_right(self.points, target)
+        )
+
+    def curve(
+        self, low: float = 1.01, high: Optional[float] = None, step: float = 0.01
+    ) -> List[TargetStats]:
+        if not self.rounds:
+            return []
+        if high is None:
+            high = self.points[-1]
+        points = self.points
+        rounds = self.rounds
+        index = 0
+        results = []
+        # targets are built from the step count so the grid does not drift
+        for i in range(int(round((high - low) / step)) + 1):
+            target = round(low + i * step, 10)
+            index = bisect.bisect_right(points, target, index)
+            results.append(self._stats(target, rounds - index))
+        return results
+
+    def optimum(
+        self,
+        curve: Optional[List[TargetStats]] = None,
+        min_hits: int = Config.OPTIMIZER_MIN_HITS,
+    ) -> Optional[TargetStats]:
+        # a target above all but a few crashes scores on luck, e.g. one 45x
+        # round in twenty makes 44.99x look best
+        if curve is None:
+            curve = self.curve()
+        eligible = [stats for stats in curve if stats.hits >= min_hits]
+        if not eligible:
+            return None
+        return max(eligible, key=lambda stats: stats.expected_return)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Expected return of fixed cash-out targets over crash history"
+    )
+    parser.add_argument("--history", default=Config.HISTORY_FILE, metavar="PATH")
+    parser.add_argument(
+        "--target",
+        type=float,
+        action="append",
+        default=[],
+        help="report this target; may be repeated",
+    )
+    parser.add_argument("--low", type=float, default=1.01)
+    parser.add_argument(
+        "--high", type=float, default=None, help="defaults to the highest crash"
+    )
+    parser.add_argument("--step", type=float, default=0.01)
+    parser.add_argument(
+        "--min-hits",
+        type=int,
+        default=Config.OPTIMIZER_MIN_HITS,
+        help="rounds a target must survive to count as best",
+    )
+    parser.add_argument("--csv", metavar="PATH", help="write the full curve")
+    parser.add_argument("--json", action="store_true", help="print JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    options = parse_args(argv)
+    analyzer = TargetAnalyzer(load_crash_history(options.history))
+    if not analyzer.rounds:
+        print(f"no crash history in {options.history}", file=sys.stderr)
+        return 1
+
+    curve = analyzer.curve(options.low, options.high, options.step)
+    best = analyzer.optimum(curve, options.min_hits)
+    queried = [analyzer.evaluate(target) for target in options.target]
+
+    if options.csv:
+        with open(options.csv, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(TargetStats._fields)
+            writer.writerows(curve)
+
+    if options.json:
+        print(
+            json.dumps(
+                {
+                    "rounds": analyzer.rounds,
+                    "optimum": best._asdict() if best is not None else None,
+                    "targets": [stats._asdict() for stats in queried],
+                },
+                indent=2,
+            )
+        )
+        return 0
+
+    print(f"{analyzer.rounds} rounds from {options.history}")
+    rows = [("", stats) for stats in queried]
+    if best is not None:
+        rows.insert(0, ("best", best))
+    else:
+        print(f"no target was hit at least {options.min_hits} times")
+    if rows:
+        print(f"{'target':>8} {'hit rate':>9} {'return':>8} {'std dev':>8}")
+    for label, stats in rows:
+        print(
+            f"{stats.target:7.2f}x {stats.hit_rate:9.2%} {stats.expected_return:8.4f}"
+            f" {stats.variance ** 0.5:8.4f} {label}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,423 @@
+import argparse
+import asyncio
+import logging
+import socket
+import struct
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+from shiiiuuuu_betbook import BetBook
+from shiiiuuuu_core import (
+    Config,
+    GameState,
+    generate_crash_point,
+    multiplier_at,
+    crash_time,
+)
+
+logger = logging.getLogger("shiiiuuuu.server")
+
+# every message is one type byte followed by a fixed-size big-endian body.
+# client messages have the high bit clear, server messages have it set
+BET = 0x01
+CASH_OUT = 0x02
+PING = 0x03
+WELCOME = 0x81
+BETTING = 0x82
+ROUND_START = 0x83
+BET_RESULT = 0x84
+CASHED_OUT = 0x85
+CRASHED = 0x86
+PONG = 0x87
+
+FORMATS = {
+    # amount, auto cash-out target (0 for manual only)
+    BET: struct.Struct("!BId"),
+    CASH_OUT: struct.Struct("!B"),
+    # client clock
+    PING: struct.Struct("!Bd"),
+    # player id, balance, server clock
+    WELCOME: struct.Struct("!BIqd"),
+    # round id, betting closes at
+    BETTING: struct.Struct("!BId"),
+    # round id, start time, growth factor, growth exponent
+    ROUND_START: struct.Struct("!BIddd"),
+    # round id, amount, balance, accepted
+    BET_RESULT: struct.Struct("!BIIqB"),
+    # round id, multiplier (0 when rejected), winnings, balance
+    CASHED_OUT: struct.Struct("!BIdqq"),
+    # round id, crash point, crash time
+    CRASHED: struct.Struct("!BIdd"),
+    # client clock, server clock
+    PONG: struct.Struct("!Bdd"),
+}
+
+
+def pack(kind: int, *fields) -> bytes:
+    return FORMATS[kind].pack(kind, *fields)
+
+
+class MessageReader:
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def feed(self, data: bytes) -> List[Tuple]:
+        self.buffer += data
+        buffer = self.buffer
+        messages = []
+        offset = 0
+        while offset < len(buffer):
+            fmt = FORMATS.get(buffer[offset])
+            if fmt is None:
+                raise ValueError(f"unknown message type {buffer[offset]:#x}")
+            if len(buffer) - offset < fmt.size:
+                break
+            messages.append(fmt.unpack_from(buffer, offset))
+            offset += fmt.size
+        del buffer[:offset]
+        return messages
+
+
+class PlayerProtocol(asyncio.Protocol):
+    def __init__(self, server: "RoundServer"):
+        self.server = server
+        self.transport: Optional[asyncio.Transport] = None
+        self.reader = MessageReader()
+        self.player_id = 0
+        self.balance = server.initial_balance
+
+    def connection_made(self, transport: asyncio.Transport):
+        self.transport = transport
+        sock = transport.get_extra_info("socket")
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.server.join(self)
+
+    def data_received(self, data: bytes):
+        try:
+            messages = self.reader.feed(data)
+        except ValueError:
+            self.transport.abort()
+            return
+        for message in messages:
+            self.server.handle(self, message)
+
+    def connection_lost(self, exc: Optional[Exception]):
+        self.server.leave(self)
+
+    def send(self, message: bytes):
+        transport = self.transport
+        if transport.is_closing():
+            return
+        # a client that cannot keep up is dropped instead of buffered
+        if transport.get_write_buffer_size() > Config.SERVER_MAX_WRITE_BUFFER:
+            self.server.slow_clients += 1
+            transport.abort()
+            return
+        transport.write(message)
+
+
+# one authoritative round for every connection. clients receive the curve
+# parameters and the start time once per round and compute the multiplier
+# themselves; the server only sleeps until the analytic crash time, and a
+# cash-out is settled at the server time its message is handled
+class RoundServer:
+    def __init__(
+        self,
+        betting_window: float = Config.SERVER_BETTING_WINDOW,
+        result_pause: float = Config.SERVER_RESULT_PAUSE,
+        initial_balance: int = Config.INITIAL_BALANCE,
+    ):
+        self.betting_window = betting_window
+        self.result_pause = result_pause
+        self.initial_balance = initial_balance
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.players: Dict[int, PlayerProtocol] = {}
+        self.next_player_id = 1
+        self.state = GameState.BETTING
+        self.round_id = 0
+        self.book = BetBook()
+        self.start_time = 0.0
+        self.crash_point = 1.0
+        self.crash_at = 0.0
+        self.rounds = 0
+        self.cash_outs = 0
+        self.slow_clients = 0
+        self.round_listeners: List[Callable] = []
+
+    def now(self) -> float:
+        return self.loop.time()
+
+    async def serve(self, host: str, port: int):
+        self.loop = asyncio.get_running_loop()
+        server = await self.loop.create_server(
+            lambda: PlayerProtocol(self), host, port, backlog=4096
+        )
+        logger.info("listening on %s:%s", host, port)
+        async with server:
+            await self.run_rounds()
+
+    async def run_rounds(self):
+        while True:
+            await self.betting_phase()
+            await self.flight_phase()
+            await asyncio.sleep(self.result_pause)
+
+    async def betting_phase(self):
+        self.round_id += 1
+        self.state = GameState.BETTING
+        self.book.clear()
+        closes_at = self.now() + self.betting_window
+        self.broadcast(pack(BETTING, self.round_id, closes_at))
+        await asyncio.sleep(self.betting_window)
+
+    async def flight_phase(self):
+        self.crash_point = generate_crash_point()
+        self.start_time = self.now()
+        self.crash_at = self.start_time + crash_time(self.crash_point)
+        self.state = GameState.FLYING
+        self.broadcast(
+            pack(
+                ROUND_START,
+                self.round_id,
+                self.start_time,
+                Config.GROWTH_FACTOR,
+                Config.GROWTH_EXPONENT,
+            )
+        )
+        await asyncio.sleep(self.crash_at - self.now())
+
+        self.state = GameState.CRASHED
+        self.rounds += 1
+        self.broadcast(pack(CRASHED, self.round_id, self.crash_point, self.crash_at))
+        self.settle()
+
+    def settle(self):
+        settlement = self.book.settle(self.crash_point)
+        players = self.players
+        for player_id, multiplier, payout in zip(
+            settlement.auto_player_ids.tolist(),
+            settlement.auto_multipliers.tolist(),
+            settlement.auto_payouts.tolist(),
+        ):
+            player = players.get(player_id)
+            if player is None:
+                continue
+            player.balance += payout
+            player.send(
+                pack(CASHED_OUT, self.round_id, multiplier, payout, player.balance)
+            )
+        self.cash_outs += len(settlement.auto_payouts)
+        logger.info(
+            "round %s crashed at %.2fx: %s seats, %s manual, %s auto, %s lost,"
+            " wagered %s, paid %s",
+            self.round_id,
+            self.crash_point,
+            settlement.seats,
+            settlement.manual,
+            len(settlement.auto_payouts),
+            settlement.losers,
+            settlement.wagered,
+            settlement.paid,
+        )
+        for callback in self.round_listeners:
+            callback(self)
+
+    def broadcast(self, message: bytes):
+        for player in list(self.players.values()):
+            player.send(message)
+
+    def join(self, player: PlayerProtocol):
+        player.player_id = self.next_player_id
+        self.next_player_id += 1
+        self.players[player.player_id] = player
+        player.send(pack(WELCOME, player.player_id, player.balance, self.now()))
+        if self.state == GameState.FLYING:
+            player.send(
+                pack(
+                    ROUND_START,
+                    self.round_id,
+                    self.start_time,
+                    Config.GROWTH_FACTOR,
+                    Config.GROWTH_EXPONENT,
+                )
+            )
+
+    def leave(self, player: PlayerProtocol):
+        self.players.pop(player.player_id, None)
+
+    def handle(self, player: PlayerProtocol, message: Tuple):
+        kind = message[0]
+        if kind == BET:
+            self.place_bet(player, message[1], message[2])
+        elif kind == CASH_OUT:
+            self.cash_out(player)
+        elif kind == PING:
+            player.send(pack(PONG, message[1], self.now()))
+        else:
+            player.transport.abort()
+
+    def place_bet(self, player: PlayerProtocol, amount: int, target: float):
+        accepted = (
+            self.state == GameState.BETTING
+            and player.player_id not in self.book
+            and Config.MIN_BET <= amount <= player.balance
+        )
+        if accepted:
+            player.balance -= amount
+            self.book.place(player.player_id, amount, target if target > 1.0 else 0.0)
+        player.send(pack(BET_RESULT, self.round_id, amount, player.balance, accepted))
+
+    def cash_out(self, player: PlayerProtocol):
+        now = self.now()
+        result = None
+        if self.state == GameState.FLYING and now < self.crash_at:
+            result = self.book.cash_out(
+                player.player_id, multiplier_at(now - self.start_time)
+            )
+        if result is None:
+            player.send(pack(CASHED_OUT, self.round_id, 0.0, 0, player.balance))
+            return
+        multiplier, winnings = result
+        player.balance += winnings
+        self.cash_outs += 1
+        player.send(
+            pack(CASHED_OUT, self.round_id, multiplier, winnings, player.balance)
+        )
+
+
+# client side of the protocol: tracks the server clock offset from WELCOME
+# and PING/PONG, and derives the multiplier locally from ROUND_START
+class RoundClient(asyncio.Protocol):
+    def __init__(self):
+        self.transport: Optional[asyncio.Transport] = None
+        self.reader = MessageReader()
+        self.player_id = 0
+        self.balance = 0
+        self.round_id = 0
+        self.state = GameState.BETTING
+        self.start_time = 0.0
+        self.growth = (Config.GROWTH_FACTOR, Config.GROWTH_EXPONENT)
+        self.clock_offset = 0.0
+        self.round_trip = 0.0
+        self.listeners: List[Callable] = []
+
+    def connection_made(self, transport: asyncio.Transport):
+        self.transport = transport
+        sock = transport.get_extra_info("socket")
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def data_received(self, data: bytes):
+        for message in self.reader.feed(data):
+            self._apply(message)
+            for callback in self.listeners:
+                callback(message)
+
+    def _apply(self, message: Tuple):
+        kind = message[0]
+        if kind == WELCOME:
+            _, self.player_id, self.balance, server_clock = message
+            self.clock_offset = server_clock - time.monotonic()
+        elif kind == PONG:
+            _, sent, server_clock = message
+            now = time.monotonic()
+            self.round_trip = now - sent
+            self.clock_offset = server_clock + self.round_trip / 2 - now
+        elif kind == BETTING:
+            self.round_id = message[1]
+            self.state = GameState.BETTING
+        elif kind == ROUND_START:
+            _, self.round_id, self.start_time, factor, exponent = message
+            self.growth = (factor, exponent)
+            self.state = GameState.FLYING
+        elif kind in (BET_RESULT, CASHED_OUT):
+            self.balance = message[-1] if kind == CASHED_OUT else message[3]
+        elif kind == CRASHED:
+            self.state = GameState.CRASHED
+
+    def server_time(self) -> float:
+        return time.monotonic() + self.clock_offset
+
+    def multiplier(self) -> float:
+        if self.state != GameState.FLYING:
+            return 1.0
+        factor, exponent = self.growth
+        elapsed = max(0.0, self.server_time() - self.start_time)
+        return 1.0 + factor * elapsed**exponent
+
+    def bet(self, amount: int, target: float = 0.0):
+        self.transport.write(pack(BET, amount, target))
+
+    def cash_out(self):
+        self.transport.write(pack(CASH_OUT))
+
+    def ping(self):
+        self.transport.write(pack(PING, time.monotonic()))
+
+
+def raise_file_limit():
+    # each connection holds a descriptor; the default soft limit is often 1024
+    if resource is None:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if hard == resource.RLIM_INFINITY:
+        hard = 1 << 20
+    if soft < hard:
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+        except (ValueError, OSError):
+            pass
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Shiiiuuuu shared round server")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=Config.SERVER_PORT)
+    parser.add_argument(
+        "--betting-window",
+        type=float,
+        default=Config.SERVER_BETTING_WINDOW,
+        metavar="SECONDS",
+    )
+    parser.add_argument(
+        "--result-pause",
+        type=float,
+        default=Config.SERVER_RESULT_PAUSE,
+        metavar="SECONDS",
+        help="pause between a crash and the next betting window",
+    )
+    parser.add_argument(
+        "--balance",
+        type=int,
+        default=Config.INITIAL_BALANCE,
+        help="starting balance of each connection",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    options = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    raise_file_limit()
+    if uvloop is not None:
+        uvloop.install()
+    server = RoundServer(options.betting_window, options.result_pause, options.balance)
+    try:
+        asyncio.run(server.serve(options.host, options.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
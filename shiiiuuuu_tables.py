@@ -0,0 +1,391 @@
+import argparse
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import os
+import random
+import time
+from collections import deque
+from functools import partial
+from typing import Callable, Dict, List, Optional, Tuple
+
+from shiiiuuuu_betbook import BetBook
+from shiiiuuuu_core import (
+    Config,
+    GameState,
+    generate_crash_point,
+    multiplier_at,
+    crash_time,
+)
+
+logger = logging.getLogger("shiiiuuuu.tables")
+
+# the three things that can happen to a table; everything in between is
+# computed from the round's start time, so nothing is polled per frame
+CLOSE_BETTING = "close_betting"
+CRASH = "crash"
+REOPEN = "reopen"
+
+
+# a Config subclass for one table. only keys Config already has can be
+# overridden, so a typo fails here instead of silently using the default
+def table_config(name: str = "TableConfig", **overrides) -> type:
+    unknown = sorted(key for key in overrides if not hasattr(Config, key))
+    if unknown:
+        raise ValueError("unknown config keys: " + ", ".join(unknown))
+    return type(name, (Config,), overrides)
+
+
+class TableMetrics:
+    def __init__(self):
+        self.rounds = 0
+        self.bets = 0
+        self.rejected_bets = 0
+        self.cash_outs = 0
+        self.auto_cash_outs = 0
+        self.wagered = 0
+        self.paid = 0
+        self.events = 0
+        self.lateness_total = 0.0
+        self.lateness_max = 0.0
+        self.errors = 0
+
+    def record_event(self, lateness: float):
+        self.events += 1
+        self.lateness_total += lateness
+        if lateness > self.lateness_max:
+            self.lateness_max = lateness
+
+    def summary(self) -> Dict:
+        return {
+            "rounds": self.rounds,
+            "bets": self.bets,
+            "rejected_bets": self.rejected_bets,
+            "cash_outs": self.cash_outs,
+            "auto_cash_outs": self.auto_cash_outs,
+            "wagered": self.wagered,
+            "paid": self.paid,
+            "house_edge": (
+                round(1.0 - self.paid / self.wagered, 4) if self.wagered else None
+            ),
+            "events": self.events,
+            "mean_lateness_ms": round(
+                self.lateness_total / max(self.events, 1) * 1000, 3
+            ),
+            "max_lateness_ms": round(self.lateness_max * 1000, 3),
+            "errors": self.errors,
+        }
+
+
+# one independent crash table: its own config, random stream, bet book,
+# history and metrics. it never reads a clock; the scheduler passes in the
+# time each event was due and the time it was handled
+class Table:
+    def __init__(self, table_id: int, config: type = Config, seed=None):
+        self.table_id = table_id
+        self.config = config
+        self.rng = random.Random(seed if seed is not None else os.urandom(16))
+        self.state = GameState.RESULT
+        self.round_id = 0
+        self.book = BetBook(capacity=64)
+        self.crash_point = 1.0
+        self.start_time = 0.0
+        self.crash_at = 0.0
+        self.closes_at = 0.0
+        self.settlement = None
+        self.history: deque = deque(maxlen=20)
+        self.metrics = TableMetrics()
+        self.listeners: Dict[str, List[Callable]] = {
+            "betting": [],
+            "flying": [],
+            "crashed": [],
+        }
+
+    def bind(self, event: str, callback: Callable):
+        self.listeners[event].append(callback)
+
+    def _emit(self, event: str):
+        for callback in self.listeners[event]:
+            callback(self)
+
+    def handle(self, kind: str, due: float, now: float) -> Tuple[float, str]:
+        self.metrics.record_event(now - due)
+        if kind == CLOSE_BETTING:
+            return self.close_betting(due)
+        if kind == CRASH:
+            return self.crash(due)
+        return self.open_round(due)
+
+    # transitions are timed from when the event was due, not when it ran,
+    # so a late wakeup never stretches a round
+    def open_round(self, now: float) -> Tuple[float, str]:
+        self.round_id += 1
+        self.state = GameState.BETTING
+        self.book.clear()
+        self.closes_at = now + self.config.SERVER_BETTING_WINDOW
+        self._emit("betting")
+        return self.closes_at, CLOSE_BETTING
+
+    def close_betting(self, now: float) -> Tuple[float, str]:
+        self.crash_point = generate_crash_point(self.rng, self.config)
+        self.start_time = now
+        self.crash_at = now + crash_time(self.crash_point, self.config)
+        self.state = GameState.FLYING
+        self._emit("flying")
+        return self.crash_at, CRASH
+
+    def crash(self, now: float) -> Tuple[float, str]:
+        self.state = GameState.CRASHED
+        settlement = self.book.settle(self.crash_point)
+        self.settlement = settlement
+        metrics = self.metrics
+        metrics.rounds += 1
+        metrics.wagered += settlement.wagered
+        metrics.paid += settlement.paid
+        metrics.auto_cash_outs += len(settlement.auto_payouts)
+        self.history.append(self.crash_point)
+        self._emit("crashed")
+        return now + self.config.SERVER_RESULT_PAUSE, REOPEN
+
+    def multiplier(self, now: float) -> float:
+        if self.state != GameState.FLYING:
+            return 1.0
+        return multiplier_at(min(now, self.crash_at) - self.start_time, self.config)
+
+    def place_bet(self, player_id: int, amount: int, target: float = 0.0) -> bool:
+        accepted = (
+            self.state == GameState.BETTING
+            and player_id not in self.book
+            and amount >= self.config.MIN_BET
+        )
+        if not accepted:
+            self.metrics.rejected_bets += 1
+            return False
+        self.book.place(player_id, amount, target if target > 1.0 else 0.0)
+        self.metrics.bets += 1
+        return True
+
+    def cash_out(self, player_id: int, now: float) -> Optional[Tuple[float, int]]:
+        if self.state != GameState.FLYING or now >= self.crash_at:
+            return None
+        result = self.book.cash_out(player_id, self.multiplier(now))
+        if result is not None:
+            self.metrics.cash_outs += 1
+        return result
+
+
+# drives every table from one heap of (due time, sequence, table id, event).
+# advance() pops only what is due, so the cost follows the number of events
+# rather than tables times frame rate. under asyncio a single timer handle
+# is kept armed for the earliest entry
+class TableScheduler:
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self.tables: Dict[int, Table] = {}
+        self.heap: List[Tuple[float, int, int, str]] = []
+        self.sequence = itertools.count()
+        self.next_table_id = 1
+        self.events = 0
+        self.wakeups = 0
+        self.failed: List[int] = []
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.timer: Optional[asyncio.TimerHandle] = None
+        self.timer_due = 0.0
+        self.stopped: Optional[asyncio.Future] = None
+
+    def __len__(self) -> int:
+        return len(self.tables)
+
+    def add_table(
+        self,
+        config: type = Config,
+        seed=None,
+        setup: Optional[Callable[[Table], None]] = None,
+    ) -> Table:
+        table = Table(self.next_table_id, config, seed)
+        self.next_table_id += 1
+        # listeners bound in setup already hear the first round open
+        if setup is not None:
+            setup(table)
+        self.tables[table.table_id] = table
+        self._push(table.table_id, *table.open_round(self.clock()))
+        self._arm()
+        return table
+
+    # entries for a removed table stay in the heap and are skipped when popped
+    def remove_table(self, table_id: int) -> Optional[Table]:
+        return self.tables.pop(table_id, None)
+
+    def _push(self, table_id: int, due: float, kind: str):
+        heapq.heappush(self.heap, (due, next(self.sequence), table_id, kind))
+
+    def next_due(self) -> Optional[float]:
+        return self.heap[0][0] if self.heap else None
+
+    def advance(self, now: Optional[float] = None) -> int:
+        if now is None:
+            now = self.clock()
+        heap = self.heap
+        tables = self.tables
+        handled = 0
+        while heap and heap[0][0] <= now:
+            due, _, table_id, kind = heapq.heappop(heap)
+            table = tables.get(table_id)
+            if table is None:
+                continue
+            try:
+                follow = table.handle(kind, due, now)
+            except Exception:
+                # a broken table (or a listener on it) is taken out of
+                # rotation; the rest keep their schedule
+                logger.exception("table %s failed on %s", table_id, kind)
+                table.metrics.errors += 1
+                self.failed.append(table_id)
+                del tables[table_id]
+                continue
+            handled += 1
+            self._push(table_id, *follow)
+        self.events += handled
+        return handled
+
+    def _arm(self):
+        if self.loop is None or not self.heap:
+            return
+        due = self.heap[0][0]
+        if self.timer is not None:
+            if self.timer_due <= due:
+                return
+            self.timer.cancel()
+        self.timer_due = due
+        self.timer = self.loop.call_later(max(0.0, due - self.clock()), self._fire)
+
+    def _fire(self):
+        self.timer = None
+        self.wakeups += 1
+        self.advance()
+        self._arm()
+
+    async def run(self):
+        self.loop = asyncio.get_running_loop()
+        self.stopped = self.loop.create_future()
+        self._fire()
+        try:
+            await self.stopped
+        finally:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+            self.loop = None
+
+    def stop(self):
+        if self.stopped is not None and not self.stopped.done():
+            self.stopped.set_result(None)
+
+    def summary(self) -> Dict:
+        tables = list(self.tables.values())
+        rounds = sum(table.metrics.rounds for table in tables)
+        return {
+            "tables": len(tables),
+            "failed_tables": len(self.failed),
+            "events": self.events,
+            "wakeups": self.wakeups,
+            "rounds": rounds,
+            "pending_entries": len(self.heap),
+            "max_lateness_ms": round(
+                max((table.metrics.lateness_max for table in tables), default=0.0)
+                * 1000,
+                3,
+            ),
+        }
+
+
+def seat_players(table: Table, players: int, rng: random.Random):
+    # simulated players: every seat bets at the round open with an auto target
+    def on_betting(table: Table):
+        for player_id in range(players):
+            table.place_bet(
+                player_id, rng.choice(Config.BET_PRESETS), rng.uniform(1.1, 5.0)
+            )
+
+    table.bind("betting", on_betting)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run many crash tables at once")
+    parser.add_argument("--tables", type=int, default=500)
+    parser.add_argument(
+        "--players", type=int, default=20, help="simulated seats per table"
+    )
+    parser.add_argument("--duration", type=float, default=30.0, metavar="SECONDS")
+    parser.add_argument(
+        "--betting-window",
+        type=float,
+        default=Config.SERVER_BETTING_WINDOW,
+        metavar="SECONDS",
+        help="betting window of the first table; later tables vary around it",
+    )
+    parser.add_argument(
+        "--result-pause",
+        type=float,
+        default=Config.SERVER_RESULT_PAUSE,
+        metavar="SECONDS",
+    )
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--json", metavar="PATH", help="write per-table metrics")
+    return parser.parse_args(argv)
+
+
+async def simulate(options: argparse.Namespace) -> Tuple[TableScheduler, float]:
+    scheduler = TableScheduler(asyncio.get_running_loop().time)
+    rng = random.Random(options.seed)
+    for index in range(options.tables):
+        # spread the tunings so tables drift apart instead of firing together
+        config = table_config(
+            SERVER_BETTING_WINDOW=options.betting_window * rng.uniform(0.8, 1.2),
+            SERVER_RESULT_PAUSE=options.result_pause,
+            CRASH_MAX_RANGE=Config.CRASH_MAX_RANGE * (1 + index % 3),
+        )
+        seed = None if options.seed is None else options.seed * 100003 + index
+        scheduler.add_table(
+            config,
+            seed,
+            setup=partial(seat_players, players=options.players, rng=rng),
+        )
+
+    # cpu is counted from here so table setup is not charged to the events
+    cpu_started = time.process_time()
+    runner = asyncio.ensure_future(scheduler.run())
+    await asyncio.sleep(options.duration)
+    scheduler.stop()
+    await runner
+    return scheduler, time.process_time() - cpu_started
+
+
+def main(argv: Optional[List[str]] = None):
+    options = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    scheduler, cpu = asyncio.run(simulate(options))
+
+    summary = scheduler.summary()
+    summary["cpu_seconds"] = round(cpu, 3)
+    summary["cpu_us_per_event"] = round(cpu / max(summary["events"], 1) * 1e6, 2)
+    logger.info("%s", summary)
+    if options.json:
+        with open(options.json, "w") as f:
+            json.dump(
+                {
+                    "summary": summary,
+                    "tables": {
+                        table_id: table.metrics.summary()
+                        for table_id, table in scheduler.tables.items()
+                    },
+                },
+                f,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()
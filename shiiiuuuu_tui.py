@@ -0,0 +1,367 @@
+import argparse
+import curses
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# taken before the game rules are imported so the startup time includes them
+STARTED = time.perf_counter()
+
+from shiiiuuuu_core import Config, GameState, StateManager, GameEngine
+
+BET_COOLDOWN = 0.5
+CASH_OUT_COOLDOWN = 0.5
+RESET_AFTER_CASH_OUT = 1.0
+RESET_AFTER_CRASH = 1.5
+PRESET_KEYS = "asdf"
+MAX_BET_DIGITS = 7
+MIN_SIZE = (16, 60)
+
+# the app's multiplier colors, mapped to curses color pairs
+TIER_PAIRS = {
+    (0.2, 0.8, 0.2, 0.9): 1,
+    (1, 0.7, 0.2, 0.9): 2,
+    (1, 0.2, 0.2, 0.9): 3,
+}
+
+
+# remembers what was last written at each position, so an unchanged field
+# never reaches curses; curses in turn only sends the cells that differ
+# from the terminal, which keeps slow serial and ssh links responsive
+class CellCache:
+    def __init__(self, window):
+        self.window = window
+        self.drawn: Dict[Tuple[int, int], Tuple[str, int]] = {}
+        self.writes = 0
+
+    def put(self, row: int, col: int, text: str, attr: int = 0, width: int = 0):
+        if width:
+            text = text[:width].ljust(width)
+        key = (row, col)
+        if self.drawn.get(key) == (text, attr):
+            return
+        self.drawn[key] = (text, attr)
+        self.writes += 1
+        try:
+            self.window.addstr(row, col, text, attr)
+        except curses.error:
+            # the bottom-right cell cannot be written without scrolling
+            pass
+
+    def invalidate(self):
+        self.drawn.clear()
+        self.window.erase()
+
+
+class TerminalGame:
+    def __init__(self, window, fps: int):
+        self.window = window
+        self.cells = CellCache(window)
+        self.fps = fps
+        self.state = StateManager()
+        self.engine = GameEngine(self.state)
+        # the engine's path advances one sample per frame of the kivy app;
+        # at a lower terminal rate it takes several samples per tick
+        self.path_steps = max(1, round(Config.TARGET_FPS / fps))
+        self.bet_text = str(Config.MIN_BET)
+        self.message = ""
+        self.message_attr = 0
+        self.timers: List[Tuple[float, Callable]] = []
+        self.plane_cell: Optional[Tuple[int, int]] = None
+        self.path_range = (0.0, 1.0)
+        self.running = True
+        self.frames = 0
+        self.first_frame_ms = 0.0
+        self.colors = curses.has_colors()
+        if self.colors:
+            curses.use_default_colors()
+            curses.init_pair(1, curses.COLOR_GREEN, -1)
+            curses.init_pair(2, curses.COLOR_YELLOW, -1)
+            curses.init_pair(3, curses.COLOR_RED, -1)
+        self.layout()
+
+    def color(self, pair: int) -> int:
+        return curses.color_pair(pair) if self.colors else 0
+
+    def layout(self):
+        rows, cols = self.window.getmaxyx()
+        self.rows = rows
+        self.cols = cols
+        self.sky_top = 2
+        self.sky_height = max(1, rows - 10)
+        self.sky_width = cols - 2
+        self.cells.invalidate()
+        self.plane_cell = None
+        self.draw_frame()
+
+    def after(self, delay: float, callback: Callable):
+        self.timers.append((time.monotonic() + delay, callback))
+
+    def run_timers(self):
+        if not self.timers:
+            return
+        now = time.monotonic()
+        due = [timer for timer in self.timers if timer[0] <= now]
+        if due:
+            self.timers = [timer for timer in self.timers if timer[0] > now]
+            for _, callback in due:
+                callback()
+
+    def say(self, text: str, attr: int = 0):
+        self.message = text
+        self.message_attr = attr
+
+    # input
+
+    def handle_key(self, key: int):
+        state = self.state
+        if key in (ord("q"), 27):
+            self.running = False
+        elif key == curses.KEY_RESIZE:
+            self.layout()
+        elif state.state != GameState.BETTING:
+            if key in (ord(" "), ord("c")):
+                self.cash_out()
+        elif ord("0") <= key <= ord("9"):
+            if len(self.bet_text) < MAX_BET_DIGITS:
+                self.bet_text = (self.bet_text + chr(key)).lstrip("0") or "0"
+        elif key in (curses.KEY_BACKSPACE, 127, 8):
+            self.bet_text = self.bet_text[:-1]
+        elif key in (10, 13, curses.KEY_ENTER, ord("b")):
+            self.place_bet()
+        elif key == ord("r"):
+            state.reset_balance()
+            self.say("Balance reset")
+        elif 0 <= key < 256 and chr(key) in PRESET_KEYS:
+            self.bet_text = str(Config.BET_PRESETS[PRESET_KEYS.index(chr(key))])
+
+    # rules, in the same order the kivy GameView applies them
+
+    def place_bet(self):
+        try:
+            amount = int(self.bet_text)
+        except ValueError:
+            self.bet_text = str(Config.MIN_BET)
+            return
+        if not self.state.can_place_bet(amount):
+            self.say(f"Bet must be between {Config.MIN_BET} and your balance")
+            return
+        self.state.place_bet(amount)
+        self.engine.generate_flight_path(self.sky_width, self.sky_height)
+        self.engine.reset_plane()
+        self.say("")
+        self.after(BET_COOLDOWN, self._clear_bet_cooldown)
+
+    def _clear_bet_cooldown(self):
+        self.state.cooldown_bet = False
+
+    def _clear_cashout_cooldown(self):
+        self.state.cooldown_cashout = False
+
+    def cash_out(self):
+        if not self.state.can_cash_out():
+            return
+        winnings = self.state.cash_out()
+        self.say(f"CASHED OUT +${winnings}", curses.A_BOLD | self.color(1))
+        self.after(CASH_OUT_COOLDOWN, self._clear_cashout_cooldown)
+        self.after(RESET_AFTER_CASH_OUT, self.reset_game)
+
+    def reset_game(self):
+        self.state.reset_to_betting()
+        self.engine.reset_plane()
+
+    def update(self):
+        state = self.state
+        if state.state != GameState.FLYING:
+            return
+        state.update_multiplier()
+        for _ in range(self.path_steps):
+            self.engine.update_plane_position()
+        if state.check_crash():
+            self.say(
+                f"CRASHED AT {state.multiplier:.2f}x!", curses.A_BOLD | self.color(3)
+            )
+            curses.beep()
+            self.after(RESET_AFTER_CRASH, self.reset_game)
+
+    # drawing: every field is written through the cell cache each frame and
+    # only the ones whose text changed cost anything
+
+    def draw_frame(self):
+        if self.rows < MIN_SIZE[0] or self.cols < MIN_SIZE[1]:
+            return
+        put = self.cells.put
+        put(0, 1, "SHIIIUUUU", curses.A_BOLD)
+        put(1, 0, "-" * self.cols)
+        put(self.sky_top + self.sky_height, 0, "-" * self.cols)
+        put(
+            self.rows - 1,
+            1,
+            f"0-9 bet  {'/'.join(PRESET_KEYS)} "
+            f"{'/'.join(str(p) for p in Config.BET_PRESETS)}"
+            "  enter place  space cash out  r reset  q quit",
+            curses.A_DIM,
+            self.cols - 2,
+        )
+
+    def plane_position(self) -> Optional[Tuple[int, int]]:
+        engine = self.engine
+        path = engine.flight_path
+        if not path:
+            return None
+        # progress along the engine's path maps to columns and its height
+        # range to rows, so the flight keeps its shape at any terminal size
+        ys = self.path_range
+        index = engine.current_path_index
+        col = 1 + index * (self.sky_width - 1) // max(1, len(path) - 1)
+        y = (engine.plane_y - ys[0]) / ((ys[1] - ys[0]) or 1)
+        row = self.sky_top + self.sky_height - 1 - round(y * (self.sky_height - 1))
+        return row, col
+
+    def draw(self):
+        if self.rows < MIN_SIZE[0] or self.cols < MIN_SIZE[1]:
+            self.cells.put(0, 0, "terminal too small", 0, self.cols - 1)
+            return
+        state = self.state
+        put = self.cells.put
+        width = self.cols - 2
+
+        put(0, self.cols - 22, f"Balance: ${state.balance}", curses.A_BOLD, 21)
+
+        flying = state.state == GameState.FLYING
+        if flying:
+            if self.plane_cell is None:
+                path = self.engine.flight_path
+                self.path_range = (
+                    min(y for _, y in path),
+                    max(y for _, y in path),
+                )
+            cell = self.plane_position()
+        else:
+            cell = None
+        if cell != self.plane_cell:
+            if self.plane_cell is not None:
+                put(*self.plane_cell, " ")
+            if cell is not None:
+                put(*cell, ">", curses.A_BOLD)
+            self.plane_cell = cell
+
+        base = self.sky_top + self.sky_height + 1
+        if state.state in (GameState.FLYING, GameState.CRASHED):
+            multiplier = state.multiplier
+            pair = TIER_PAIRS.get(self.engine.get_multiplier_color(multiplier), 0)
+            attr = curses.A_BOLD | self.color(pair)
+            potential = state.current_bet * multiplier
+        else:
+            multiplier = 1.0
+            attr = curses.A_BOLD
+            potential = 0.0
+        put(base, 1, f"{multiplier:8.2f}x", attr, 12)
+        put(base, 14, f"Potential: ${potential:.2f}", 0, 24)
+
+        cursor = "_" if state.state == GameState.BETTING else " "
+        put(
+            base + 1,
+            1,
+            f"Bet: ${self.bet_text}{cursor}"
+            + (f"   riding ${state.current_bet}" if flying else ""),
+            0,
+            width,
+        )
+        put(base + 2, 1, self.message, self.message_attr, width)
+
+        col = 1
+        put(base + 3, col, "History:", curses.A_DIM)
+        col += 9
+        for entry in list(state.history)[-5:][::-1]:
+            text = f"{entry['multiplier']:.2f}x"
+            put(
+                base + 3,
+                col,
+                text,
+                self.color(1 if entry["success"] else 3),
+                9,
+            )
+            col += 9
+        put(base + 3, col, "", 0, max(0, self.cols - col - 1))
+
+        stats = state.stats
+        put(
+            base + 4,
+            1,
+            f"Games {stats['total_games']}  Wins {stats['wins']}"
+            f"  Losses {stats['losses']}"
+            f"  Best {stats['highest_multiplier']:.2f}x"
+            f"  Biggest win ${stats['biggest_win']}",
+            curses.A_DIM,
+            width,
+        )
+
+    def run(self):
+        self.window.timeout(max(1, 1000 // self.fps))
+        while self.running:
+            self.run_timers()
+            self.update()
+            self.draw()
+            self.window.noutrefresh()
+            curses.doupdate()
+            self.frames += 1
+            if self.frames == 1:
+                self.first_frame_ms = (time.perf_counter() - STARTED) * 1000
+            # waiting on input doubles as the frame timer, so keys are
+            # handled as soon as they arrive
+            key = self.window.getch()
+            while key != -1:
+                self.handle_key(key)
+                self.window.timeout(0)
+                key = self.window.getch()
+            self.window.timeout(max(1, 1000 // self.fps))
+
+
+def play(window, options: argparse.Namespace) -> TerminalGame:
+    curses.curs_set(0)
+    window.keypad(True)
+    game = TerminalGame(window, options.fps)
+    game.run()
+    return game
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Shiiiuuuu in the terminal")
+    parser.add_argument(
+        "--fps",
+        type=int,
+        default=15,
+        help="frame rate; lower it on slow links",
+    )
+    parser.add_argument(
+        "--report",
+        action="store_true",
+        help="print startup time, frame count and curses writes on exit",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    options = parse_args(argv)
+    # curses waits this long after an escape for a key sequence; the
+    # default of a second makes escape feel broken
+    if hasattr(curses, "set_escdelay"):
+        curses.set_escdelay(25)
+    game = curses.wrapper(play, options)
+    if options.report:
+        rss = ""
+        if resource is not None:
+            rss = f", peak rss {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss} KiB"
+        print(
+            f"first frame after {game.first_frame_ms:.1f} ms, {game.frames} frames,"
+            f" {game.cells.writes} cell writes{rss}"
+        )
+
+
+if __name__ == "__main__":
+    main()
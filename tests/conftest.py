@@ -0,0 +1,6 @@
+import os
+import sys
+
+# the benchmarks package drives the game headlessly; make it importable
+# however pytest is started
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
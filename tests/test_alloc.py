@@ -0,0 +1,17 @@
+import pytest
+
+from benchmarks.alloc import SCENARIOS, check, measure, measure_rounds
+
+
+@pytest.mark.parametrize("name", sorted(SCENARIOS))
+def test_frame_allocations_within_budget(name):
+    result = measure(name, frames=600, warmup=240, dt=1 / 60, gc_mode="default")
+    assert check(result) == []
+
+
+def test_warm_rounds_do_not_grow_the_scene():
+    # the history column fills up over its first rounds, so warm past it
+    result = measure_rounds(rounds=20, warmup=25, dt=1 / 60)
+    assert result["widget_growth"] == 0
+    assert result["instruction_growth"] == 0
+    assert result["glyph_renders"] == 0